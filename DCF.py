@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
+import io
 from numpy import log, sqrt, exp
 import requests
 from bs4 import BeautifulSoup
 import re
 
+from dcf_engine import discount_cash_flows
+
 # Function to scrape risk-free rate based on country
 @st.cache_data(ttl=3600)  # Cache for 1 hour
 def get_risk_free_rate(country):
@@ -77,6 +80,109 @@ def get_risk_free_rate(country):
         }
         return fallback_rates.get(country, 6.0)
 
+# Editable projection columns for each revenue method (besides "Year")
+PROJECTION_COLUMNS = {
+    "Manual Input": ["Revenue", "EBITDA Margin (%)", "CapEx", "Depreciation", "Change in WC"],
+    "Growth Rate Based": ["Growth Rate (%)", "EBITDA Margin (%)", "CapEx", "Depreciation", "Change in WC"],
+}
+
+def default_projection_inputs(projection_years, revenue_method):
+    """Starting projection grid, one row per year"""
+    i = np.arange(projection_years)
+    defaults = {
+        "Year": [f"Year {year}" for year in i + 1],
+        "Revenue": 100000000.0 + i * 10000000,
+        "Growth Rate (%)": 10.0 - i * 1.0,  # Decreasing growth rate over time
+        "EBITDA Margin (%)": np.full(projection_years, 25.0),
+        "CapEx": 10000000.0 + i * 1000000,
+        "Depreciation": 5000000.0 + i * 500000,
+        "Change in WC": 2000000.0 + i * 500000,
+    }
+    return pd.DataFrame({name: defaults[name] for name in ["Year"] + PROJECTION_COLUMNS[revenue_method]})
+
+def read_projection_csv(text, revenue_method):
+    """Projection grid from CSV text; headers match the table columns ignoring case, spaces and units"""
+    def normalize(name):
+        return re.sub(r"\(.*?\)|[^a-z]", "", str(name).lower())
+
+    uploaded = pd.read_csv(io.StringIO(text))
+    by_name = {normalize(column): column for column in uploaded.columns}
+    missing = [name for name in PROJECTION_COLUMNS[revenue_method] if normalize(name) not in by_name]
+    if missing:
+        raise ValueError(f"missing column(s): {', '.join(missing)}")
+    if uploaded.empty:
+        raise ValueError("no rows")
+
+    table = pd.DataFrame({"Year": [f"Year {year}" for year in range(1, len(uploaded) + 1)]})
+    for name in PROJECTION_COLUMNS[revenue_method]:
+        table[name] = pd.to_numeric(uploaded[by_name[normalize(name)]], errors="raise").astype(float)
+    return table
+
+def free_cash_flows(revenue, ebitda_margin, capex, depreciation, wc_change, tax_rate):
+    """EBITDA, EBIT, NOPAT and FCF columns; inputs broadcast, so a leading scenario axis values many at once"""
+    ebitda = revenue * ebitda_margin
+    ebit = ebitda - depreciation  # EBIT = EBITDA - Depreciation
+    nopat = ebit * (1 - tax_rate)  # NOPAT = EBIT * (1 - Tax Rate)
+    fcf = nopat + depreciation - capex - wc_change  # Add back depreciation
+    return {"revenue": revenue, "ebitda": ebitda, "ebit": ebit, "nopat": nopat, "fcf": fcf}
+
+def value_scenarios(revenue, ebitda_margin, capex, depreciation, wc_change, tax_rate, scenarios, net_debt, shares_outstanding):
+    """Value every scenario row in one pass over (scenario, year) arrays
+
+    scenarios holds WACC, terminal growth, a relative revenue adjustment and an EBITDA
+    margin adjustment per row. Returns a per-scenario summary frame and a detail frame
+    indexed by (scenario, year); NaN marks scenarios where WACC does not exceed growth.
+    """
+    wacc = scenarios["WACC (%)"].to_numpy(dtype=float) / 100
+    terminal_growth = scenarios["Terminal Growth (%)"].to_numpy(dtype=float) / 100
+    revenue_adjustment = scenarios["Revenue Adj. (%)"].to_numpy(dtype=float)[:, None] / 100
+    margin_adjustment = scenarios["EBITDA Margin Adj. (pp)"].to_numpy(dtype=float)[:, None] / 100
+
+    flows = free_cash_flows(revenue * (1 + revenue_adjustment), ebitda_margin + margin_adjustment,
+                            capex, depreciation, wc_change, tax_rate)
+    valuation = discount_cash_flows(flows["fcf"], wacc, terminal_growth)
+    equity_value = valuation["enterprise_value"] - net_debt
+
+    names = scenarios["Scenario"].tolist()
+    years = [f"Year {i+1}" for i in range(flows["fcf"].shape[-1])]
+    shape = flows["fcf"].shape
+    detail = pd.DataFrame(
+        {
+            "Revenue": np.broadcast_to(flows["revenue"], shape).ravel(),
+            "EBITDA": flows["ebitda"].ravel(),
+            "NOPAT": flows["nopat"].ravel(),
+            "Free Cash Flow": flows["fcf"].ravel(),
+            "Discount Factor": np.broadcast_to(valuation["discount_factors"], shape).ravel(),
+            "PV of FCF": (flows["fcf"] * valuation["discount_factors"]).ravel(),
+        },
+        index=pd.MultiIndex.from_product([names, years], names=["Scenario", "Year"]),
+    )
+    summary = pd.DataFrame({
+        "Scenario": names,
+        "WACC (%)": wacc * 100,
+        "Terminal Growth (%)": terminal_growth * 100,
+        "PV of FCF": valuation["pv_fcf"],
+        "Terminal Value": valuation["terminal_value"],
+        "PV of Terminal Value": valuation["pv_terminal_value"],
+        "Enterprise Value": valuation["enterprise_value"],
+        "Net Debt": np.full(len(names), float(net_debt)),
+        "Equity Value": equity_value,
+        "Value per Share": equity_value / shares_outstanding,
+    })
+    return summary, detail
+
+def scenario_names(names):
+    """Scenario labels with blanks named by row and repeats suffixed " (2)", " (3)", ..."""
+    labels = []
+    for i, name in enumerate(names):
+        label = str(name) if isinstance(name, str) and name.strip() else f"Scenario {i+1}"
+        unique, count = label, 1
+        while unique in labels:
+            count += 1
+            unique = f"{label} ({count})"
+        labels.append(unique)
+    return labels
+
 try:
     st.set_page_config(
         page_title="Automatic DCF Valuation Tool",
@@ -156,7 +262,7 @@ st.write(f"**WACC:** {wacc * 100:.2f}%")
 st.markdown("---")
 st.header("Step 2: Revenue and Cash Flow Projections")
 
-projection_years = st.number_input("Number of Projection Years", min_value=3, max_value=10, value=5, step=1)
+projection_years = st.number_input("Number of Projection Years", min_value=3, max_value=50, value=5, step=1)
 
 # Revenue projection method selection
 st.subheader("Revenue Projection Method")
@@ -166,79 +272,67 @@ revenue_method = st.radio(
     horizontal=True
 )
 
-revenue = []
-ebitda_margin = []
-capex = []
-depreciation = []
-wc_change = []
+st.subheader("Projection Inputs")
+input_source = st.radio(
+    "Projection data source:",
+    ["Edit Table", "Upload / Paste CSV"],
+    horizontal=True,
+    help="A CSV needs one row per year and the same columns as the table; its row count sets the horizon"
+)
 
 if revenue_method == "Growth Rate Based":
-    st.subheader("Revenue Growth Projections")
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        base_revenue = st.number_input(
-            f"Base Year Revenue ({currency_symbol})", 
-            value=100000000, 
-            step=1000000,
-            help="Current year or last year's revenue"
-        )
-    
-    with col2:
-        st.write("**Revenue Growth Rates by Year:**")
-    
-    growth_rates = []
-    for i in range(projection_years):
-        growth_rate = st.number_input(
-            f"Year {i+1} Growth Rate (%)", 
-            min_value=-50.0, 
-            max_value=100.0, 
-            value=10.0 - i*1.0,  # Decreasing growth rate over time
-            step=0.5,
-            key=f"growth_{i}"
-        ) / 100
-        growth_rates.append(growth_rate)
-    
-    # Calculate revenue based on growth rates
-    current_revenue = base_revenue
-    for i in range(projection_years):
-        current_revenue = current_revenue * (1 + growth_rates[i])
-        revenue.append(current_revenue)
-    
-    # Show calculated revenues
-    st.subheader("Calculated Revenue Projections")
-    revenue_df = pd.DataFrame({
-        "Year": [f"Year {i+1}" for i in range(projection_years)],
-        "Growth Rate": [f"{gr*100:.1f}%" for gr in growth_rates],
-        f"Revenue ({currency_symbol})": [f"{r:,.0f}" for r in revenue]
-    })
-    st.dataframe(revenue_df, use_container_width=True)
+    base_revenue = st.number_input(
+        f"Base Year Revenue ({currency_symbol})", 
+        value=100000000, 
+        step=1000000,
+        help="Current year or last year's revenue"
+    )
 
-st.subheader("Enter Other Projections")
-for i in range(projection_years):
-    st.markdown(f"**Year {i+1}**")
-    
-    if revenue_method == "Manual Input":
-        col1, col2, col3, col4, col5 = st.columns(5)
-        revenue.append(col1.number_input(f"Revenue ({currency_symbol}) - Year {i+1}", key=f"rev_{i}", value=100000000 + i*10000000))
-        ebitda_margin.append(col2.slider(f"EBITDA Margin % - Year {i+1}", min_value=0.0, max_value=100.0, value=25.0, step=0.5, key=f"margin_{i}") / 100)
-        capex.append(col3.number_input(f"CapEx ({currency_symbol}) - Year {i+1}", key=f"capex_{i}", value=10000000 + i*1000000))
-        depreciation.append(col4.number_input(f"Depreciation ({currency_symbol}) - Year {i+1}", key=f"dep_{i}", value=5000000 + i*500000))
-        wc_change.append(col5.number_input(f"Change in WC ({currency_symbol}) - Year {i+1}", key=f"wc_{i}", value=2000000 + i*500000))
-    else:
-        # For growth rate method, only show other inputs (revenue already calculated)
-        col1, col2, col3, col4 = st.columns(4)
-        col1.metric(f"Revenue ({currency_symbol})", f"{revenue[i]:,.0f}")
-        ebitda_margin.append(col2.slider(f"EBITDA Margin % - Year {i+1}", min_value=0.0, max_value=100.0, value=25.0, step=0.5, key=f"margin_{i}") / 100)
-        capex.append(col3.number_input(f"CapEx ({currency_symbol}) - Year {i+1}", key=f"capex_{i}", value=10000000 + i*1000000))
-        depreciation.append(col4.number_input(f"Depreciation ({currency_symbol}) - Year {i+1}", key=f"dep_{i}", value=5000000 + i*500000))
-        wc_change.append(st.number_input(f"Change in WC ({currency_symbol}) - Year {i+1}", key=f"wc_{i}", value=2000000 + i*500000))
+default_inputs = default_projection_inputs(projection_years, revenue_method)
+if input_source == "Upload / Paste CSV":
+    uploaded_csv = st.file_uploader("Projections CSV", type="csv")
+    pasted_csv = st.text_area("...or paste CSV text", height=120,
+                              placeholder=",".join(default_inputs.columns[1:]))
+    csv_text = uploaded_csv.getvalue().decode("utf-8-sig") if uploaded_csv is not None else pasted_csv
+    if csv_text.strip():
+        try:
+            default_inputs = read_projection_csv(csv_text, revenue_method)
+        except ValueError as e:
+            st.error(f"Could not read projections CSV: {e}")
+            st.stop()
+        projection_years = len(default_inputs)
+
+# One editable grid for every year instead of a widget per field per year
+projection_table = st.data_editor(
+    default_inputs,
+    num_rows="fixed",
+    disabled=["Year"],
+    hide_index=True,
+    use_container_width=True,
+    column_config={
+        "Revenue": st.column_config.NumberColumn(f"Revenue ({currency_symbol})", format="%.0f"),
+        "Growth Rate (%)": st.column_config.NumberColumn(min_value=-50.0, max_value=100.0, format="%.1f"),
+        "EBITDA Margin (%)": st.column_config.NumberColumn(min_value=0.0, max_value=100.0, format="%.1f"),
+        "CapEx": st.column_config.NumberColumn(f"CapEx ({currency_symbol})", format="%.0f"),
+        "Depreciation": st.column_config.NumberColumn(f"Depreciation ({currency_symbol})", format="%.0f"),
+        "Change in WC": st.column_config.NumberColumn(f"Change in WC ({currency_symbol})", format="%.0f"),
+    }
+)
+
+# Column arrays straight from the grid
+ebitda_margin = projection_table["EBITDA Margin (%)"].to_numpy(dtype=float) / 100
+capex = projection_table["CapEx"].to_numpy(dtype=float)
+depreciation = projection_table["Depreciation"].to_numpy(dtype=float)
+wc_change = projection_table["Change in WC"].to_numpy(dtype=float)
+if revenue_method == "Growth Rate Based":
+    growth_rates = projection_table["Growth Rate (%)"].to_numpy(dtype=float) / 100
+    revenue = base_revenue * np.cumprod(1 + growth_rates)
+else:
+    revenue = projection_table["Revenue"].to_numpy(dtype=float)
 
 # Calculations for Free Cash Flow
-ebitda = [rev * margin for rev, margin in zip(revenue, ebitda_margin)]
-ebit = [e - d for e, d in zip(ebitda, depreciation)]  # EBIT = EBITDA - Depreciation
-nopat = [e * (1 - tax_rate) for e in ebit]  # NOPAT = EBIT * (1 - Tax Rate)
-fcf = [nopat + d - c - wc for nopat, d, c, wc in zip(nopat, depreciation, capex, wc_change)]  # Add back depreciation
+cash_flows = free_cash_flows(revenue, ebitda_margin, capex, depreciation, wc_change, tax_rate)
+ebitda, fcf = cash_flows["ebitda"], cash_flows["fcf"]
 
 st.markdown("---")
 st.header("Projected Free Cash Flows")
@@ -254,4 +348,46 @@ df_proj = pd.DataFrame({
 st.dataframe(df_proj, use_container_width=True)
 
 st.markdown("---")
-st.header("Next Step: Terminal Value and DCF Valuation")
\ No newline at end of file
+st.header("Step 3: Terminal Value and DCF Valuation")
+
+col1, col2, col3 = st.columns(3)
+terminal_growth = col1.number_input("Terminal Growth Rate (%)", min_value=-5.0, max_value=10.0, value=3.0, step=0.1)
+net_debt = col2.number_input(f"Net Debt ({currency_symbol})", value=50000000, step=1000000,
+                             help="Total debt minus cash and equivalents")
+shares_outstanding = col3.number_input("Shares Outstanding", min_value=1, value=10000000, step=100000)
+
+# Every row is valued in the same array pass; add rows to compare more scenarios
+st.subheader("Scenarios")
+default_scenarios = pd.DataFrame({
+    "Scenario": ["Base", "Bull", "Bear"],
+    "WACC (%)": [wacc * 100, wacc * 100 - 1, wacc * 100 + 1],
+    "Terminal Growth (%)": [terminal_growth, terminal_growth + 0.5, terminal_growth - 0.5],
+    "Revenue Adj. (%)": [0.0, 10.0, -10.0],
+    "EBITDA Margin Adj. (pp)": [0.0, 2.0, -2.0],
+})
+scenarios = st.data_editor(default_scenarios, num_rows="dynamic", hide_index=True, use_container_width=True)
+scenarios = scenarios.dropna(subset=default_scenarios.columns[1:]).reset_index(drop=True)
+scenarios["Scenario"] = scenario_names(scenarios["Scenario"])
+
+if scenarios.empty:
+    st.info("Add at least one scenario to value")
+    st.stop()
+
+scenario_summary, scenario_detail = value_scenarios(
+    revenue, ebitda_margin, capex, depreciation, wc_change, tax_rate, scenarios, net_debt, shares_outstanding
+)
+if scenario_summary["Enterprise Value"].isna().any():
+    st.warning("Scenarios where WACC does not exceed terminal growth have no terminal value and are left blank")
+
+base_case = scenario_summary.iloc[0]
+col1, col2, col3 = st.columns(3)
+col1.metric(f"Enterprise Value ({base_case['Scenario']})", f"{currency_symbol}{base_case['Enterprise Value']:,.0f}")
+col2.metric("Equity Value", f"{currency_symbol}{base_case['Equity Value']:,.0f}")
+col3.metric("Value per Share", f"{currency_symbol}{base_case['Value per Share']:,.2f}")
+
+st.dataframe(scenario_summary, use_container_width=True, hide_index=True)
+st.bar_chart(scenario_summary.set_index("Scenario")["Value per Share"])
+
+with st.expander("Cash flow detail by scenario"):
+    detail_scenario = st.selectbox("Scenario", scenario_summary["Scenario"].unique())
+    st.dataframe(scenario_detail.xs(detail_scenario, level="Scenario"), use_container_width=True)
\ No newline at end of file
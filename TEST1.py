@@ -2,15 +2,33 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from numpy import log, sqrt, exp
-import requests
-from bs4 import BeautifulSoup
-import re
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from datetime import datetime, date
 import io
+import os
 import base64
+import uuid
+
+from array_store import MB, ArrayStore
+from beta_estimation import ADJUSTMENTS, BENCHMARK_INDICES, DEFAULT_PRICE_DIR, estimate_betas, load_prices, price_signature
+from comparables import FIELD_QUANTILES, MULTIPLE_LABELS, football_field, implied_values, peer_multiples
+from dcf_engine import (RATIO_DRIVERS, discount_cash_flows, engine_inputs, period_label, period_rate,
+                        project_financials, simulate_value_per_share)
+from dcf_sensitivity import greeks_table, sobol_indices, tornado_analysis
+from dcf_solver import implied_revenue_growth, implied_terminal_growth, implied_wacc, market_value_wacc
+from discounting import date_grid
+from fundamentals_store import FundamentalsStore
+from peer_benchmarks import PeerBenchmarks, read_peers
+from job_queue import CANCELLED, FAILED, FINISHED_STATES, JobQueue
+from rate_history import RateHistory
+from rate_refresher import RateRefresher
+from rate_sources import HedgedRateFetcher, RateUnavailable, default_sources
+from run_store import RunStore, canonical_hash
+from shared_cache import SharedResultCache
+from simulation_summary import SimulationSummary
+from valuation_cube import MAX_CUBE_CELLS, axis_grid, cube_slice, max_points_per_axis, valuation_cube
 
 # Page configuration
 try:
@@ -222,51 +240,258 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+# Estimated 10Y yields (updated as of 2025), used when no live or stored rate is available
+FALLBACK_RATES = {
+    "India": 6.85, "USA": 4.25, "UK": 4.15, "Germany": 2.35, "France": 2.95
+}
+
+# Seconds between background refreshes of every country's 10Y yield
+RATE_REFRESH_SECONDS = int(os.environ.get("DCF_RATE_REFRESH_SECONDS", 3600))
+
+@st.cache_resource
+def get_rate_fetcher():
+    """Hedged multi-source 10Y yield fetcher with per-source health, shared by every session (see rate_sources)"""
+    return HedgedRateFetcher(default_sources(), hedge_delay=1.0, timeout=10.0)
+
 # Enhanced risk-free rate fetching with more robust error handling
 @st.cache_data(ttl=3600)
 def get_risk_free_rate(country):
-    """Enhanced risk-free rate fetching with multiple fallback sources"""
+    """10Y government bond yield from the first source to answer, or an estimated rate"""
+    if country not in FALLBACK_RATES:
+        return 6.0
+    
     try:
-        country_urls = {
-            "India": "https://tradingeconomics.com/india/government-bond-yield",
-            "USA": "https://tradingeconomics.com/united-states/government-bond-yield", 
-            "UK": "https://tradingeconomics.com/united-kingdom/government-bond-yield",
-            "Germany": "https://tradingeconomics.com/germany/government-bond-yield",
-            "France": "https://tradingeconomics.com/france/government-bond-yield"
-        }
-        
-        if country not in country_urls:
-            return 6.0
-            
-        url = country_urls[country]
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=15)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        rate_element = soup.find('span', {'id': 'p_cur_val'}) or soup.find('div', {'class': 'col-xs-6 col-sm-4 col-md-4 col-lg-3'})
-        
-        if rate_element:
-            rate_text = rate_element.get_text().strip()
-            rate_match = re.search(r'(\d+\.?\d*)', rate_text)
-            if rate_match:
-                return float(rate_match.group(1))
-        
-        # Enhanced fallback rates (updated as of 2025)
-        fallback_rates = {
-            "India": 6.85, "USA": 4.25, "UK": 4.15, "Germany": 2.35, "France": 2.95
-        }
-        return fallback_rates.get(country, 6.0)
-        
-    except Exception as e:
+        rate, _ = get_rate_fetcher().fetch(country)
+    except RateUnavailable:
         st.warning(f"Could not fetch live rate for {country}. Using estimated rate.")
-        fallback_rates = {
-            "India": 6.85, "USA": 4.25, "UK": 4.15, "Germany": 2.35, "France": 2.95
-        }
-        return fallback_rates.get(country, 6.0)
+        return FALLBACK_RATES[country]
+    record_rate(country, rate)
+    return rate
+
+@st.cache_resource
+def get_rate_history():
+    """Local yield history per country and tenor, shared by every session (see rate_history.RateHistory)"""
+    return RateHistory()
+
+@st.cache_resource
+def get_rate_refresher():
+    """Background thread refreshing every country's 10Y yield into the rate history (see rate_refresher)"""
+    return RateRefresher(get_rate_fetcher(), get_rate_history(), FALLBACK_RATES,
+                         interval=RATE_REFRESH_SECONDS).start()
+
+def record_rate(country, rate):
+    """Add a fetched 10Y yield to the rate history; the history is optional, so write errors are ignored"""
+    try:
+        get_rate_history().append(country, "10Y", [date.today()], [rate])
+    except OSError:
+        pass
+
+def current_rate(country):
+    """Latest known 10Y yield without touching the network: refreshed, else stored, else estimated"""
+    refreshed = get_rate_refresher().latest(country)
+    if refreshed:
+        return refreshed["rate"]
+    stored = get_rate_history().latest(country, "10Y")
+    if stored:
+        return stored[1]
+    return FALLBACK_RATES.get(country, 6.0)
+
+# Seed of the Monte Carlo paths and of the 3D explorer's sampling, so reruns show the same results
+MONTE_CARLO_SEED = 42
+
+# Projection period lengths offered in the inputs tab, as periods per year
+PERIOD_FREQUENCIES = {"Annual": 1, "Quarterly": 4, "Monthly": 12}
+
+def period_labels(years, periods_per_year):
+    """Row labels for the projection periods: Year 1, ... or Y1 Q1 / Y1 M1, ... below annual"""
+    if periods_per_year == 1:
+        return [f"Year {i+1}" for i in range(years)]
+    return [period_label(t, periods_per_year) for t in range(years * periods_per_year)]
+
+# How the default risk-free rate is read from the stored yield history
+RATE_BASES = ["Latest 10Y", "30-Day Average 10Y", "90-Day Average 10Y", "Tenor Matched to Horizon"]
+
+# Inputs that can be swept in the multi-dimensional sensitivity cube
+CUBE_AXIS_LABELS = {
+    "wacc": "WACC",
+    "terminal_growth": "Terminal Growth Rate",
+    "revenue_growth_1": "Year 1 Revenue Growth",
+    "revenue_growth": "Revenue Growth (All Years)",
+    "ebitda_margin": "EBITDA Margin (All Years)",
+    "capex_ratio": "CapEx / Revenue",
+    "depreciation_ratio": "Depreciation / Revenue",
+    "wc_ratio": "WC Change / Revenue",
+    "tax_rate": "Tax Rate",
+}
+
+# Report-tab comparison rows: metric -> (label, value format, position above / below the peer median)
+COMPARISON_METRICS = {
+    "ebitda_margin": ("EBITDA Margin (%)", "{:.1f}%", "🟢 Above", "🔴 Below"),
+    "capex_rev": ("CapEx/Revenue (%)", "{:.1f}%", "🟡 Higher", "🟢 Lower"),
+    "beta": ("Beta", "{:.2f}", "🔴 Higher Risk", "🟢 Lower Risk"),
+    "debt_equity": ("Debt/Equity Ratio", "{:.2f}", "🔴 Higher", "🟢 Lower"),
+    "roe": ("ROE (%)", "{:.1f}%", "🟢 Above", "🔴 Below"),
+    "roic": ("ROIC (%)", "{:.1f}%", "🟢 Above", "🔴 Below"),
+    "revenue_multiple": ("Revenue Multiple (x)", "{:.1f}x", "🟢 Premium", "🔴 Discount"),
+}
+
+@st.cache_resource
+def get_array_store():
+    """Result arrays of every session under shared memory budgets (see array_store.ArrayStore)"""
+    return ArrayStore(
+        session_budget=int(os.environ.get("DCF_SESSION_MEMORY_MB", 256)) * MB,
+        global_budget=int(os.environ.get("DCF_GLOBAL_MEMORY_MB", 1024)) * MB,
+    )
+
+@st.cache_resource
+def get_shared_cache():
+    """Identical-input results shared read-only by every session (see shared_cache.SharedResultCache)"""
+    return SharedResultCache(max_bytes=int(os.environ.get("DCF_SHARED_CACHE_MB", 512)) * MB)
+
+def shared_result(slot, key, compute):
+    """Arrays for key from the cross-session cache, computing and publishing them on a miss
+
+    slot names the result within this session; moving a slot to a new key releases the
+    session's reference to the old one. compute returns a dict of arrays, or None to
+    skip publishing (for example a cancelled job). The shared blocks are then the only
+    in-memory copy: the job that computed the arrays has been released (see
+    background_result) and the run store keeps its copy on disk.
+    """
+    cache = get_shared_cache()
+    holder = st.session_state.session_id
+    held = st.session_state.setdefault("shared_keys", {})
+    if held.get(slot) not in (None, key):
+        cache.release(held.pop(slot), holder)
+    
+    arrays = cache.get(key, holder)
+    if arrays is None:
+        computed = compute()
+        if computed is None:
+            return None
+        arrays = cache.publish(key, holder, computed)
+    held[slot] = key
+    return arrays
+
+@st.cache_resource
+def get_job_queue():
+    """Background worker pool and job table shared by every session (see job_queue.JobQueue)"""
+    return JobQueue(max_workers=2)
+
+# Jobs finishing within this many seconds are shown in the same run instead of after a rerun
+JOB_WAIT_SECONDS = 0.5
+
+def background_result(job_queue, label, key, func, *args, slot=None, **kwargs):
+    """Result of func run as a background job under key; None while it runs, or if it was cancelled or failed
+
+    Jobs finishing within JOB_WAIT_SECONDS are returned at once. Otherwise a progress
+    fragment polls the job while the rest of the page renders, and reruns the page when
+    it finishes; the rerun resubmits with the same key and reattaches to the job. The
+    finished job is released from the queue once its result is read, so callers keep
+    what they need. A cancelled job stays cancelled for the session until restarted.
+    Without a server (bare mode, e.g. cache_warmer) there is no page to keep responsive,
+    so the job is waited for. Jobs are held per session: with a slot, a new key drops
+    this session's hold on the job it last ran in that slot, which cancels the job only
+    if no other session is waiting on it.
+    """
+    holder = st.session_state.session_id
+    cancelled = st.session_state.setdefault("cancelled_jobs", set())
+    slots = st.session_state.setdefault("job_slots", {})
+    if slot is not None and slot in slots and slots[slot][0] != key:
+        try:
+            job_queue.cancel(slots.pop(slot)[1], holder)
+        except KeyError:
+            pass  # Already released
+    if key in cancelled:
+        st.warning(f"{label} cancelled")
+        if st.button("Restart", key=f"restart_job_{'_'.join(map(str, key))}"):
+            cancelled.discard(key)
+            st.rerun()
+        return None
+    
+    job_id = job_queue.submit(func, *args, key=key, holder=holder, **kwargs)
+    if slot is not None:
+        slots[slot] = (key, job_id)
+    status = job_queue.wait(job_id, JOB_WAIT_SECONDS if st.runtime.exists() else None)
+    if status["state"] not in FINISHED_STATES:
+        job_progress(job_queue, job_id, key, label)
+        return None
+    
+    try:
+        if status["state"] == CANCELLED:
+            cancelled.add(key)
+            st.warning(f"{label} cancelled")
+            return None
+        if status["state"] == FAILED:
+            st.error(f"{label} failed: {status['error']}")
+            return None
+        return job_queue.result(job_id)
+    finally:
+        job_queue.release(job_id, holder)
+
+@st.fragment(run_every=0.5)
+def job_progress(job_queue, job_id, key, label):
+    """Progress bar and cancel button of a running job; reruns the page once the job finishes
+
+    Cancel stops waiting in this session only; the job itself is cancelled once no other
+    session holds it.
+    """
+    try:
+        status = job_queue.status(job_id)
+    except KeyError:
+        st.rerun()  # Released by another session sharing the job; the page picks up its published result
+    if status["state"] in FINISHED_STATES:
+        st.rerun()
+    st.progress(status["progress"], text=f"{label} ({status['progress']:.0%})")
+    if st.button("Cancel", key=f"cancel_job_{job_id}"):
+        try:
+            job_queue.cancel(job_id, st.session_state.session_id)
+        except KeyError:
+            pass  # Finished and released meanwhile
+        st.session_state.setdefault("cancelled_jobs", set()).add(key)
+        st.rerun()
+
+@st.cache_resource
+def get_peer_benchmarks():
+    """Sector distributions from the local peer dataset, shared by every session (see peer_benchmarks)"""
+    return PeerBenchmarks()
+
+def industry_benchmark(industry):
+    """Peer-dataset medians for the sector where it has enough peers, over the static INDUSTRY_BENCHMARKS values"""
+    return {**INDUSTRY_BENCHMARKS[industry], **get_peer_benchmarks().medians(industry)}
+
+@st.cache_data(show_spinner=False)
+def sector_peer_multiples(path, signature, industry):
+    """EV/EBITDA, EV/Revenue and P/FCF of the sector's peers; signature (mtime, size) invalidates the cache"""
+    peers = read_peers(path)
+    return peer_multiples(peers[peers["sector"] == industry])
+
+@st.cache_data(show_spinner="Estimating betas from price history...")
+def estimated_betas(path, signature, benchmark, years, frequency, adjustment):
+    """Rolling-regression betas of every ticker in the price files; signature invalidates the cache"""
+    return estimate_betas(load_prices(path), benchmark, years, frequency, adjustment)
+
+@st.cache_data(show_spinner=False)
+def price_columns(path, signature):
+    return list(load_prices(path).columns)
+
+@st.cache_resource
+def get_fundamentals_store():
+    """Local historical statements keyed by ticker, or None if none have been loaded (see fundamentals_store)"""
+    return FundamentalsStore() if FundamentalsStore.exists() else None
+
+def fundamental_default(fundamentals, name, fallback, scale=100.0, low=None, high=None):
+    """Widget default from the ticker's stored history, scaled and clipped to the widget's range
+
+    Falls back to the industry default when the ticker or the item is not stored.
+    """
+    value = fundamentals.get(name, np.nan) if fundamentals else np.nan
+    value = value * scale if np.isfinite(value) else fallback
+    return round(float(np.clip(value, -np.inf if low is None else low, np.inf if high is None else high)), 2)
+
+@st.cache_resource
+def get_run_store():
+    """Persistent store of completed runs, shared by every session (see run_store.RunStore)"""
+    return RunStore()
 
 def calculate_financial_ratios(revenue, ebitda, fcf, capex, shares_outstanding):
     """Calculate comprehensive financial ratios for analysis"""
@@ -343,6 +568,12 @@ def format_currency(value, symbol):
     else:
         return f"{symbol}{value:.0f}"
 
+def format_ordinal(value):
+    """Rounded percentile rank as an ordinal: 1st, 22nd, 58th"""
+    number = int(round(value))
+    suffix = "th" if 10 <= number % 100 <= 20 else {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
 def generate_investment_thesis(company_name, industry, ratios, valuation_results, recommendation):
     """Generate a comprehensive investment thesis"""
     
@@ -502,6 +733,11 @@ with st.sidebar:
     ticker_symbol = st.text_input("Ticker Symbol", value="EXMP", 
                                  help="Stock ticker symbol")
     
+    fundamentals_store = get_fundamentals_store()
+    fundamentals = fundamentals_store.latest_inputs(ticker_symbol) if fundamentals_store else None
+    if fundamentals:
+        st.caption(f"📂 Prefilled from stored statements (period ending {fundamentals['period_end'][:10]})")
+    
     country = st.selectbox(
         "Domicile Country", 
         options=["India", "USA", "UK", "Germany", "France", "Other"],
@@ -532,31 +768,87 @@ with st.sidebar:
                 st.session_state.risk_free_rate = scraped_rate
                 st.success(f"✅ Updated: {scraped_rate:.2f}%")
     
-    # Initialize session state
+    # Initialize session state from the background refresher or the rate history, never waiting on the network
+    rate_history = get_rate_history()
     if 'risk_free_rate' not in st.session_state:
-        st.session_state.risk_free_rate = get_risk_free_rate(country)
+        st.session_state.risk_free_rate = current_rate(country)
+    
+    default_rate, rate_help = None, f"10-year government bond yield for {country}"
+    if rate_history.tenors(country):
+        rate_basis = st.selectbox("Rate Basis", RATE_BASES,
+                                  help="Spot, smoothed or horizon-matched yield from the local rate history")
+        if rate_basis == "30-Day Average 10Y":
+            default_rate = rate_history.smoothed(country, "10Y", days=30)
+            rate_help = f"30-day average 10-year yield for {country}"
+        elif rate_basis == "90-Day Average 10Y":
+            default_rate = rate_history.smoothed(country, "10Y", days=90)
+            rate_help = f"90-day average 10-year yield for {country}"
+        elif rate_basis == "Tenor Matched to Horizon":
+            horizon = st.session_state.get("projection_years", 5)
+            default_rate = rate_history.matched_rate(country, horizon)
+            rate_help = f"{country} yield interpolated to the {horizon}-year projection horizon"
+    if default_rate is None:
+        default_rate = st.session_state.risk_free_rate
     
     risk_free_rate = st.number_input(
         "Risk-Free Rate (%)", 
         min_value=0.0, 
         max_value=20.0, 
-        value=float(st.session_state.risk_free_rate), 
+        value=float(np.clip(default_rate, 0.0, 20.0)), 
         step=0.01,
-        help=f"10-year government bond yield for {country}"
+        help=rate_help
     ) / 100
     
+    with st.expander("📡 Rate Source Status"):
+        st.dataframe(pd.DataFrame(get_rate_fetcher().stats()).T, use_container_width=True)
+        st.caption(f"Background refresh every {RATE_REFRESH_SECONDS // 60} minutes")
+        st.dataframe(pd.DataFrame(get_rate_refresher().status()).T, use_container_width=True)
+    
     # Enhanced beta with industry context
-    industry_data = INDUSTRY_BENCHMARKS[industry]
-    default_beta = industry_data["beta"] if use_industry_defaults else 1.2
+    industry_data = industry_benchmark(industry)
+    default_beta = float(np.clip(industry_data["beta"], 0.0, 3.0)) if use_industry_defaults else 1.2
+    
+    # Beta regressed on local price history, when price files are available
+    beta_estimate = None
+    prices_signature = price_signature(DEFAULT_PRICE_DIR)
+    if prices_signature[0]:
+        beta_source = st.radio("Beta Source", ["Manual / Industry", "Price History Regression"], horizontal=True)
+        if beta_source == "Price History Regression":
+            available = price_columns(DEFAULT_PRICE_DIR, prices_signature)
+            default_index = BENCHMARK_INDICES.get(country)
+            benchmark = st.selectbox("Benchmark Index", available,
+                                     index=available.index(default_index) if default_index in available else 0)
+            beta_col1, beta_col2 = st.columns(2)
+            with beta_col1:
+                beta_frequency = st.selectbox("Return Frequency", ["weekly", "daily", "monthly"])
+            with beta_col2:
+                beta_years = st.number_input("Window (Years)", min_value=1, max_value=10, value=2, step=1)
+            beta_adjustment = st.selectbox("Adjustment", ("none",) + ADJUSTMENTS, index=1,
+                                           format_func=str.capitalize,
+                                           help="Blume: 2/3 raw + 1/3. Vasicek: shrink toward the cross-sectional mean by estimation error")
+            betas = estimated_betas(DEFAULT_PRICE_DIR, prices_signature, benchmark, beta_years, beta_frequency,
+                                    None if beta_adjustment == "none" else beta_adjustment)
+            if ticker_symbol.upper() in betas.index:
+                beta_estimate = betas.loc[ticker_symbol.upper()]
+            else:
+                st.warning(f"No price history for {ticker_symbol} against {benchmark}; using the manual beta.")
     
-    beta = st.number_input(
-        f"Beta (Industry Avg: {industry_data['beta']:.2f})", 
-        min_value=0.0, 
-        max_value=3.0, 
-        value=float(default_beta), 
-        step=0.01,
-        help="Systematic risk relative to market portfolio"
-    )
+    if beta_estimate is None:
+        beta = st.number_input(
+            f"Beta (Industry Avg: {industry_data['beta']:.2f})", 
+            min_value=0.0, 
+            max_value=3.0, 
+            value=float(default_beta), 
+            step=0.01,
+            help="Systematic risk relative to market portfolio"
+        )
+    else:
+        beta = float(beta_estimate["beta"])
+        st.metric(f"Beta ({beta_adjustment.capitalize()}-Adjusted)" if beta_adjustment != "none" else "Beta (Regression)",
+                  f"{beta:.2f}")
+        st.caption(f"Raw {beta_estimate['raw_beta']:.2f} ± {beta_estimate['std_error']:.2f}, "
+                   f"R² {beta_estimate['r_squared']:.2f}, {beta_estimate['observations']} {beta_frequency} returns "
+                   f"to {beta_estimate['as_of']:%Y-%m-%d}")
     
     market_risk_premium = st.number_input(
         "Equity Risk Premium (%)", 
@@ -654,98 +946,68 @@ with tab1:
         st.markdown("#### Historical & Projected Financial Data")
         
         # Get industry defaults
-        industry_data = INDUSTRY_BENCHMARKS[industry] if use_industry_defaults else {}
+        industry_data = industry_benchmark(industry) if use_industry_defaults else {}
         
         current_revenue = st.number_input(
             f"Current Revenue ({currency_symbol} Millions)", 
             min_value=0.1, 
-            value=1000.0, 
+            value=fundamental_default(fundamentals, "current_revenue", 1000.0, scale=1e-6, low=0.1), 
             step=10.0,
             help="Latest twelve months (LTM) revenue"
         )
         
-        col_growth, col_margin = st.columns(2)
-        with col_growth:
-            revenue_growth_1 = st.number_input(
-                "Year 1 Revenue Growth (%)", 
-                min_value=-50.0, 
-                max_value=100.0, 
-                value=industry_data.get("typical_growth_high", 15.0), 
-                step=0.1
-            ) / 100
-            
-            revenue_growth_2 = st.number_input(
-                "Year 2 Revenue Growth (%)", 
-                min_value=-50.0, 
-                max_value=100.0, 
-                value=industry_data.get("typical_growth_high", 15.0) * 0.8, 
-                step=0.1
-            ) / 100
-            
-            revenue_growth_3 = st.number_input(
-                "Year 3 Revenue Growth (%)", 
-                min_value=-50.0, 
-                max_value=100.0, 
-                value=industry_data.get("typical_growth_high", 15.0) * 0.6, 
-                step=0.1
-            ) / 100
-            
-            revenue_growth_4 = st.number_input(
-                "Year 4 Revenue Growth (%)", 
-                min_value=-50.0, 
-                max_value=100.0, 
-                value=industry_data.get("typical_growth_mature", 8.0), 
-                step=0.1
-            ) / 100
-            
-            revenue_growth_5 = st.number_input(
-                "Year 5 Revenue Growth (%)", 
-                min_value=-50.0, 
-                max_value=100.0, 
-                value=industry_data.get("typical_growth_mature", 5.0), 
-                step=0.1
-            ) / 100
-            
-        with col_margin:
-            ebitda_margin_1 = st.number_input(
-                "Year 1 EBITDA Margin (%)", 
-                min_value=-20.0, 
-                max_value=60.0, 
-                value=industry_data.get("ebitda_margin", 20.0), 
-                step=0.1
-            ) / 100
-            
-            ebitda_margin_2 = st.number_input(
-                "Year 2 EBITDA Margin (%)", 
-                min_value=-20.0, 
-                max_value=60.0, 
-                value=industry_data.get("ebitda_margin", 20.0) * 1.05, 
-                step=0.1
-            ) / 100
-            
-            ebitda_margin_3 = st.number_input(
-                "Year 3 EBITDA Margin (%)", 
-                min_value=-20.0, 
-                max_value=60.0, 
-                value=industry_data.get("ebitda_margin", 20.0) * 1.1, 
-                step=0.1
-            ) / 100
-            
-            ebitda_margin_4 = st.number_input(
-                "Year 4 EBITDA Margin (%)", 
-                min_value=-20.0, 
-                max_value=60.0, 
-                value=industry_data.get("ebitda_margin", 20.0) * 1.15, 
-                step=0.1
-            ) / 100
-            
-            ebitda_margin_5 = st.number_input(
-                "Year 5 EBITDA Margin (%)", 
-                min_value=-20.0, 
-                max_value=60.0, 
-                value=industry_data.get("ebitda_margin", 20.0) * 1.2, 
-                step=0.1
-            ) / 100
+        horizon_col, frequency_col = st.columns(2)
+        projection_years = horizon_col.number_input(
+            "Projection Horizon (Years)", 
+            min_value=1, 
+            max_value=50, 
+            value=5, 
+            step=1,
+            key="projection_years",
+            help="Number of explicit forecast years before the terminal value"
+        )
+        period_frequency = frequency_col.selectbox(
+            "Period Frequency",
+            list(PERIOD_FREQUENCIES),
+            help="Length of each projected period; rates stay annual and are compounded per period"
+        )
+        periods_per_year = PERIOD_FREQUENCIES[period_frequency]
+        
+        # Default path: high growth fading to mature growth, margins expanding to +20%
+        typical_growth_high = industry_data.get("typical_growth_high", 15.0)
+        default_growth = [typical_growth_high, typical_growth_high * 0.8, typical_growth_high * 0.6,
+                          industry_data.get("typical_growth_mature", 8.0)]
+        default_margin_base = fundamental_default(fundamentals, "ebitda_margin", industry_data.get("ebitda_margin", 20.0),
+                                                  low=-20.0 / 1.2, high=60.0 / 1.2)
+        
+        # One editable grid for every period instead of two widgets per year
+        period_years = np.repeat(np.arange(projection_years), periods_per_year)
+        default_periods = pd.DataFrame({
+            "Period": period_labels(projection_years, periods_per_year),
+            "Revenue Growth (%)": [default_growth[i] if i < len(default_growth)
+                                   else industry_data.get("typical_growth_mature", 5.0) for i in period_years],
+            "EBITDA Margin (%)": [default_margin_base * (1 + 0.05 * min(i, 4)) for i in period_years],
+        })
+        period_table = st.data_editor(
+            default_periods,
+            num_rows="fixed",
+            disabled=["Period"],
+            hide_index=True,
+            use_container_width=True,
+            column_config={
+                "Revenue Growth (%)": st.column_config.NumberColumn(
+                    min_value=-50.0, max_value=100.0, format="%.1f",
+                    help="Annual growth rate, compounded over each period"
+                ),
+                "EBITDA Margin (%)": st.column_config.NumberColumn(min_value=-20.0, max_value=60.0, format="%.1f"),
+            }
+        )
+        
+        # Engine inputs are per period: growth compounds per period, revenue is the period's share of the LTM
+        annual_growth_rates = period_table["Revenue Growth (%)"].fillna(0.0).to_numpy(dtype=float) / 100
+        revenue_growth_rates = period_rate(annual_growth_rates, periods_per_year)
+        ebitda_margins = period_table["EBITDA Margin (%)"].fillna(0.0).to_numpy(dtype=float) / 100
+        period_revenue = current_revenue / periods_per_year
 
     with col2:
         st.markdown("#### Key Assumptions")
@@ -755,7 +1017,7 @@ with tab1:
             "CapEx as % of Revenue", 
             min_value=0.0, 
             max_value=30.0, 
-            value=industry_data.get("capex_rev", 8.0), 
+            value=fundamental_default(fundamentals, "capex_ratio", industry_data.get("capex_rev", 8.0), low=0.0, high=30.0), 
             step=0.1,
             help="Capital expenditures as percentage of revenue"
         ) / 100
@@ -764,7 +1026,8 @@ with tab1:
             "Depreciation as % of Revenue", 
             min_value=0.0, 
             max_value=20.0, 
-            value=industry_data.get("depreciation_rev", 6.0), 
+            value=fundamental_default(fundamentals, "depreciation_ratio", industry_data.get("depreciation_rev", 6.0),
+                                      low=0.0, high=20.0), 
             step=0.1,
             help="Depreciation expense as percentage of revenue"
         ) / 100
@@ -773,7 +1036,8 @@ with tab1:
             "Working Capital Change as % of Revenue", 
             min_value=-10.0, 
             max_value=15.0, 
-            value=industry_data.get("wc_change_rev", 3.0), 
+            value=fundamental_default(fundamentals, "wc_ratio", industry_data.get("wc_change_rev", 3.0),
+                                      low=-10.0, high=15.0), 
             step=0.1,
             help="Annual change in working capital as % of revenue growth"
         ) / 100
@@ -788,47 +1052,33 @@ with tab1:
         ) / 100
 
 with tab2:
-    # Calculate projected financials
-    revenue_projections = []
-    ebitda_projections = []
-    fcf_projections = []
-    years = ["Year 1", "Year 2", "Year 3", "Year 4", "Year 5"]
-    
-    revenue_growth_rates = [revenue_growth_1, revenue_growth_2, revenue_growth_3, revenue_growth_4, revenue_growth_5]
-    ebitda_margins = [ebitda_margin_1, ebitda_margin_2, ebitda_margin_3, ebitda_margin_4, ebitda_margin_5]
-    
-    # Build financial projections
-    for i, (growth_rate, margin) in enumerate(zip(revenue_growth_rates, ebitda_margins)):
-        if i == 0:
-            revenue = current_revenue * (1 + growth_rate)
-        else:
-            revenue = revenue_projections[i-1] * (1 + growth_rate)
-        
-        ebitda = revenue * margin
-        depreciation = revenue * depreciation_revenue_ratio
-        ebit = ebitda - depreciation
-        taxes = ebit * tax_rate if ebit > 0 else 0
-        nopat = ebit - taxes
-        
-        capex = revenue * capex_revenue_ratio
-        wc_change = revenue * growth_rate * working_capital_change_ratio if i > 0 else 0
-        
-        fcf = nopat + depreciation - capex - wc_change
-        
-        revenue_projections.append(revenue)
-        ebitda_projections.append(ebitda)
-        fcf_projections.append(fcf)
+    # Calculate projected financials for the whole horizon in one pass
+    years = period_labels(projection_years, periods_per_year)
+    
+    projections = project_financials(
+        period_revenue, revenue_growth_rates, ebitda_margins, capex_revenue_ratio,
+        depreciation_revenue_ratio, working_capital_change_ratio, tax_rate
+    )
+    revenue_projections = projections["revenue"].tolist()
+    ebitda_projections = projections["ebitda"].tolist()
+    fcf_projections = projections["fcf"].tolist()
+    
+    # Fiscal-year totals for the ratios and multiples, which are annual whatever the period length
+    annual_revenue, annual_ebitda, annual_fcf = (
+        projections[name].reshape(projection_years, periods_per_year).sum(axis=-1).tolist()
+        for name in ("revenue", "ebitda", "fcf")
+    )
     
     # Display financial projections table
-    st.markdown("#### 📊 5-Year Financial Projections")
+    st.markdown(f"#### 📊 {projection_years}-Year Financial Projections")
     
     projections_df = pd.DataFrame({
-        'Year': years,
+        'Period': years,
         f'Revenue ({currency_symbol}M)': [f"{rev:.1f}" for rev in revenue_projections],
         f'EBITDA ({currency_symbol}M)': [f"{ebitda:.1f}" for ebitda in ebitda_projections],
         'EBITDA Margin (%)': [f"{margin*100:.1f}%" for margin in ebitda_margins],
         f'Free Cash Flow ({currency_symbol}M)': [f"{fcf:.1f}" for fcf in fcf_projections],
-        'Revenue Growth (%)': [f"{growth*100:.1f}%" for growth in revenue_growth_rates]
+        'Revenue Growth (%)': [f"{growth*100:.1f}%" for growth in annual_growth_rates]
     })
     
     st.dataframe(projections_df, use_container_width=True)
@@ -884,7 +1134,7 @@ with tab3:
         shares_outstanding = st.number_input(
             "Shares Outstanding (Millions)", 
             min_value=0.1, 
-            value=10.0, 
+            value=fundamental_default(fundamentals, "shares_outstanding", 10.0, scale=1e-6, low=0.1), 
             step=1.0,
             help="Current number of shares outstanding"
         )
@@ -895,6 +1145,63 @@ with tab3:
             step=10.0,
             help="Total debt minus cash and equivalents"
         )
+        
+        market_value_weights = st.checkbox(
+            "Market-Value Capital Weights (Circular WACC)",
+            value=False,
+            help="Replace the equity weight slider with E / (E + Net Debt), solving WACC and equity value together"
+        )
+        
+        terminal_method = st.radio(
+            "Terminal Value Method",
+            ["Perpetuity Growth", "Multi-Stage (Growth → Fade → Perpetuity)"],
+            help="Multi-stage adds a high-growth stage and a linear fade to the terminal rate after the explicit forecast"
+        )
+        if terminal_method == "Perpetuity Growth":
+            terminal_stages = {}
+        else:
+            stage_col1, stage_col2, stage_col3 = st.columns(3)
+            terminal_stages = {
+                "high_growth": stage_col1.number_input(
+                    "Stage Growth (%)", 
+                    min_value=-20.0, 
+                    max_value=50.0, 
+                    value=float(np.clip(annual_growth_rates[-1] * 100, -20.0, 50.0)),  # Grid growth may exceed the stage range
+                    step=0.1,
+                    help="FCF growth during the high-growth stage and at the start of the fade"
+                ) / 100,
+                "high_growth_years": stage_col2.number_input(
+                    "High-Growth Years", min_value=0, max_value=100, value=5, step=1
+                ),
+                "fade_years": stage_col3.number_input(
+                    "Fade Years", min_value=0, max_value=100, value=10, step=1,
+                    help="Years over which growth fades linearly to the terminal rate"
+                ),
+            }
+        
+        date_aware = st.checkbox(
+            "Date-Aware Discounting (XNPV)",
+            value=False,
+            help="Discount each cash flow from the valuation date to its fiscal year end (ACT/365), with a stub first year"
+        )
+        if date_aware:
+            date_col1, date_col2 = st.columns(2)
+            valuation_date = date_col1.date_input("Valuation Date", value=date.today())
+            # Default to the first calendar year, quarter or month end after the valuation date
+            period_end = {1: pd.offsets.YearEnd(), 4: pd.offsets.QuarterEnd(), 12: pd.offsets.MonthEnd()}[periods_per_year]
+            first_year_end = date_col2.date_input(
+                "First Fiscal Year End" if periods_per_year == 1 else "First Period End",
+                value=(pd.Timestamp(valuation_date) + period_end).date(),
+                help="End of the first projected period; a date less than one period away makes it a stub"
+            )
+            mid_year = st.checkbox("Mid-Year Convention", value=False, help="Cash flows arrive mid-period instead of at period end")
+            if first_year_end <= valuation_date:
+                st.error("First fiscal year end must be after the valuation date")
+                st.stop()
+            date_options = date_grid(valuation_date, first_year_end, len(years), periods_per_year, mid_period=mid_year)
+        else:
+            date_options = {}
+        discount_options = {"periods_per_year": periods_per_year, **terminal_stages, **date_options}
     
     with col2:
         # Monte Carlo simulation parameters
@@ -902,94 +1209,99 @@ with tab3:
         run_monte_carlo = st.checkbox("Enable Monte Carlo Simulation", value=True)
         num_simulations = st.slider("Number of Simulations", 1000, 10000, 5000, step=1000) if run_monte_carlo else 1000
     
-    # DCF Calculation
-    discount_factors = [(1 + wacc) ** i for i in range(1, 6)]
-    pv_fcf = [fcf / df for fcf, df in zip(fcf_projections, discount_factors)]
+    # Model inputs shared by the simulation and the sensitivity analyses
+    valuation_inputs = {
+        "current_revenue": period_revenue,
+        "revenue_growth": np.array(revenue_growth_rates),
+        "ebitda_margin": np.array(ebitda_margins),
+        "capex_ratio": capex_revenue_ratio,
+        "depreciation_ratio": depreciation_revenue_ratio,
+        "wc_ratio": working_capital_change_ratio,
+        "tax_rate": tax_rate,
+        "risk_free_rate": risk_free_rate,
+        "beta": beta,
+        "market_risk_premium": market_risk_premium,
+        "cost_of_debt": cost_of_debt,
+        "equity_ratio": equity_ratio,
+        "terminal_growth": terminal_growth_rate,
+        "net_debt": net_debt,
+        "shares_outstanding": shares_outstanding,
+        **discount_options,
+    }
+    if market_value_weights:
+        circular = market_value_wacc(valuation_inputs)
+        if not np.isfinite(circular["wacc"]):
+            st.error("No market-value WACC: equity value is not positive at these inputs")
+            st.stop()
+        equity_ratio = float(circular["equity_ratio"])
+        debt_ratio = 100 - equity_ratio
+        wacc = float(circular["wacc"])
+        valuation_inputs["equity_ratio"] = equity_ratio
+        st.caption(
+            f"Market-value weights: equity {equity_ratio:.1f}% / debt {debt_ratio:.1f}% → "
+            f"WACC {wacc * 100:.2f}%"
+        )
     
-    # Terminal value calculation
-    terminal_fcf = fcf_projections[-1] * (1 + terminal_growth_rate)
-    terminal_value = terminal_fcf / (wacc - terminal_growth_rate)
-    pv_terminal_value = terminal_value / discount_factors[-1]
+    # DCF Calculation (explicit FCF plus terminal value)
+    dcf_result = discount_cash_flows(fcf_projections, wacc, terminal_growth_rate, **discount_options)
+    pv_fcf = (projections["fcf"] * dcf_result["period_weights"] * dcf_result["discount_factors"]).tolist()
+    terminal_value = float(dcf_result["terminal_value"])
+    pv_terminal_value = float(dcf_result["pv_terminal_value"])
     
     # Enterprise and equity value
-    enterprise_value = sum(pv_fcf) + pv_terminal_value
+    enterprise_value = float(dcf_result["enterprise_value"])
     equity_value = enterprise_value - net_debt
     value_per_share = equity_value / shares_outstanding
     
+    if terminal_stages:
+        st.caption(
+            f"Multi-stage terminal value (present value, millions): "
+            f"high-growth stage {format_currency(float(dcf_result['pv_high_growth']), currency_symbol)}, "
+            f"fade + perpetuity {format_currency(float(dcf_result['pv_fade_and_perpetuity']), currency_symbol)}"
+        )
+    
+    model_inputs = engine_inputs(valuation_inputs)
+    driver_base = {name: model_inputs[name] for name in
+                   ("wacc", "terminal_growth", "revenue_growth", "ebitda_margin") + RATIO_DRIVERS}
+    
+    # Identical runs from any session or earlier restart are served from the persistent store
+    job_queue = get_job_queue()
+    array_store = get_array_store()
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    run_store = get_run_store()
+    run_key = canonical_hash({**valuation_inputs, "num_simulations": num_simulations if run_monte_carlo else 0})
+    # Only the small entries are read here; the stored paths are loaded only when the shared cache misses
+    stored_run = run_store.get(run_key, fields=("sensitivity_grid",))
+    
     # Monte Carlo simulation (if enabled)
     if run_monte_carlo:
         st.markdown("##### 🎲 Monte Carlo Simulation Results")
         
-        # Generate random variations for key inputs
-        np.random.seed(42)  # For reproducibility
-        
-        # Create distributions for key variables
-        wacc_dist = np.random.normal(wacc, wacc * 0.15, num_simulations)  # 15% std dev
-        terminal_growth_dist = np.random.normal(terminal_growth_rate, terminal_growth_rate * 0.3, num_simulations)
-        
-        # Revenue growth distributions
-        rev_growth_dist = []
-        for growth in revenue_growth_rates:
-            rev_growth_dist.append(np.random.normal(growth, abs(growth) * 0.25, num_simulations))
-        
-        # EBITDA margin distributions
-        ebitda_margin_dist = []
-        for margin in ebitda_margins:
-            ebitda_margin_dist.append(np.random.normal(margin, margin * 0.15, num_simulations))
-        
-        # Run simulations
-        simulation_results = []
-        
-        for i in range(num_simulations):
-            # Get random values for this simulation
-            sim_wacc = max(0.05, min(0.25, wacc_dist[i]))  # Constrain WACC between 5-25%
-            sim_terminal_growth = max(0.0, min(0.05, terminal_growth_dist[i]))  # Constrain terminal growth 0-5%
-            
-            # Calculate FCF projections for this simulation
-            sim_fcf = []
-            sim_revenue = current_revenue
-            
-            for j in range(5):
-                sim_rev_growth = max(-0.5, min(1.0, rev_growth_dist[j][i]))  # Constrain growth -50% to 100%
-                sim_ebitda_margin = max(0.0, min(0.6, ebitda_margin_dist[j][i]))  # Constrain margin 0-60%
-                
-                sim_revenue = sim_revenue * (1 + sim_rev_growth)
-                sim_ebitda = sim_revenue * sim_ebitda_margin
-                sim_depreciation = sim_revenue * depreciation_revenue_ratio
-                sim_ebit = sim_ebitda - sim_depreciation
-                sim_taxes = sim_ebit * tax_rate if sim_ebit > 0 else 0
-                sim_nopat = sim_ebit - sim_taxes
-                
-                sim_capex = sim_revenue * capex_revenue_ratio
-                sim_wc_change = sim_revenue * sim_rev_growth * working_capital_change_ratio if j > 0 else 0
-                
-                sim_fcf_year = sim_nopat + sim_depreciation - sim_capex - sim_wc_change
-                sim_fcf.append(sim_fcf_year)
-            
-            # Calculate enterprise value for this simulation
-            sim_discount_factors = [(1 + sim_wacc) ** k for k in range(1, 6)]
-            sim_pv_fcf = [fcf / df for fcf, df in zip(sim_fcf, sim_discount_factors)]
-            
-            if sim_wacc > sim_terminal_growth:  # Ensure valid terminal value calculation
-                sim_terminal_fcf = sim_fcf[-1] * (1 + sim_terminal_growth)
-                sim_terminal_value = sim_terminal_fcf / (sim_wacc - sim_terminal_growth)
-                sim_pv_terminal_value = sim_terminal_value / sim_discount_factors[-1]
-                
-                sim_enterprise_value = sum(sim_pv_fcf) + sim_pv_terminal_value
-                sim_equity_value = sim_enterprise_value - net_debt
-                sim_value_per_share = sim_equity_value / shares_outstanding
-                
-                simulation_results.append(sim_value_per_share)
+        def compute_simulation():
+            stored = run_store.get(run_key, fields=("simulation_values",)) if stored_run is not None else None
+            if stored is not None and stored["simulation_values"] is not None:
+                values = stored["simulation_values"]
+            else:
+                # Sample WACC, terminal growth, yearly growth and margins and value the paths in a background job
+                values = background_result(job_queue, "Monte Carlo simulation", ("simulation", run_key),
+                                           simulate_value_per_share, model_inputs, driver_base, num_simulations,
+                                           seed=MONTE_CARLO_SEED)
+                if values is None:
+                    return None
+            # Filter out extreme outliers (beyond 3 standard deviations)
+            return {"values": values, "trimmed": SimulationSummary(values).trimmed(3).values}
         
-        # Filter out extreme outliers (beyond 3 standard deviations)
-        if simulation_results:
-            sim_mean = np.mean(simulation_results)
-            sim_std = np.std(simulation_results)
-            simulation_results = [x for x in simulation_results if abs(x - sim_mean) <= 3 * sim_std]
+        # Sessions viewing the same scenario share one read-only copy of the paths
+        simulation = shared_result("simulation", run_key, compute_simulation)
+        if simulation is None:
+            simulation = {"values": np.array([]), "trimmed": np.array([])}
+        simulation_results = simulation["values"]
+        sim_summary = SimulationSummary(simulation["trimmed"])
         
         # Calculate statistics
-        if simulation_results:
-            percentiles = np.percentile(simulation_results, [10, 25, 50, 75, 90])
+        if sim_summary:
+            percentiles = sim_summary.percentiles
             
             # Display results
             col1, col2, col3 = st.columns(3)
@@ -1021,9 +1333,11 @@ with tab3:
             # Valuation distribution chart
             fig_dist = go.Figure()
             
-            fig_dist.add_trace(go.Histogram(
-                x=simulation_results,
-                nbinsx=50,
+            hist_counts, hist_edges = sim_summary.histogram
+            fig_dist.add_trace(go.Bar(
+                x=(hist_edges[:-1] + hist_edges[1:]) / 2,
+                y=hist_counts,
+                width=np.diff(hist_edges),
                 name='Valuation Distribution',
                 marker_color='rgba(102, 126, 234, 0.7)',
                 opacity=0.7
@@ -1053,10 +1367,10 @@ with tab3:
             stats_df = pd.DataFrame({
                 'Metric': ['Mean', 'Standard Deviation', 'Coefficient of Variation', 'Probability of Positive Value'],
                 'Value': [
-                    format_currency(np.mean(simulation_results), currency_symbol),
-                    format_currency(np.std(simulation_results), currency_symbol),
-                    f"{np.std(simulation_results)/np.mean(simulation_results)*100:.1f}%",
-                    f"{len([x for x in simulation_results if x > 0])/len(simulation_results)*100:.1f}%"
+                    format_currency(sim_summary.mean, currency_symbol),
+                    format_currency(sim_summary.std, currency_symbol),
+                    f"{sim_summary.cv*100:.1f}%",
+                    f"{sim_summary.prob_positive*100:.1f}%"
                 ]
             })
             st.dataframe(stats_df, use_container_width=True, hide_index=True)
@@ -1068,7 +1382,7 @@ with tab3:
             <h3 style='margin-top: 0;'>🏛️ DCF Valuation Summary</h3>
             <div style='display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 1rem; margin-top: 2rem;'>
                 <div>
-                    <h4>Present Value of FCF (Years 1-5)(In millions)</h4>
+                    <h4>Present Value of FCF (Years 1-{projection_years})(In millions)</h4>
                     <h2>{format_currency(sum(pv_fcf), currency_symbol)}</h2>
                 </div>
                 <div>
@@ -1097,33 +1411,113 @@ with tab3:
 
     # Sensitivity analysis
     st.markdown("##### 🌡️ Sensitivity Analysis")
+    sweep_cube = st.checkbox(
+        "Multi-Dimensional Sweep",
+        value=False,
+        help="Value every combination of several inputs at once, then slice any two of them into the heatmap"
+    )
     
     # WACC sensitivity range
     wacc_range = np.linspace(wacc * 0.7, wacc * 1.3, 11)
     terminal_range = np.linspace(terminal_growth_rate * 0.5, min(terminal_growth_rate * 2, 0.05), 11)
     
-    # Create sensitivity matrix
-    sensitivity_matrix = []
-    for w in wacc_range:
-        row = []
-        for tg in terminal_range:
-            if w > tg:  # Ensure valid calculation
-                sens_terminal_fcf = fcf_projections[-1] * (1 + tg)
-                sens_terminal_value = sens_terminal_fcf / (w - tg)
-                sens_pv_terminal_value = sens_terminal_value / ((1 + w) ** 5)
-                sens_enterprise_value = sum([fcf / ((1 + w) ** i) for i, fcf in enumerate(fcf_projections, 1)]) + sens_pv_terminal_value
-                sens_equity_value = sens_enterprise_value - net_debt
-                sens_value_per_share = sens_equity_value / shares_outstanding
-                row.append(sens_value_per_share)
+    # Create sensitivity matrix (rows: WACC, columns: terminal growth; NaN where WACC <= growth)
+    if stored_run is not None:
+        default_sensitivity_matrix = stored_run["sensitivity_grid"]
+    else:
+        sensitivity_grid = discount_cash_flows(fcf_projections, wacc_range[:, None], terminal_range[None, :], **discount_options)
+        default_sensitivity_matrix = (sensitivity_grid["enterprise_value"] - net_debt) / shares_outstanding
+    
+    cube_axes = []
+    if sweep_cube:
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            cube_axes = st.multiselect(
+                "Sweep Axes",
+                options=list(CUBE_AXIS_LABELS),
+                default=["wacc", "terminal_growth", "revenue_growth_1", "ebitda_margin", "capex_ratio"],
+                format_func=CUBE_AXIS_LABELS.get
+            )
+        with col2:
+            # Fewer points per axis as axes are added, so the cube stays within MAX_CUBE_CELLS
+            max_points = min(20, max_points_per_axis(max(len(cube_axes), 2)))
+            cube_points = st.slider("Points per Axis", 3, max_points, min(10, max_points),
+                                    help=f"Capped so the sweep stays within {MAX_CUBE_CELLS:,} valuations")
+        if len(cube_axes) < 2:
+            st.warning("Select at least two sweep axes; showing the WACC vs terminal growth grid")
+    
+    session_id = st.session_state.session_id
+    if len(cube_axes) >= 2:
+        cube_grid = {name: axis_grid(valuation_inputs, name, cube_points) for name in cube_axes}
+        cube_key = canonical_hash({"inputs": valuation_inputs, "axes": cube_grid})
+        if st.session_state.get("cube_key") != cube_key:
+            # Cubes over the spill threshold are written straight to a memory-mapped file the store owns
+            # from the start; the file is named by the cube key, so sessions sharing the job share the file
+            if cube_points ** len(cube_axes) * 8 >= array_store.spill_threshold:
+                st.session_state.cube_path = array_store.reserve(
+                    session_id, "cube", array_store.spill_path(f"cube_{cube_key}"))
             else:
-                row.append(np.nan)
-        sensitivity_matrix.append(row)
+                array_store.discard(session_id, "cube")
+                st.session_state.cube_path = None
+            st.session_state.cube_key = cube_key
+        # The session's cube is held by the array store, under its memory budgets
+        cube_values = array_store.get(session_id, "cube")
+        if cube_values is None and st.session_state.cube_path and os.path.exists(st.session_state.cube_path):
+            cube_values = array_store.adopt(session_id, "cube", st.session_state.cube_path)  # Finished for another session
+        if cube_values is None:
+            cube = background_result(job_queue, "Valuation cube", ("cube", cube_key), valuation_cube,
+                                     valuation_inputs, cube_grid, path=st.session_state.cube_path, slot="cube")
+            if cube is not None:
+                if isinstance(cube["values"], np.memmap):
+                    cube_values = array_store.adopt(session_id, "cube", cube["values"].filename)
+                else:
+                    cube_values = array_store.put(session_id, "cube", cube["values"])
+        cube = None if cube_values is None else {"axes": {name: np.asarray(values, dtype=float)
+                                                          for name, values in cube_grid.items()},
+                                                 "values": cube_values}
+    else:
+        array_store.discard(session_id, "cube")
+        st.session_state.pop("cube_key", None)
+    
+    if len(cube_axes) >= 2 and cube is not None:
+        st.caption(f"{cube['values'].size:,} valuations across {len(cube_axes)} axes")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            row_axis = st.selectbox("Heatmap Rows", cube_axes, index=0, format_func=CUBE_AXIS_LABELS.get)
+        with col2:
+            column_axis = st.selectbox("Heatmap Columns", [name for name in cube_axes if name != row_axis],
+                                       index=0, format_func=CUBE_AXIS_LABELS.get)
+        
+        # Hold every other axis at a chosen point
+        held_axes = [name for name in cube_axes if name not in (row_axis, column_axis)]
+        held_columns = st.columns(max(len(held_axes), 1))
+        held_points = {}
+        for held_col, name in zip(held_columns, held_axes):
+            axis_values = cube["axes"][name]
+            held_points[name] = held_col.select_slider(
+                f"{CUBE_AXIS_LABELS[name]}",
+                options=list(range(len(axis_values))),
+                value=len(axis_values) // 2,
+                format_func=lambda i, axis_values=axis_values: f"{axis_values[i]*100:.1f}%"
+            )
+        
+        cube_df = cube_slice(cube, row_axis, column_axis, held_points)
+        sensitivity_matrix = cube_df.values
+        column_labels = [f"{v*100:.1f}%" for v in cube_df.columns]
+        row_labels = [f"{v*100:.1f}%" for v in cube_df.index]
+        row_title, column_title = CUBE_AXIS_LABELS[row_axis], CUBE_AXIS_LABELS[column_axis]
+    else:
+        sensitivity_matrix = default_sensitivity_matrix
+        column_labels = [f"{tg*100:.1f}%" for tg in terminal_range]
+        row_labels = [f"{w*100:.1f}%" for w in wacc_range]
+        row_title, column_title = "WACC", "Terminal Growth Rate"
     
     # Create sensitivity heatmap
     fig_sens = go.Figure(data=go.Heatmap(
         z=sensitivity_matrix,
-        x=[f"{tg*100:.1f}%" for tg in terminal_range],
-        y=[f"{w*100:.1f}%" for w in wacc_range],
+        x=column_labels,
+        y=row_labels,
         colorscale='RdYlGn',
         text=[[format_currency(val, currency_symbol) if not np.isnan(val) else 'N/A' for val in row] for row in sensitivity_matrix],
         texttemplate="%{text}",
@@ -1133,28 +1527,135 @@ with tab3:
     ))
     
     fig_sens.update_layout(
-        title="Sensitivity Analysis: WACC vs Terminal Growth Rate",
-        xaxis_title="Terminal Growth Rate",
-        yaxis_title="WACC",
+        title=f"Sensitivity Analysis: {row_title} vs {column_title}",
+        xaxis_title=column_title,
+        yaxis_title=row_title,
         height=500
     )
     
     st.plotly_chart(fig_sens, use_container_width=True)
+    
+    if stored_run is None and not (run_monte_carlo and len(simulation_results) == 0):
+        run_store.put(run_key, {
+            "inputs": valuation_inputs,
+            "projections": projections,
+            "enterprise_value": enterprise_value,
+            "equity_value": equity_value,
+            "value_per_share": value_per_share,
+            "simulation_values": np.asarray(simulation_results) if run_monte_carlo else None,
+            "simulation_summary": {
+                "count": sim_summary.count,
+                "mean": sim_summary.mean,
+                "std": sim_summary.std,
+                "percentiles": sim_summary.percentile_table,
+            } if run_monte_carlo and sim_summary else None,
+            "sensitivity_grid": default_sensitivity_matrix,
+            "wacc_range": wacc_range,
+            "terminal_range": terminal_range,
+        })
+    
+    # Global variance-based sensitivity
+    st.markdown("##### 🧭 Global Sensitivity (Sobol Indices)")
+    if st.checkbox("Attribute valuation variance to each driver", value=False,
+                   help="First-order and total Sobol indices of value per share over the Monte Carlo drivers"):
+        col1, col2 = st.columns(2)
+        with col1:
+            sobol_samples = st.select_slider("Base Samples", options=[1024, 2048, 4096, 8192, 16384], value=4096)
+        with col2:
+            sobol_include_ratios = st.checkbox("Include CapEx, Depreciation & WC Ratios", value=False)
+        
+        sobol_df = sobol_indices(driver_base, model_inputs, num_samples=sobol_samples,
+                                 include_ratios=sobol_include_ratios)
+        
+        fig_sobol = go.Figure()
+        fig_sobol.add_trace(go.Bar(
+            x=sobol_df['driver'],
+            y=sobol_df['first_order'],
+            name='First-Order (S1)',
+            marker_color='#667eea'
+        ))
+        fig_sobol.add_trace(go.Bar(
+            x=sobol_df['driver'],
+            y=sobol_df['total'],
+            name='Total Effect (ST)',
+            marker_color='#764ba2'
+        ))
+        fig_sobol.update_layout(
+            title="Share of Value-Per-Share Variance by Driver",
+            xaxis_title="Driver",
+            yaxis_title="Sobol Index",
+            template="plotly_white",
+            barmode='group',
+            height=450,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_sobol, use_container_width=True)
+    
+    # One-call tornado over all scalar inputs
+    st.markdown("##### 🌪️ Tornado Analysis")
+    if st.checkbox("Show impact of each input on value per share", value=False):
+        tornado_delta = st.slider("Input Shock (± % of base value)", min_value=1, max_value=50, value=10, step=1) / 100
+        tornado_df = tornado_analysis(valuation_inputs, delta=tornado_delta).head(15).iloc[::-1]
+        tornado_base = tornado_df.attrs["base_value"]
+        
+        fig_tornado = go.Figure()
+        fig_tornado.add_trace(go.Bar(
+            y=tornado_df['input'],
+            x=tornado_df['low_value'] - tornado_base,
+            base=tornado_base,
+            orientation='h',
+            name=f'-{tornado_delta*100:.0f}% Input',
+            marker_color='#dc2626',
+            hovertemplate='%{y}: %{customdata}<extra></extra>',
+            customdata=[format_currency(v, currency_symbol) for v in tornado_df['low_value']]
+        ))
+        fig_tornado.add_trace(go.Bar(
+            y=tornado_df['input'],
+            x=tornado_df['high_value'] - tornado_base,
+            base=tornado_base,
+            orientation='h',
+            name=f'+{tornado_delta*100:.0f}% Input',
+            marker_color='#16a34a',
+            hovertemplate='%{y}: %{customdata}<extra></extra>',
+            customdata=[format_currency(v, currency_symbol) for v in tornado_df['high_value']]
+        ))
+        fig_tornado.add_vline(x=tornado_base, line_dash="dash", line_color="#374151",
+                              annotation_text=f"Base: {format_currency(tornado_base, currency_symbol)}")
+        fig_tornado.update_layout(
+            title="Tornado: Value Per Share Swing by Input",
+            xaxis_title=f"Value Per Share ({currency_symbol})",
+            template="plotly_white",
+            barmode='overlay',
+            height=550,
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+        )
+        st.plotly_chart(fig_tornado, use_container_width=True)
+    
+    # Exact local sensitivities from the closed-form derivatives
+    with st.expander("📐 Analytic Sensitivities (Greeks)", expanded=False):
+        greeks_df = greeks_table(valuation_inputs)
+        st.dataframe(pd.DataFrame({
+            'Input': greeks_df['input'],
+            'Base Value': [f"{v:,.4f}" for v in greeks_df['base']],
+            f'∂ Value/Share ({currency_symbol})': [f"{d:,.2f}" for d in greeks_df['derivative']],
+            'Elasticity': [f"{e:+.2f}" for e in greeks_df['elasticity']]
+        }), use_container_width=True, hide_index=True)
+        st.caption("Elasticity: % change in value per share for a 1% change in the input, holding all else constant.")
 
 with tab4:
     st.markdown("### 📋 Executive Investment Report")
     
     # Calculate comprehensive financial ratios
     ratios = calculate_financial_ratios(
-        revenue=[current_revenue] + revenue_projections,
-        ebitda=[current_revenue * ebitda_margins[0]] + ebitda_projections,
-        fcf=[0] + fcf_projections,  # Assuming current FCF is unknown
-        capex=[current_revenue * capex_revenue_ratio] * 6,
+        revenue=[current_revenue] + annual_revenue,
+        ebitda=[current_revenue * ebitda_margins[0]] + annual_ebitda,
+        fcf=[0] + annual_fcf,  # Assuming current FCF is unknown
+        capex=[current_revenue * capex_revenue_ratio] * (projection_years + 1),
         shares_outstanding=shares_outstanding
     )
     
     # Determine risk level
-    fcf_volatility = np.std(fcf_projections) / np.mean(fcf_projections) if np.mean(fcf_projections) > 0 else 0.5
+    fcf_volatility = np.std(annual_fcf) / np.mean(annual_fcf) if np.mean(annual_fcf) > 0 else 0.5
     risk_assessment, risk_color = determine_risk_level(beta, industry, debt_ratio, fcf_volatility)
     
     # Investment recommendation logic
@@ -1167,8 +1668,8 @@ with tab4:
     )
     
     # Determine recommendation
-    if run_monte_carlo and simulation_results:
-        base_case_value = percentiles[2]  # Median from Monte Carlo
+    if run_monte_carlo and sim_summary:
+        base_case_value = sim_summary.median  # Median from Monte Carlo
         upside_potential = (base_case_value - current_market_price) / current_market_price
     else:
         base_case_value = value_per_share
@@ -1224,6 +1725,57 @@ with tab4:
     </div>
     """, unsafe_allow_html=True)
     
+    # Reverse DCF: assumptions implied by the market price
+    st.markdown("##### 🔁 Reverse DCF: What the Market Price Implies")
+    implied_tg = float(implied_terminal_growth(valuation_inputs, current_market_price))
+    implied_discount_rate = float(implied_wacc(valuation_inputs, current_market_price))
+    implied_growth = float(implied_revenue_growth(valuation_inputs, current_market_price))
+    implied_growth = (1 + implied_growth) ** periods_per_year - 1  # Uniform per-period growth, annualized
+    
+    col1, col2, col3 = st.columns(3)
+    for col, label, implied, model_value in [
+        (col1, "Implied Terminal Growth", implied_tg, terminal_growth_rate),
+        (col2, "Implied WACC", implied_discount_rate, wacc),
+        (col3, "Implied Uniform Revenue Growth", implied_growth, np.mean(annual_growth_rates)),
+    ]:
+        with col:
+            st.markdown(f"""
+            <div class="metric-card">
+                <h4 style='margin: 0 0 0.5rem 0; color: #374151;'>{label}</h4>
+                <h2 style='margin: 0; color: #1f2937;'>{f"{implied*100:.2f}%" if np.isfinite(implied) else "N/A"}</h2>
+                <p style='margin: 0.5rem 0 0 0; color: #6b7280; font-size: 0.875rem;'>Model: {model_value*100:.2f}%</p>
+            </div>
+            """, unsafe_allow_html=True)
+    
+    # Implied assumptions across a band of prices, solved in one batch
+    price_band = np.linspace(current_market_price * 0.5, current_market_price * 1.5, 41)
+    fig_implied = go.Figure()
+    fig_implied.add_trace(go.Scatter(
+        x=price_band,
+        y=implied_wacc(valuation_inputs, price_band) * 100,
+        mode='lines',
+        name='Implied WACC',
+        line=dict(color='#667eea', width=3)
+    ))
+    fig_implied.add_trace(go.Scatter(
+        x=price_band,
+        y=implied_terminal_growth(valuation_inputs, price_band) * 100,
+        mode='lines',
+        name='Implied Terminal Growth',
+        line=dict(color='#764ba2', width=3)
+    ))
+    fig_implied.add_vline(x=current_market_price, line_dash="dash", line_color="#374151",
+                          annotation_text="Current Price")
+    fig_implied.update_layout(
+        title="Market-Implied Assumptions by Share Price",
+        xaxis_title=f"Share Price ({currency_symbol})",
+        yaxis_title="Rate (%)",
+        template="plotly_white",
+        height=400,
+        legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1)
+    )
+    st.plotly_chart(fig_implied, use_container_width=True)
+    
     # Risk assessment
     st.markdown(f"""
     <div class="risk-analysis">
@@ -1251,10 +1803,10 @@ with tab4:
     
    # Generate and display investment thesis
     valuation_results = {
-        'bear': format_currency(percentiles[0], currency_symbol) if run_monte_carlo and simulation_results else format_currency(value_per_share * 0.8, currency_symbol),
-        'base': format_currency(percentiles[2], currency_symbol) if run_monte_carlo and simulation_results else format_currency(value_per_share, currency_symbol),
-        'bull': format_currency(percentiles[4], currency_symbol) if run_monte_carlo and simulation_results else format_currency(value_per_share * 1.2, currency_symbol),
-        'weighted_avg': format_currency(np.mean(simulation_results), currency_symbol) if run_monte_carlo and simulation_results else format_currency(value_per_share, currency_symbol)
+        'bear': format_currency(sim_summary.percentile_table[10], currency_symbol) if run_monte_carlo and sim_summary else format_currency(value_per_share * 0.8, currency_symbol),
+        'base': format_currency(sim_summary.percentile_table[50], currency_symbol) if run_monte_carlo and sim_summary else format_currency(value_per_share, currency_symbol),
+        'bull': format_currency(sim_summary.percentile_table[90], currency_symbol) if run_monte_carlo and sim_summary else format_currency(value_per_share * 1.2, currency_symbol),
+        'weighted_avg': format_currency(sim_summary.mean, currency_symbol) if run_monte_carlo and sim_summary else format_currency(value_per_share, currency_symbol)
     }
     
     # Generate comprehensive investment thesis
@@ -1269,48 +1821,149 @@ with tab4:
     # Key metrics comparison table
     st.markdown("##### 📊 Peer Comparison & Industry Benchmarks")
     
-    industry_data = INDUSTRY_BENCHMARKS[industry]
-    comparison_df = pd.DataFrame({
-        'Metric': [
-            'EBITDA Margin (%)',
-            'CapEx/Revenue (%)', 
-            'Beta',
-            'Debt/Equity Ratio',
-            'ROE (%)',
-            'ROIC (%)',
-            'Revenue Multiple (x)'
-        ],
-        f'{company_name} (Projected)': [
-            f"{ratios.get('avg_ebitda_margin', 0)*100:.1f}%",
-            f"{capex_revenue_ratio*100:.1f}%",
-            f"{beta:.2f}",
-            f"{debt_ratio/equity_ratio:.2f}",
-            "N/A",  # Would need additional inputs
-            "N/A",  # Would need additional inputs
-            f"{base_case_value/(revenue_projections[-1]/shares_outstanding):.1f}x"
-        ],
-        f'{industry} Industry Average': [
-            f"{industry_data['ebitda_margin']:.1f}%",
-            f"{industry_data['capex_rev']:.1f}%",
-            f"{industry_data['beta']:.2f}",
-            f"{industry_data['debt_equity']:.2f}",
-            f"{industry_data['roe']:.1f}%",
-            f"{industry_data['roic']:.1f}%",
-            f"{industry_data['revenue_multiple']:.1f}x"
-        ],
-        'Relative Position': [
-            "🟢 Above" if ratios.get('avg_ebitda_margin', 0)*100 > industry_data['ebitda_margin'] else "🔴 Below",
-            "🟡 Higher" if capex_revenue_ratio*100 > industry_data['capex_rev'] else "🟢 Lower",
-            "🔴 Higher Risk" if beta > industry_data['beta'] else "🟢 Lower Risk",
-            "🔴 Higher" if debt_ratio/equity_ratio > industry_data['debt_equity'] else "🟢 Lower",
-            "🟡 N/A",
-            "🟡 N/A", 
-            "🟢 Premium" if base_case_value/(revenue_projections[-1]/shares_outstanding) > industry_data['revenue_multiple'] else "🔴 Discount"
-        ]
-    })
+    industry_data = industry_benchmark(industry)
+    peer_distribution = get_peer_benchmarks().distribution(industry)
+    if peer_distribution is not None:
+        # Rank the company within the sector's peer distribution instead of against one number
+        company_metrics = {
+            "ebitda_margin": ratios.get('avg_ebitda_margin', 0)*100,
+            "capex_rev": capex_revenue_ratio*100,
+            "beta": beta,
+            "debt_equity": debt_ratio/equity_ratio,
+            "roe": np.nan,  # Would need additional inputs
+            "roic": np.nan,
+            "revenue_multiple": base_case_value/(annual_revenue[-1]/shares_outstanding),
+        }
+        comparison_rows = []
+        for metric, (label, value_format, above, below) in COMPARISON_METRICS.items():
+            peers = peer_distribution.loc[metric]
+            rank = get_peer_benchmarks().percentile_rank(industry, metric, company_metrics[metric])
+            comparison_rows.append({
+                'Metric': label,
+                f'{company_name} (Projected)': value_format.format(company_metrics[metric]) if np.isfinite(company_metrics[metric]) else "N/A",
+                f'{industry} Peer Median': value_format.format(peers["median"]) if peers["count"] else "N/A",
+                'Peer Interquartile Range': f"{value_format.format(peers['q1'])} – {value_format.format(peers['q3'])}" if peers["count"] else "N/A",
+                'Percentile Rank': format_ordinal(rank) if np.isfinite(rank) else "N/A",
+                'Relative Position': (above if rank > 50 else below) if np.isfinite(rank) else "🟡 N/A",
+            })
+        comparison_df = pd.DataFrame(comparison_rows)
+        st.caption(f"Benchmarked against {peer_distribution.attrs['peers']} {industry} peers from the local peer dataset")
+    else:
+        comparison_df = pd.DataFrame({
+            'Metric': [
+                'EBITDA Margin (%)',
+                'CapEx/Revenue (%)', 
+                'Beta',
+                'Debt/Equity Ratio',
+                'ROE (%)',
+                'ROIC (%)',
+                'Revenue Multiple (x)'
+            ],
+            f'{company_name} (Projected)': [
+                f"{ratios.get('avg_ebitda_margin', 0)*100:.1f}%",
+                f"{capex_revenue_ratio*100:.1f}%",
+                f"{beta:.2f}",
+                f"{debt_ratio/equity_ratio:.2f}",
+                "N/A",  # Would need additional inputs
+                "N/A",  # Would need additional inputs
+                f"{base_case_value/(annual_revenue[-1]/shares_outstanding):.1f}x"
+            ],
+            f'{industry} Industry Average': [
+                f"{industry_data['ebitda_margin']:.1f}%",
+                f"{industry_data['capex_rev']:.1f}%",
+                f"{industry_data['beta']:.2f}",
+                f"{industry_data['debt_equity']:.2f}",
+                f"{industry_data['roe']:.1f}%",
+                f"{industry_data['roic']:.1f}%",
+                f"{industry_data['revenue_multiple']:.1f}x"
+            ],
+            'Relative Position': [
+                "🟢 Above" if ratios.get('avg_ebitda_margin', 0)*100 > industry_data['ebitda_margin'] else "🔴 Below",
+                "🟡 Higher" if capex_revenue_ratio*100 > industry_data['capex_rev'] else "🟢 Lower",
+                "🔴 Higher Risk" if beta > industry_data['beta'] else "🟢 Lower Risk",
+                "🔴 Higher" if debt_ratio/equity_ratio > industry_data['debt_equity'] else "🟢 Lower",
+                "🟡 N/A",
+                "🟡 N/A", 
+                "🟢 Premium" if base_case_value/(annual_revenue[-1]/shares_outstanding) > industry_data['revenue_multiple'] else "🔴 Discount"
+            ]
+        })
     
     st.dataframe(comparison_df, use_container_width=True, hide_index=True)
     
+    # Trading comparables: every peer multiple applied to the LTM and next-year figures in one batch
+    st.markdown("##### 🏈 Trading Comparables & Football Field")
+    
+    peer_path = get_peer_benchmarks().path
+    multiples = None
+    if os.path.exists(peer_path):
+        peer_stat = os.stat(peer_path)
+        multiples = sector_peer_multiples(peer_path, (peer_stat.st_mtime_ns, peer_stat.st_size), industry)
+    
+    if multiples and any(values.size >= get_peer_benchmarks().min_peers for values in multiples.values()):
+        target_names = ["LTM", "Next Year"]
+        implied = implied_values({
+            "revenue": np.array([current_revenue, annual_revenue[0]]),
+            "ebitda": np.array([current_revenue * ebitda_margins[0], annual_ebitda[0]]),
+            "fcf": np.array([np.nan, annual_fcf[0]]),  # Current FCF is not an input
+            "net_debt": net_debt,
+            "shares": shares_outstanding,
+        }, multiples)
+        field_df = football_field(implied, target_names).dropna()
+        field_df["label"] = field_df["method"] + " (" + field_df["target"] + ")"
+        
+        # DCF range: Monte Carlo percentiles when available, else the WACC x terminal growth grid
+        if run_monte_carlo and sim_summary:
+            dcf_range = sim_summary.percentile([level * 100 for level in FIELD_QUANTILES])
+            dcf_label = "DCF (Monte Carlo)"
+        else:
+            # Grid cells where WACC <= terminal growth are NaN and left out
+            grid_values = np.asarray(default_sensitivity_matrix, dtype=float)
+            dcf_range = np.nanquantile(grid_values, FIELD_QUANTILES) if np.isfinite(grid_values).any() else None
+            dcf_label = "DCF (WACC × Growth Grid)"
+        if dcf_range is None:
+            st.warning("No DCF range: WACC is at or below terminal growth across the whole sensitivity grid")
+        else:
+            field_df = pd.concat([
+                field_df,
+                pd.DataFrame([dict(zip(["p10", "p25", "p50", "p75", "p90"], dcf_range), label=dcf_label)]),
+            ], ignore_index=True)
+        
+        fig_field = go.Figure()
+        fig_field.add_trace(go.Bar(
+            y=field_df["label"], x=field_df["p90"] - field_df["p10"], base=field_df["p10"],
+            orientation='h', name='10th–90th Percentile', marker_color='rgba(102, 126, 234, 0.35)'
+        ))
+        fig_field.add_trace(go.Bar(
+            y=field_df["label"], x=field_df["p75"] - field_df["p25"], base=field_df["p25"],
+            orientation='h', name='Interquartile Range', marker_color='rgba(102, 126, 234, 0.9)'
+        ))
+        fig_field.add_trace(go.Scatter(
+            y=field_df["label"], x=field_df["p50"], mode='markers', name='Median',
+            marker=dict(color='black', symbol='line-ns-open', size=18, line=dict(width=2))
+        ))
+        fig_field.add_vline(x=current_market_price, line_dash="dash", line_color="red",
+                            annotation_text=f"Market: {format_currency(current_market_price, currency_symbol)}")
+        fig_field.update_layout(
+            title=f"Valuation Football Field vs {industry} Peers",
+            xaxis_title=f"Value Per Share ({currency_symbol})",
+            barmode='overlay',
+            template="plotly_white",
+            height=120 + 45 * len(field_df),
+        )
+        st.plotly_chart(fig_field, use_container_width=True)
+        
+        with st.expander("📋 Implied Value Ranges"):
+            st.dataframe(
+                field_df.set_index("label")[["p10", "p25", "p50", "p75", "p90"]].rename(columns=lambda name: f"P{name[1:]}")
+                .style.format(lambda value: format_currency(value, currency_symbol)),
+                use_container_width=True
+            )
+            st.caption("Peers with a positive multiple: " + ", ".join(
+                f"{MULTIPLE_LABELS[name]} {values.size}" for name, values in multiples.items()))
+    else:
+        st.info("Add EV, EBITDA, revenue, market cap and FCF (or ev_ebitda, ev_revenue and p_fcf) columns to the peer "
+                "dataset to value the company on trading multiples alongside the DCF.")
+    
     # Valuation bridge chart
     st.markdown("##### 🌉 Valuation Bridge Analysis")
     
@@ -1322,7 +1975,7 @@ with tab4:
         'Final Target Price'
     ]
     
-    monte_carlo_adj = (percentiles[2] - value_per_share) if run_monte_carlo and simulation_results else 0
+    monte_carlo_adj = (sim_summary.median - value_per_share) if run_monte_carlo and sim_summary else 0
     risk_premium = base_case_value * 0.05 if upside_potential > 0.15 else -base_case_value * 0.05
     
     bridge_values = [
@@ -1409,38 +2062,38 @@ with st.expander("🎯 Interactive 3D DCF Model Visualization", expanded=True):
     st.markdown("### 🌐 Interactive 3D Valuation Explorer")
     
     # Create 3D scatter plot for Monte Carlo results
-    if run_monte_carlo and simulation_results and len(simulation_results) > 100:
+    if run_monte_carlo and sim_summary and len(sim_summary) > 100:
         try:
             # Sample points for visualization with better distribution
-            sample_size = min(500, len(simulation_results))
-            sample_indices = np.random.choice(len(simulation_results), sample_size, replace=False)
-            sample_values = [simulation_results[i] for i in sample_indices]
+            sample_size = min(500, len(sim_summary))
+            rng = np.random.RandomState(MONTE_CARLO_SEED)
+            sample_indices = rng.choice(len(sim_summary), sample_size, replace=False)
+            sample_values = sim_summary.values[sample_indices]
             
             # Create more spread out variations for better visualization
             wacc_min, wacc_max = wacc * 0.7, wacc * 1.3
             terminal_min, terminal_max = max(terminal_growth_rate * 0.3, 0.005), min(terminal_growth_rate * 2.5, 0.05)
             
             # Use uniform distribution for better spread
-            wacc_scatter = np.random.uniform(wacc_min, wacc_max, sample_size)
-            terminal_scatter = np.random.uniform(terminal_min, terminal_max, sample_size)
+            wacc_scatter = rng.uniform(wacc_min, wacc_max, sample_size)
+            terminal_scatter = rng.uniform(terminal_min, terminal_max, sample_size)
             
             # Filter out invalid combinations (WACC <= Terminal Growth)
             valid_indices = wacc_scatter > terminal_scatter
             wacc_scatter = wacc_scatter[valid_indices]
             terminal_scatter = terminal_scatter[valid_indices]
-            sample_values = [sample_values[i] for i, valid in enumerate(valid_indices) if valid]
+            sample_values = sample_values[valid_indices]
             
             # Ensure we have valid data
             if len(sample_values) > 0 and len(wacc_scatter) > 0:
                 # Create size variation based on probability density
-                marker_sizes = []
-                for v in sample_values:
-                    if abs(v - np.median(simulation_results)) < np.std(simulation_results) * 0.5:
-                        marker_sizes.append(8)  # Larger for values near median
-                    elif abs(v - np.median(simulation_results)) < np.std(simulation_results):
-                        marker_sizes.append(6)  # Medium size
-                    else:
-                        marker_sizes.append(4)  # Smaller for outliers
+                distance_from_median = np.abs(sample_values - sim_summary.median)
+                marker_sizes = np.select(
+                    [distance_from_median < sim_summary.std * 0.5,  # Larger for values near median
+                     distance_from_median < sim_summary.std],  # Medium size
+                    [8, 6],
+                    default=4  # Smaller for outliers
+                )
                 
                 # Ensure all arrays have the same length
                 min_length = min(len(wacc_scatter), len(terminal_scatter), len(sample_values), len(marker_sizes))
@@ -1597,27 +2250,11 @@ try:
 
     # Create meshgrid for surface
     wacc_mesh, terminal_mesh = np.meshgrid(wacc_range, terminal_range)
-    surface_values = np.zeros_like(wacc_mesh)
-
-    # Calculate valuation surface
-    for i in range(wacc_mesh.shape[0]):
-        for j in range(wacc_mesh.shape[1]):
-            w = wacc_mesh[i, j]
-            tg = terminal_mesh[i, j]
-
-            if w > tg and w > 0.01:
-                try:
-                    terminal_fcf = fcf_projections[-1] * (1 + tg)
-                    terminal_val = terminal_fcf / (w - tg)
-                    pv_terminal = terminal_val / ((1 + w) ** 5)
-                    pv_fcf_sum = sum([fcf / ((1 + w) ** k) for k, fcf in enumerate(fcf_projections, 1)])
-                    enterprise_val = pv_fcf_sum + pv_terminal
-                    equity_val = enterprise_val - net_debt
-                    surface_values[i, j] = max(0, equity_val / shares_outstanding)
-                except:
-                    surface_values[i, j] = 0
-            else:
-                surface_values[i, j] = 0
+
+    # Calculate valuation surface over the whole mesh at once
+    surface_grid = discount_cash_flows(fcf_projections, wacc_mesh, terminal_mesh, **discount_options)
+    surface_values = np.maximum(0, (surface_grid["enterprise_value"] - net_debt) / shares_outstanding)
+    surface_values = np.where(wacc_mesh > 0.01, surface_values, 0)
 
     # Clean and smooth the data
     surface_values = np.nan_to_num(surface_values, nan=0.0, posinf=0.0, neginf=0.0)
@@ -1744,9 +2381,9 @@ if st.checkbox("🔍 Show Model Performance Metrics", value=False):
         st.markdown("#### 🎯 Key Model Statistics")
         
         # Calculate model statistics
-        if run_monte_carlo and simulation_results:
-            confidence_interval_95 = np.percentile(simulation_results, [2.5, 97.5])
-            model_confidence = len([x for x in simulation_results if confidence_interval_95[0] <= x <= confidence_interval_95[1]]) / len(simulation_results)
+        if run_monte_carlo and sim_summary:
+            confidence_interval_95 = sim_summary.ci_95
+            model_confidence = sim_summary.ci_95_coverage
             
             performance_metrics = pd.DataFrame({
                 'Metric': [
@@ -1759,13 +2396,13 @@ if st.checkbox("🔍 Show Model Performance Metrics", value=False):
                     'Probability of Positive NPV'
                 ],
                 'Value': [
-                    f"{len(simulation_results):,}",
-                    format_currency(np.mean(simulation_results), currency_symbol),
-                    format_currency(np.median(simulation_results), currency_symbol),
-                    format_currency(np.std(simulation_results), currency_symbol),
+                    f"{sim_summary.count:,}",
+                    format_currency(sim_summary.mean, currency_symbol),
+                    format_currency(sim_summary.median, currency_symbol),
+                    format_currency(sim_summary.std, currency_symbol),
                     f"{format_currency(confidence_interval_95[0], currency_symbol)} - {format_currency(confidence_interval_95[1], currency_symbol)}",
                     f"{model_confidence*100:.1f}%",
-                    f"{len([x for x in simulation_results if x > 0])/len(simulation_results)*100:.1f}%"
+                    f"{sim_summary.prob_positive*100:.1f}%"
                 ]
             })
             
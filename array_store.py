@@ -0,0 +1,164 @@
+import os
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+MB = 1024 * 1024
+
+
+class ArrayStore:
+    """Per-session result arrays under a per-session and a global memory budget
+
+    Arrays of spill_threshold bytes or more go straight to a memory-mapped .npy file;
+    smaller ones stay in RAM until a session or the whole store runs over its budget,
+    at which point the least recently used in-memory arrays are spilled. Spilled
+    arrays are read back as read-only memmaps, so the caller gets them zero-copy.
+    Sessions idle for longer than idle_ttl seconds are released on the next put.
+    Sessions may hold the same spill file (a result computed once for all of them); the
+    file is deleted when the last entry referring to it is dropped.
+    """
+
+    def __init__(self, session_budget=256 * MB, global_budget=1024 * MB, spill_threshold=16 * MB,
+                 spill_dir=None, idle_ttl=3600):
+        self.session_budget = session_budget
+        self.global_budget = global_budget
+        self.spill_threshold = spill_threshold
+        self.idle_ttl = idle_ttl
+        if spill_dir is None:
+            self._tempdir = tempfile.TemporaryDirectory(prefix="dcf_spill_")
+            spill_dir = self._tempdir.name
+        os.makedirs(spill_dir, exist_ok=True)
+        self.spill_dir = spill_dir
+        # (session_id, name) -> {"array", "path", "nbytes"}, least recently used first
+        self._entries = OrderedDict()
+        self._last_seen = {}
+        self._lock = threading.RLock()
+
+    def spill_path(self, name=None):
+        """.npy path in the spill directory, for writers that fill a memmap directly
+
+        Fresh unless name is given; sessions sharing a result use the same name.
+        """
+        return os.path.join(self.spill_dir, f"{name or uuid.uuid4().hex}.npy")
+
+    def put(self, session_id, name, array):
+        """Store array for the session and return the view to use from now on"""
+        array = np.asarray(array)
+        with self._lock:
+            self._release_idle()
+            self._drop((session_id, name))
+            self._last_seen[session_id] = time.time()
+            key = (session_id, name)
+            if array.nbytes >= self.spill_threshold:
+                self._entries[key] = self._spilled(array)
+            else:
+                self._entries[key] = {"array": array, "path": None, "nbytes": array.nbytes}
+                self._enforce_budgets(session_id)
+            return self._entries[key]["array"]
+
+    def reserve(self, session_id, name, path=None):
+        """Spill path registered as the session's array name, for a writer that fills it later
+
+        path defaults to a fresh spill_path(). get() returns None until adopt() maps the
+        finished file; dropping the last entry that refers to the path deletes the file
+        whether or not it was finished.
+        """
+        with self._lock:
+            self._release_idle()
+            key = (session_id, name)
+            self._drop(key)
+            path = path or self.spill_path()
+            self._entries[key] = {"array": None, "path": path, "nbytes": 0}
+            self._last_seen[session_id] = time.time()
+            return path
+
+    def adopt(self, session_id, name, path):
+        """Take ownership of a .npy file written at a spill_path() and return it as a read-only memmap
+
+        The file counts against the session's disk usage and is deleted with the last
+        entry referring to it.
+        """
+        with self._lock:
+            self._release_idle()
+            key = (session_id, name)
+            if self._entries.get(key, {}).get("path") != path:
+                self._drop(key)
+            array = np.load(path, mmap_mode="r")
+            self._entries[key] = {"array": array, "path": path, "nbytes": array.nbytes}
+            self._last_seen[session_id] = time.time()
+            return array
+
+    def discard(self, session_id, name):
+        """Drop one array of a session, deleting its spill file"""
+        with self._lock:
+            self._drop((session_id, name))
+
+    def get(self, session_id, name):
+        """Stored array (in RAM or a read-only memmap), or None"""
+        with self._lock:
+            entry = self._entries.get((session_id, name))
+            if entry is None:
+                return None
+            self._entries.move_to_end((session_id, name))
+            self._last_seen[session_id] = time.time()
+            return entry["array"]
+
+    def release(self, session_id):
+        """Drop every array of a session and delete its spill files"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == session_id]:
+                self._drop(key)
+            self._last_seen.pop(session_id, None)
+
+    def usage(self):
+        """Bytes held in RAM and on disk, overall and per session"""
+        with self._lock:
+            sessions = {}
+            for (session_id, _), entry in self._entries.items():
+                where = "disk" if entry["path"] else "memory"
+                sessions.setdefault(session_id, {"memory": 0, "disk": 0})[where] += entry["nbytes"]
+            return {
+                "memory": sum(session["memory"] for session in sessions.values()),
+                "disk": sum(session["disk"] for session in sessions.values()),
+                "sessions": sessions,
+            }
+
+    def _spilled(self, array):
+        path = self.spill_path()
+        np.save(path, array)
+        return {"array": np.load(path, mmap_mode="r"), "path": path, "nbytes": array.nbytes}
+
+    def _in_memory(self, session_id=None):
+        return [(key, entry) for key, entry in self._entries.items()
+                if entry["path"] is None and (session_id is None or key[0] == session_id)]
+
+    def _enforce_budgets(self, session_id):
+        """Spill least recently used in-memory arrays until both budgets hold"""
+        for scope, budget in ((session_id, self.session_budget), (None, self.global_budget)):
+            resident = self._in_memory(scope)
+            total = sum(entry["nbytes"] for _, entry in resident)
+            for key, entry in resident:
+                if total <= budget:
+                    break
+                self._entries[key] = self._spilled(entry["array"])
+                total -= entry["nbytes"]
+
+    def _drop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry["path"]:
+            entry["array"] = None
+            if any(other["path"] == entry["path"] for other in self._entries.values()):
+                return  # Another session still holds the file
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass  # Still mapped elsewhere on some platforms; the spill directory is removed at exit
+
+    def _release_idle(self):
+        cutoff = time.time() - self.idle_ttl
+        for session_id in [sid for sid, seen in self._last_seen.items() if seen < cutoff]:
+            self.release(session_id)
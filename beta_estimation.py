@@ -0,0 +1,171 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PRICE_DIR = os.environ.get(
+    "DCF_PRICE_DIR", os.path.join(os.path.expanduser("~"), ".dcf_valuation", "prices")
+)
+
+# Default market index per domicile country, as named in the price files
+BENCHMARK_INDICES = {"India": "^NSEI", "USA": "^GSPC", "UK": "^FTSE", "Germany": "^GDAXI", "France": "^FCHI"}
+
+# Return observations per year at each sampling frequency
+PERIODS_PER_YEAR = {"daily": 252, "weekly": 52, "monthly": 12}
+RESAMPLE_RULES = {"weekly": "W-FRI", "monthly": "ME"}
+
+ADJUSTMENTS = ("blume", "vasicek")
+
+PRICE_FILE_SUFFIXES = (".csv", ".parquet", ".pq")
+
+# Columns tried, in order, as the close price in a single-ticker file
+CLOSE_COLUMNS = ("adj_close", "adj close", "adjusted_close", "close", "price")
+
+
+def _read_table(path):
+    frame = pd.read_parquet(path) if path.endswith((".parquet", ".pq")) else pd.read_csv(path)
+    frame.columns = [str(column).strip() for column in frame.columns]
+    date_column = next((column for column in frame.columns if column.lower() == "date"), frame.columns[0])
+    return frame.set_index(pd.to_datetime(frame.pop(date_column))).sort_index()
+
+
+def price_signature(path=DEFAULT_PRICE_DIR):
+    """(file count, latest mtime) of the price files, for cache invalidation"""
+    if os.path.isdir(path):
+        files = [os.path.join(path, name) for name in os.listdir(path) if name.lower().endswith(PRICE_FILE_SUFFIXES)]
+    else:
+        files = [path] if os.path.exists(path) else []
+    return len(files), max((os.stat(file).st_mtime_ns for file in files), default=0)
+
+
+def load_prices(path=DEFAULT_PRICE_DIR):
+    """Close prices as one frame (dates x tickers)
+
+    path is a directory with one file per ticker (TICKER.csv or .parquet with a date
+    column and adj_close / close), or a single wide file with a date column and one
+    column per ticker. Benchmark indices are stored the same way, e.g. ^NSEI.csv.
+    """
+    if not os.path.isdir(path):
+        return _read_table(path).apply(pd.to_numeric, errors="coerce")
+
+    series = {}
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(PRICE_FILE_SUFFIXES):
+            continue
+        frame = _read_table(os.path.join(path, name))
+        columns = {column.lower(): column for column in frame.columns}
+        close = next((columns[column] for column in CLOSE_COLUMNS if column in columns), None)
+        if close is not None:
+            ticker = os.path.splitext(name)[0].upper()
+            series[ticker] = pd.to_numeric(frame[close], errors="coerce").groupby(level=0).last()
+    return pd.DataFrame(series).sort_index()
+
+
+def period_returns(prices, frequency="weekly"):
+    """Simple returns at the given sampling frequency (last close of each period)"""
+    if frequency in RESAMPLE_RULES:
+        prices = prices.resample(RESAMPLE_RULES[frequency]).last()
+    return prices.pct_change(fill_method=None).iloc[1:]
+
+
+def rolling_regression(stock_returns, market_returns, window, min_periods=None, chunk_size=512):
+    """Rolling OLS of every stock return column on the market return, from cumulative sums
+
+    stock_returns is (T, N), market_returns (T,). For each date t the regression uses
+    the pairs in t-window+1..t where both returns exist; window sums come from one
+    cumulative sum per moment (n, x, y, xx, xy, yy) and a difference, so the cost is
+    O(T * N) whatever the window. Returns are centred first to keep the differences
+    well conditioned. Columns are processed chunk_size at a time to bound memory.
+    Returns a dict of (T, N) arrays: beta, std_error, r_squared and observations;
+    NaN where fewer than min_periods (default window) pairs exist.
+    """
+    stock_returns = np.asarray(stock_returns, dtype=float)
+    market_returns = np.asarray(market_returns, dtype=float)
+    min_periods = window if min_periods is None else min_periods
+    periods, tickers = stock_returns.shape
+    ends = np.arange(1, periods + 1)
+    starts = np.maximum(0, ends - window)
+    results = {name: np.full((periods, tickers), np.nan) for name in ("beta", "std_error", "r_squared")}
+    results["observations"] = np.zeros((periods, tickers), dtype=int)
+
+    def window_sums(values):
+        totals = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return totals[ends] - totals[starts]
+
+    for first in range(0, tickers, chunk_size):
+        columns = slice(first, first + chunk_size)
+        y = stock_returns[:, columns]
+        valid = np.isfinite(y) & np.isfinite(market_returns)[:, None]
+        x = np.where(valid, market_returns[:, None] - np.nanmean(market_returns), 0.0)
+        y = np.where(valid, y - np.nanmean(np.where(valid, y, np.nan), axis=0), 0.0)
+
+        n = window_sums(valid.astype(float))
+        sum_x, sum_y = window_sums(x), window_sums(y)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sxx = window_sums(x * x) - sum_x * sum_x / n
+            sxy = window_sums(x * y) - sum_x * sum_y / n
+            syy = window_sums(y * y) - sum_y * sum_y / n
+            beta = sxy / sxx
+            residual = np.maximum(syy - beta * sxy, 0.0)
+            std_error = np.sqrt(residual / (n - 2) / sxx)
+            r_squared = sxy * sxy / (sxx * syy)
+
+        enough = (n >= max(min_periods, 3)) & (sxx > 0)
+        results["beta"][:, columns] = np.where(enough, beta, np.nan)
+        results["std_error"][:, columns] = np.where(enough, std_error, np.nan)
+        results["r_squared"][:, columns] = np.where(enough, r_squared, np.nan)
+        results["observations"][:, columns] = n.astype(int)
+    return results
+
+
+def adjust_betas(betas, std_errors=None, method="blume", prior=None):
+    """Blume or Vasicek adjusted betas; the last axis is the cross-section of tickers
+
+    Blume: 2/3 * beta + 1/3. Vasicek: shrink each beta toward the prior mean, weighting
+    by precision, so noisy estimates move further. The prior (mean, variance) defaults
+    to the cross-sectional mean and variance of the raw betas.
+    """
+    betas = np.asarray(betas, dtype=float)
+    if method is None:
+        return betas
+    if method == "blume":
+        return 2 / 3 * betas + 1 / 3
+    if method != "vasicek":
+        raise ValueError(f"Unknown beta adjustment {method!r}; use one of {ADJUSTMENTS}")
+
+    if prior is None:
+        prior_mean = np.nanmean(betas, axis=-1, keepdims=True)
+        prior_variance = np.nanvar(betas, axis=-1, keepdims=True)
+    else:
+        prior_mean, prior_variance = prior
+    sampling_variance = np.asarray(std_errors, dtype=float) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weight = prior_variance / (prior_variance + sampling_variance)
+    return weight * betas + (1 - weight) * prior_mean
+
+
+def estimate_betas(prices, benchmark, years=2, frequency="weekly", adjustment="blume", min_coverage=0.8):
+    """Latest rolling beta of every ticker in prices against the benchmark column
+
+    Uses the last `years` of returns at the given frequency; tickers with fewer than
+    min_coverage of the window's observations are dropped. Returns a DataFrame indexed
+    by ticker: beta (adjusted), raw_beta, std_error, r_squared, observations, as_of.
+    """
+    if benchmark not in prices:
+        raise KeyError(f"Benchmark {benchmark} not found in the price data")
+    returns = period_returns(prices, frequency)
+    window = int(round(years * PERIODS_PER_YEAR[frequency]))
+    stocks = returns.drop(columns=[benchmark])
+    fit = rolling_regression(stocks.to_numpy(), returns[benchmark].to_numpy(), window,
+                             min_periods=int(np.ceil(min_coverage * window)))
+
+    latest = {name: values[-1] for name, values in fit.items()}
+    frame = pd.DataFrame({
+        "beta": adjust_betas(latest["beta"], latest["std_error"], adjustment) if adjustment else latest["beta"],
+        "raw_beta": latest["beta"],
+        "std_error": latest["std_error"],
+        "r_squared": latest["r_squared"],
+        "observations": latest["observations"],
+    }, index=stocks.columns.rename("ticker"))
+    frame["as_of"] = returns.index[-1] if len(returns) else pd.NaT
+    return frame.dropna(subset=["raw_beta"])
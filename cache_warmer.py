@@ -0,0 +1,56 @@
+import argparse
+import logging
+import os
+import runpy
+import sys
+import time
+import warnings
+
+from rate_history import DEFAULT_RATE_HISTORY_DIR, RateHistory
+from rate_refresher import RateRefresher
+from rate_sources import HedgedRateFetcher, TradingEconomicsSource, default_sources
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TEST1.py")
+
+
+def warm_rates(countries, history_path=DEFAULT_RATE_HISTORY_DIR):
+    """Fetch every country's 10Y yield once into the rate history; returns {country: rate or None}"""
+    fetcher = HedgedRateFetcher(default_sources(), hedge_delay=1.0, timeout=10.0)
+    return RateRefresher(fetcher, RateHistory(history_path), countries).refresh()
+
+
+def warm_default_valuation(app_path=APP_PATH):
+    """Run the app once headless with its default inputs
+
+    Streamlit runs a script outside `streamlit run` in bare mode: every widget returns
+    its default, so the run values the default scenario, simulates it, builds the
+    sensitivity grid and figures, and writes the results to the persistent run store
+    under the key the first real visitor will look up.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(app_path)))
+    logging.disable(logging.WARNING)  # Bare mode warns about the missing ScriptRunContext on every element
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            runpy.run_path(app_path, run_name="__main__")
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Warm the rate history and run store before starting the server")
+    parser.add_argument("--app", default=APP_PATH, help="Streamlit script whose default scenario is precomputed")
+    parser.add_argument("--countries", nargs="+", default=list(TradingEconomicsSource.PATHS))
+    parser.add_argument("--skip-rates", action="store_true", help="Use the stored rates as they are")
+    args = parser.parse_args()
+
+    if not args.skip_rates:
+        for country, rate in warm_rates(args.countries).items():
+            print(f"{country}: {'unavailable' if rate is None else f'{rate:.2f}%'}")
+    started = time.perf_counter()
+    warm_default_valuation(args.app)
+    print(f"Default valuation warmed in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+
+# Trading multiple -> (target metric it is applied to, whether it values the enterprise rather than the equity)
+MULTIPLES = {
+    "ev_ebitda": ("ebitda", True),
+    "ev_revenue": ("revenue", True),
+    "p_fcf": ("fcf", False),
+}
+
+MULTIPLE_LABELS = {"ev_ebitda": "EV/EBITDA", "ev_revenue": "EV/Revenue", "p_fcf": "P/FCF"}
+
+# Peer columns a multiple is derived from when the dataset has no ready-made multiple column
+MULTIPLE_COMPONENTS = {
+    "ev_ebitda": ("ev", "ebitda"),
+    "ev_revenue": ("ev", "revenue"),
+    "p_fcf": ("market_cap", "fcf"),
+}
+
+FIELD_QUANTILES = (0.10, 0.25, 0.50, 0.75, 0.90)
+
+
+def peer_multiples(peers):
+    """Positive, finite peer multiples as {multiple: 1-D array}
+
+    Uses the ev_ebitda / ev_revenue / p_fcf columns where present, otherwise derives
+    them from ev, ebitda, revenue, market_cap and fcf. Negative and undefined multiples
+    (loss-making peers) are dropped.
+    """
+    multiples = {}
+    for name, (numerator, denominator) in MULTIPLE_COMPONENTS.items():
+        if name in peers:
+            values = pd.to_numeric(peers[name], errors="coerce").to_numpy(dtype=float)
+        elif numerator in peers and denominator in peers:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                values = (pd.to_numeric(peers[numerator], errors="coerce")
+                          / pd.to_numeric(peers[denominator], errors="coerce")).to_numpy(dtype=float)
+        else:
+            values = np.array([])
+        multiples[name] = values[np.isfinite(values) & (values > 0)]
+    return multiples
+
+
+def implied_values(targets, multiples, quantiles=FIELD_QUANTILES):
+    """Quantiles of the per-share value implied by each peer multiple, for every target
+
+    targets maps ebitda, revenue, fcf, net_debt and shares to arrays of one shape (one
+    entry per target scenario; scalars broadcast). Value per share is affine in the
+    multiple, (multiple * metric - net_debt) / shares, so its quantiles over the peer
+    set are the peer multiple quantiles pushed through that line (taken from the
+    mirrored quantile where the slope is negative). Every target costs O(quantiles)
+    instead of O(peers). Returns {multiple: array of shape targets.shape + (quantiles,)},
+    NaN where a multiple has no peers or the target metric is missing.
+    """
+    quantiles = np.asarray(quantiles, dtype=float)
+    shape = np.broadcast(*(np.asarray(targets[name], dtype=float) for name in ("ebitda", "revenue", "fcf",
+                                                                               "net_debt", "shares"))).shape
+    shares = np.broadcast_to(np.asarray(targets["shares"], dtype=float), shape)[..., None]
+    results = {}
+    for name, (metric, enterprise) in MULTIPLES.items():
+        peers = multiples.get(name, np.array([]))
+        if peers.size == 0:
+            results[name] = np.full(shape + quantiles.shape, np.nan)
+            continue
+        rising = np.quantile(peers, quantiles)
+        falling = np.quantile(peers, 1 - quantiles)
+        slope = np.broadcast_to(np.asarray(targets[metric], dtype=float), shape)[..., None]
+        offset = np.broadcast_to(np.asarray(targets["net_debt"], dtype=float), shape)[..., None] if enterprise else 0.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            results[name] = (np.where(slope >= 0, rising, falling) * slope - offset) / shares
+    return results
+
+
+def football_field(implied, target_names, quantiles=FIELD_QUANTILES):
+    """Long-format ranges for a football-field chart: one row per target and multiple"""
+    frames = []
+    for name, values in implied.items():
+        frame = pd.DataFrame(np.reshape(values, (-1, len(quantiles))),
+                             columns=[f"p{round(q * 100)}" for q in quantiles])
+        frame.insert(0, "method", MULTIPLE_LABELS[name])
+        frame.insert(0, "target", list(target_names))
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
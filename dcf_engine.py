@@ -0,0 +1,396 @@
+import numpy as np
+
+from discounting import discount_table
+
+# Bump whenever a change to the engine alters valuation results; keys the persistent run store
+ENGINE_VERSION = "1.1"
+
+# Relative standard deviation of each Monte Carlo driver around its base value
+MONTE_CARLO_SPREADS = {
+    "wacc": 0.15,
+    "terminal_growth": 0.30,
+    "revenue_growth": 0.25,
+    "ebitda_margin": 0.15,
+    "capex_ratio": 0.15,
+    "depreciation_ratio": 0.15,
+    "wc_ratio": 0.15,
+}
+
+# Simulated drivers are clipped to these ranges
+DRIVER_BOUNDS = {
+    "wacc": (0.05, 0.25),
+    "terminal_growth": (0.0, 0.05),
+    "revenue_growth": (-0.5, 1.0),
+    "ebitda_margin": (0.0, 0.6),
+    "capex_ratio": (0.0, 0.3),
+    "depreciation_ratio": (0.0, 0.2),
+    "wc_ratio": (-0.1, 0.15),
+}
+
+RATIO_DRIVERS = ("capex_ratio", "depreciation_ratio", "wc_ratio")
+
+RUN_DCF_ARGS = (
+    "current_revenue", "revenue_growth", "ebitda_margin", "capex_ratio", "depreciation_ratio",
+    "wc_ratio", "tax_rate", "wacc", "terminal_growth", "net_debt", "shares_outstanding", "periods_per_year",
+    "high_growth", "high_growth_years", "fade_years", "times", "terminal_time", "first_period_fraction",
+)
+
+# Sidebar-level scalar inputs; WACC is built from the CAPM components
+SCALAR_INPUTS = (
+    "current_revenue", "risk_free_rate", "beta", "market_risk_premium", "cost_of_debt", "tax_rate",
+    "equity_ratio", "capex_ratio", "depreciation_ratio", "wc_ratio", "terminal_growth",
+    "net_debt", "shares_outstanding",
+)
+
+# Inputs with one value per projection period
+PERIOD_INPUTS = ("revenue_growth", "ebitda_margin")
+
+
+def _col(x):
+    """Broadcast a per-scenario value against the period axis"""
+    return np.asarray(x, dtype=float)[..., None]
+
+
+def period_rate(annual_rate, periods_per_year=1):
+    """Convert an annual rate to the equivalent compounded rate per period"""
+    return (1 + np.asarray(annual_rate, dtype=float)) ** (1 / periods_per_year) - 1
+
+
+def period_label(period, periods_per_year=1):
+    """Short label of 0-based projection period: "Y3", or "Y1 Q2" / "Y1 M5" below annual"""
+    year, k = divmod(period, periods_per_year)
+    if periods_per_year == 1:
+        return f"Y{year + 1}"
+    prefix = "Q" if periods_per_year == 4 else "M"
+    return f"Y{year + 1} {prefix}{k + 1}"
+
+
+def project_financials(current_revenue, revenue_growth, ebitda_margin, capex_ratio,
+                       depreciation_ratio, wc_ratio, tax_rate):
+    """Project revenue, EBITDA and free cash flow for any number of scenarios at once
+
+    revenue_growth and ebitda_margin have the period on the last axis, so the horizon
+    is simply their length; the other inputs are scalars or one value per scenario.
+    Growth is per period, and everything is computed with cumulative products over
+    the period axis rather than a Python loop.
+    """
+    growth = np.asarray(revenue_growth, dtype=float)
+    margin = np.asarray(ebitda_margin, dtype=float)
+
+    revenue = _col(current_revenue) * np.cumprod(1 + growth, axis=-1)
+    ebitda = revenue * margin
+    depreciation = revenue * _col(depreciation_ratio)
+    ebit = ebitda - depreciation
+    taxes = np.where(ebit > 0, ebit * _col(tax_rate), 0.0)
+    nopat = ebit - taxes
+
+    capex = revenue * _col(capex_ratio)
+    wc_change = revenue * growth * _col(wc_ratio)
+    wc_change[..., 0] = 0  # No working capital change in the first year
+
+    fcf = nopat + depreciation - capex - wc_change
+
+    return {
+        "revenue": revenue,
+        "ebitda": ebitda,
+        "depreciation": depreciation,
+        "ebit": ebit,
+        "nopat": nopat,
+        "capex": capex,
+        "wc_change": wc_change,
+        "fcf": fcf,
+    }
+
+
+def multistage_multiple(rate, terminal_growth, high_growth=None, high_growth_periods=0, fade_periods=0):
+    """Terminal value per unit of final-period FCF for a growth -> fade -> perpetuity tail
+
+    All rates are per period. The tail is a growing annuity of high_growth_periods
+    cash flows at high_growth, then a linear fade from high_growth to terminal_growth
+    over fade_periods valued with the H-model approximation, then a perpetuity at
+    terminal_growth. Every segment is closed form, so a 100-year fade costs the same
+    as a 5-year one.
+    With no high-growth or fade periods this is the Gordon multiple (1 + g) / (r - g).
+
+    Returns (annuity part, fade + perpetuity part, d multiple / d rate,
+    d multiple / d terminal_growth); NaN where rate <= terminal_growth. When
+    high_growth is None it moves with terminal_growth, and the growth derivative
+    includes that path.
+    """
+    rate = np.asarray(rate, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    aliased = high_growth is None
+    high_growth = terminal_growth if aliased else np.asarray(high_growth, dtype=float)
+    n = np.asarray(high_growth_periods, dtype=float)
+    half_life = np.asarray(fade_periods, dtype=float) / 2  # H in the H-model
+
+    # High-growth stage: sum of q^t for t = 1..n with q = (1 + g1) / (1 + r)
+    q = (1 + high_growth) / (1 + rate)
+    q_n = q ** n
+    level = np.isclose(q, 1.0)
+    safe_gap = np.where(level, 1.0, 1 - q)
+    annuity = np.where(level, n, q * (1 - q_n) / safe_gap)
+    weighted_sum = np.where(level, n * (n + 1) / 2,
+                            q * (1 - (n + 1) * q_n + n * q_n * q) / safe_gap ** 2)  # sum of t q^t
+    d_annuity_d_rate = -weighted_sum / (1 + rate)
+
+    # Fade + perpetuity at the end of the high-growth stage (H-model)
+    spread = np.where(rate > terminal_growth, rate - terminal_growth, np.nan)
+    tail = ((1 + terminal_growth) + half_life * (high_growth - terminal_growth)) / spread
+    perpetuity = q_n * tail
+    d_perpetuity_d_rate = -n * q_n * tail / (1 + rate) - q_n * tail / spread
+    d_perpetuity_d_growth = q_n * ((1 - half_life) * spread + (1 + terminal_growth)
+                                   + half_life * (high_growth - terminal_growth)) / spread ** 2
+    if aliased:
+        # dq/dg1 = q / (1 + g1) moves the annuity and the q^n discount on the tail; g1 also enters the H-model term
+        d_perpetuity_d_growth = (d_perpetuity_d_growth + (weighted_sum + n * q_n * tail) / (1 + high_growth)
+                                 + q_n * half_life / spread)
+
+    return annuity, perpetuity, d_annuity_d_rate + d_perpetuity_d_rate, d_perpetuity_d_growth
+
+
+def discount_cash_flows(fcf, wacc, terminal_growth, periods_per_year=1,
+                        high_growth=None, high_growth_years=0, fade_years=0,
+                        times=None, terminal_time=None, first_period_fraction=1.0):
+    """Present value of projected FCF plus a terminal value
+
+    wacc and terminal_growth are annual rates; with periods_per_year > 1 (quarterly,
+    monthly) cash flows are discounted at t / periods_per_year years and the terminal
+    value uses the equivalent per-period rates. By default the terminal value is a
+    Gordon perpetuity; high_growth, high_growth_years and fade_years add the
+    multi-stage tail of multistage_multiple after the explicit forecast.
+
+    times / terminal_time override the discounting times in years (see
+    discounting.date_grid for dated, stub and mid-year schedules), and
+    first_period_fraction prorates the first cash flow for a stub period.
+    Scenarios where WACC does not exceed terminal growth come back as NaN.
+    """
+    fcf = np.asarray(fcf, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+
+    if times is None:
+        times = np.arange(1, fcf.shape[-1] + 1) / periods_per_year
+    times = np.asarray(times, dtype=float)
+    terminal_time = times[-1] if terminal_time is None else terminal_time
+
+    discount_factors = discount_table(times, wacc)
+    terminal_discount = (1 + wacc) ** -terminal_time
+    period_weights = np.ones(fcf.shape[-1])
+    period_weights[0] = first_period_fraction
+    pv_fcf = np.sum(fcf * period_weights * discount_factors, axis=-1)
+
+    high_growth_per_period = None if high_growth is None else period_rate(high_growth, periods_per_year)
+    annuity, perpetuity, _, _ = multistage_multiple(
+        np.where(wacc > terminal_growth, period_rate(wacc, periods_per_year), np.nan),
+        period_rate(terminal_growth, periods_per_year), high_growth_per_period,
+        np.asarray(high_growth_years) * periods_per_year, np.asarray(fade_years) * periods_per_year
+    )
+    final_fcf = fcf[..., -1]
+    terminal_value = final_fcf * (annuity + perpetuity)
+    pv_terminal_value = terminal_value * terminal_discount
+
+    return {
+        "times": times,
+        "terminal_time": terminal_time,
+        "period_weights": period_weights,
+        "discount_factors": discount_factors,
+        "terminal_discount": terminal_discount,
+        "pv_fcf": pv_fcf,
+        "terminal_value": terminal_value,
+        "pv_terminal_value": pv_terminal_value,
+        "pv_high_growth": final_fcf * annuity * terminal_discount,
+        "pv_fade_and_perpetuity": final_fcf * perpetuity * terminal_discount,
+        "enterprise_value": pv_fcf + pv_terminal_value,
+    }
+
+
+def run_dcf(current_revenue, revenue_growth, ebitda_margin, capex_ratio,
+            depreciation_ratio, wc_ratio, tax_rate, wacc, terminal_growth,
+            net_debt, shares_outstanding, periods_per_year=1,
+            high_growth=None, high_growth_years=0, fade_years=0,
+            times=None, terminal_time=None, first_period_fraction=1.0):
+    """Full DCF from operating drivers to equity value per share, vectorized over scenarios
+
+    The horizon is the length of revenue_growth / ebitda_margin, in periods of
+    1 / periods_per_year years; see discount_cash_flows for the terminal value and
+    discounting options.
+    """
+    projections = project_financials(current_revenue, revenue_growth, ebitda_margin, capex_ratio,
+                                     depreciation_ratio, wc_ratio, tax_rate)
+    valuation = discount_cash_flows(projections["fcf"], wacc, terminal_growth, periods_per_year,
+                                    high_growth, high_growth_years, fade_years,
+                                    times, terminal_time, first_period_fraction)
+    equity_value = valuation["enterprise_value"] - np.asarray(net_debt, dtype=float)
+
+    return {
+        **projections,
+        **valuation,
+        "equity_value": equity_value,
+        "value_per_share": equity_value / np.asarray(shares_outstanding, dtype=float),
+    }
+
+
+def compute_wacc(risk_free_rate, beta, market_risk_premium, cost_of_debt, tax_rate, equity_ratio):
+    """CAPM cost of equity and WACC; equity_ratio is the equity weight in percent"""
+    cost_of_equity = np.asarray(risk_free_rate, dtype=float) + np.asarray(beta, dtype=float) * market_risk_premium
+    equity_weight = np.asarray(equity_ratio, dtype=float) / 100
+    wacc = equity_weight * cost_of_equity + (1 - equity_weight) * np.asarray(cost_of_debt, dtype=float) * (1 - tax_rate)
+    return cost_of_equity, wacc
+
+
+def engine_inputs(inputs):
+    """Map sidebar-level model inputs to run_dcf arguments, deriving WACC from its components
+
+    An explicit "wacc" entry overrides the CAPM build-up.
+    """
+    kwargs = {name: inputs[name] for name in RUN_DCF_ARGS if name in inputs}
+    if "wacc" not in kwargs:
+        _, kwargs["wacc"] = compute_wacc(inputs["risk_free_rate"], inputs["beta"], inputs["market_risk_premium"],
+                                         inputs["cost_of_debt"], inputs["tax_rate"], inputs["equity_ratio"])
+    return kwargs
+
+
+def value_from_inputs(inputs):
+    """run_dcf over sidebar-level model inputs (see engine_inputs)"""
+    return run_dcf(**engine_inputs(inputs))
+
+
+def value_with_greeks(inputs):
+    """Valuation plus exact partial derivatives of EV and value per share w.r.t. every input
+
+    Returns the value_from_inputs result with a "greeks" entry holding
+    {"enterprise_value": {...}, "value_per_share": {...}} keyed by input name; yearly
+    inputs get one derivative per period. The EBIT > 0 tax kink is differentiated
+    piecewise along the active branch. When WACC is built from its CAPM components
+    the chain rule is applied through them, and tax_rate includes both its NOPAT
+    and its debt shield effect.
+    """
+    kwargs = engine_inputs(inputs)
+    result = run_dcf(**kwargs)
+
+    # Projections only carry the batch axes of the operating inputs; widen them to every scenario
+    full_shape = np.broadcast_shapes(result["fcf"].shape, *(np.shape(_col(kwargs[name])) for name in
+                                                             ("wacc", "terminal_growth", "net_debt", "shares_outstanding")))
+    revenue, fcf, ebit = (np.broadcast_to(result[name], full_shape) for name in ("revenue", "fcf", "ebit"))
+    growth = np.broadcast_to(np.asarray(kwargs["revenue_growth"], dtype=float), fcf.shape)
+    wacc = _col(kwargs["wacc"])
+    terminal_growth = _col(kwargs["terminal_growth"])
+    tax_rate = _col(kwargs["tax_rate"])
+    periods_per_year = kwargs.get("periods_per_year", 1)
+    periods = np.arange(1, fcf.shape[-1] + 1)
+    times = result["times"]
+
+    discount_factors = np.broadcast_to(result["discount_factors"], fcf.shape)
+    high_growth = kwargs.get("high_growth")
+    annuity, perpetuity, d_multiple_d_rate, d_multiple_d_growth = multistage_multiple(
+        np.where(wacc > terminal_growth, period_rate(wacc, periods_per_year), np.nan),
+        period_rate(terminal_growth, periods_per_year),
+        None if high_growth is None else _col(period_rate(high_growth, periods_per_year)),
+        _col(np.asarray(kwargs.get("high_growth_years", 0)) * periods_per_year),
+        _col(np.asarray(kwargs.get("fade_years", 0)) * periods_per_year)
+    )
+    terminal_multiple = annuity + perpetuity
+
+    # dEV/dFCF_t: (prorated) discount factor, plus the terminal value loading on the final period
+    terminal_discount = np.broadcast_to(result["terminal_discount"], fcf.shape[:-1])
+    weight = discount_factors * result["period_weights"]
+    weight[..., -1] += terminal_multiple[..., 0] * terminal_discount
+
+    tax_active = ebit > 0
+    nopat_factor = np.where(tax_active, 1 - tax_rate, 1.0)
+    later_years = periods > 1
+    final_fcf = fcf[..., -1]
+
+    # FCF_s feeds every later year through revenue compounding
+    weighted_fcf = weight * fcf
+    downstream_fcf = np.flip(np.cumsum(np.flip(weighted_fcf, -1), -1), -1)
+
+    # d(1+w)^-t/dw = -t (1+w)^-(t+1); the terminal multiple also moves with the per-period rates
+    w, g = wacc[..., 0], terminal_growth[..., 0]
+    dw_p = (1 + w) ** (1 / periods_per_year - 1) / periods_per_year
+    dg_p = (1 + g) ** (1 / periods_per_year - 1) / periods_per_year
+    d_ev = {
+        "wacc": -np.sum(times * fcf * result["period_weights"] * discount_factors, axis=-1) / (1 + w)
+                + final_fcf * terminal_discount * (-terminal_multiple[..., 0] * result["terminal_time"] / (1 + w)
+                                                   + d_multiple_d_rate[..., 0] * dw_p),
+        "terminal_growth": final_fcf * terminal_discount * d_multiple_d_growth[..., 0] * dg_p,
+        "revenue_growth": downstream_fcf / (1 + growth) - weight * revenue * _col(kwargs["wc_ratio"]) * later_years,
+        "ebitda_margin": weight * revenue * nopat_factor,
+        "capex_ratio": -np.sum(weight * revenue, axis=-1),
+        "depreciation_ratio": np.sum(weight * revenue * (1 - nopat_factor), axis=-1),
+        "wc_ratio": -np.sum(weight * revenue * growth * later_years, axis=-1),
+        "tax_rate": -np.sum(weight * ebit * tax_active, axis=-1),
+        "current_revenue": np.sum(weighted_fcf, axis=-1) / np.asarray(kwargs["current_revenue"], dtype=float),
+        "net_debt": np.zeros_like(final_fcf),
+        "shares_outstanding": np.zeros_like(final_fcf),
+    }
+
+    if "wacc" not in inputs:
+        # Chain rule through the CAPM build-up of WACC
+        equity_weight = np.asarray(inputs["equity_ratio"], dtype=float) / 100
+        cost_of_equity, _ = compute_wacc(inputs["risk_free_rate"], inputs["beta"], inputs["market_risk_premium"],
+                                         inputs["cost_of_debt"], inputs["tax_rate"], inputs["equity_ratio"])
+        after_tax_debt = np.asarray(inputs["cost_of_debt"], dtype=float) * (1 - np.asarray(inputs["tax_rate"], dtype=float))
+        d_wacc = d_ev["wacc"]
+        d_ev["risk_free_rate"] = d_wacc * equity_weight
+        d_ev["beta"] = d_wacc * equity_weight * inputs["market_risk_premium"]
+        d_ev["market_risk_premium"] = d_wacc * equity_weight * inputs["beta"]
+        d_ev["cost_of_debt"] = d_wacc * (1 - equity_weight) * (1 - np.asarray(inputs["tax_rate"], dtype=float))
+        d_ev["equity_ratio"] = d_wacc * (cost_of_equity - after_tax_debt) / 100
+        d_ev["tax_rate"] = d_ev["tax_rate"] - d_wacc * (1 - equity_weight) * inputs["cost_of_debt"]
+
+    shares = np.asarray(kwargs["shares_outstanding"], dtype=float)
+    d_value = {name: np.asarray(grad) / (_col(shares) if np.ndim(grad) == fcf.ndim else shares)
+               for name, grad in d_ev.items()}
+    d_value["net_debt"] = np.broadcast_to(-1 / shares, final_fcf.shape)
+    d_value["shares_outstanding"] = -result["value_per_share"] / shares
+
+    result["greeks"] = {"enterprise_value": d_ev, "value_per_share": d_value}
+    return result
+
+
+def sample_drivers(base, num_simulations, rng, include_ratios=False):
+    """Draw clipped normal samples of the Monte Carlo drivers around their base values
+
+    Returns wacc and terminal_growth as (n,) arrays, revenue_growth and ebitda_margin
+    as (n, periods) arrays and, with include_ratios, the capex, depreciation and
+    working capital ratios as (n,) arrays.
+    """
+    drivers = {}
+    for name in ("wacc", "terminal_growth"):
+        drivers[name] = rng.normal(base[name], abs(base[name]) * MONTE_CARLO_SPREADS[name], num_simulations)
+
+    for name in ("revenue_growth", "ebitda_margin"):
+        values = np.asarray(base[name], dtype=float)[:, None]
+        drivers[name] = rng.normal(values, np.abs(values) * MONTE_CARLO_SPREADS[name],
+                                   (values.shape[0], num_simulations)).T
+
+    if include_ratios:
+        for name in RATIO_DRIVERS:
+            drivers[name] = rng.normal(base[name], abs(base[name]) * MONTE_CARLO_SPREADS[name], num_simulations)
+
+    return clip_drivers(drivers)
+
+
+def clip_drivers(drivers):
+    """Constrain sampled drivers to DRIVER_BOUNDS"""
+    return {name: np.clip(values, *DRIVER_BOUNDS[name]) for name, values in drivers.items()}
+
+
+def simulate_value_per_share(fixed, base, num_simulations, seed=42, chunk_size=50_000, progress=None):
+    """Monte Carlo value per share from sample_drivers around base, valued in chunks
+
+    fixed holds the remaining run_dcf arguments. progress, if given, is called with the
+    fraction of paths valued after each chunk. Paths where WACC does not exceed
+    terminal growth are dropped.
+    """
+    drivers = sample_drivers(base, num_simulations, np.random.RandomState(seed))
+    values = np.empty(num_simulations)
+    for start in range(0, num_simulations, chunk_size):
+        stop = min(start + chunk_size, num_simulations)
+        chunk = {name: samples[start:stop] for name, samples in drivers.items()}
+        values[start:stop] = run_dcf(**{**fixed, **chunk})["value_per_share"]
+        if progress is not None:
+            progress(stop / num_simulations)
+    return values[np.isfinite(values)]
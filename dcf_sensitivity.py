@@ -0,0 +1,178 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from dcf_engine import (PERIOD_INPUTS, SCALAR_INPUTS, period_label, run_dcf, sample_drivers, value_from_inputs,
+                        value_with_greeks)
+
+INPUT_LABELS = {
+    "current_revenue": "Current Revenue",
+    "risk_free_rate": "Risk-Free Rate",
+    "beta": "Beta",
+    "market_risk_premium": "Equity Risk Premium",
+    "cost_of_debt": "Cost of Debt",
+    "tax_rate": "Tax Rate",
+    "equity_ratio": "Equity Weight",
+    "capex_ratio": "CapEx / Revenue",
+    "depreciation_ratio": "Depreciation / Revenue",
+    "wc_ratio": "WC Change / Revenue",
+    "terminal_growth": "Terminal Growth",
+    "net_debt": "Net Debt",
+    "shares_outstanding": "Shares Outstanding",
+    "revenue_growth": "Revenue Growth",
+    "ebitda_margin": "EBITDA Margin",
+}
+
+
+def _flatten_drivers(drivers):
+    """Stack driver arrays into an (n, d) matrix with one label per column"""
+    columns, labels, layout = [], [], []
+    for name, values in drivers.items():
+        if values.ndim == 1:
+            columns.append(values[:, None])
+            labels.append(name)
+            layout.append((name, 1, False))
+        else:
+            columns.append(values)
+            labels.extend(f"{name}_{t + 1}" for t in range(values.shape[1]))
+            layout.append((name, values.shape[1], True))
+    return np.hstack(columns), labels, layout
+
+
+def _unflatten_drivers(matrix, layout):
+    """Inverse of _flatten_drivers for a block of rows"""
+    drivers, start = {}, 0
+    for name, width, per_period in layout:
+        drivers[name] = matrix[:, start:start + width] if per_period else matrix[:, start]
+        start += width
+    return drivers
+
+
+def evaluate_in_chunks(func, matrix, chunk_size=20000, workers=None):
+    """Evaluate func over row chunks of matrix on a thread pool and concatenate the results
+
+    NumPy releases the GIL inside its array kernels, so chunks run concurrently
+    across cores without the pickling cost of a process pool.
+    """
+    chunks = [matrix[i:i + chunk_size] for i in range(0, matrix.shape[0], chunk_size)]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(chunks) == 1:
+        return np.concatenate([func(chunk) for chunk in chunks])
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return np.concatenate(list(pool.map(func, chunks)))
+
+
+def sobol_indices(base, fixed, num_samples=4096, include_ratios=False, seed=42, workers=None):
+    """First-order and total Sobol indices of value per share for every Monte Carlo driver
+
+    base holds the centre of each stochastic driver (see dcf_engine.sample_drivers) and
+    fixed holds the remaining value_per_share arguments. Uses the Saltelli (2010)
+    first-order and Jansen total-effect estimators on A, B and the d mixed A_B matrices.
+    The A_B matrices are built and evaluated one driver at a time in a single reused
+    buffer, so memory stays at a few (n, d) matrices however many per-period drivers
+    there are; only the value vectors are kept.
+    """
+    rng = np.random.default_rng(seed)
+    A, labels, layout = _flatten_drivers(sample_drivers(base, num_samples, rng, include_ratios))
+    B, _, _ = _flatten_drivers(sample_drivers(base, num_samples, rng, include_ratios))
+    num_drivers = A.shape[1]
+
+    def evaluate(rows):
+        return run_dcf(**{**fixed, **_unflatten_drivers(rows, layout)})["value_per_share"]
+
+    y_A = evaluate_in_chunks(evaluate, A, workers=workers)
+    y_B = evaluate_in_chunks(evaluate, B, workers=workers)
+
+    # A_B^(i) is A with column i taken from B; the column is put back after each driver
+    y_AB = np.empty((num_drivers, num_samples))
+    mixed = A.copy()
+    for i in range(num_drivers):
+        mixed[:, i] = B[:, i]
+        y_AB[i] = evaluate_in_chunks(evaluate, mixed, workers=workers)
+        mixed[:, i] = A[:, i]
+
+    # Drop sample rows where any evaluation hit an invalid WACC/terminal growth pair
+    valid = np.isfinite(y_A) & np.isfinite(y_B) & np.all(np.isfinite(y_AB), axis=0)
+    y_A, y_B, y_AB = y_A[valid], y_B[valid], y_AB[:, valid]
+    variance = np.var(np.concatenate([y_A, y_B]))
+
+    first_order = np.mean(y_B * (y_AB - y_A), axis=1) / variance
+    total = 0.5 * np.mean((y_A - y_AB) ** 2, axis=1) / variance
+
+    return pd.DataFrame({
+        "driver": labels,
+        "first_order": first_order,
+        "total": total,
+    }).sort_values("total", ascending=False, ignore_index=True)
+
+
+def tornado_analysis(inputs, delta=0.10, relative=True):
+    """Per-share value swing from perturbing every scalar input by +/- delta, in one engine call
+
+    inputs are sidebar-level model inputs (see dcf_engine.engine_inputs). With relative
+    the bump is delta times the base value, otherwise delta is added in the input's own
+    units. Per-period growth and margin inputs are bumped one period at a time and
+    labelled by year (and quarter or month below annual; see dcf_engine.period_label).
+    Returns rows sorted by swing, largest first; the base value is in df.attrs.
+    """
+    periods = len(inputs[PERIOD_INPUTS[0]])
+    periods_per_year = inputs.get("periods_per_year", 1)
+    bumps = [(name, None) for name in SCALAR_INPUTS]
+    bumps += [(name, t) for name in PERIOD_INPUTS for t in range(periods)]
+    batch_size = 1 + 2 * len(bumps)
+
+    # Row 0 is the base case, rows 2k+1 / 2k+2 the low / high bump of input k
+    batch = dict(inputs)
+    batch.update({name: np.full(batch_size, inputs[name], dtype=float) for name in SCALAR_INPUTS})
+    batch.update({name: np.tile(np.asarray(inputs[name], dtype=float), (batch_size, 1)) for name in PERIOD_INPUTS})
+
+    labels, low_inputs, high_inputs = [], [], []
+    for k, (name, t) in enumerate(bumps):
+        column = batch[name] if t is None else batch[name][:, t]
+        base = column[0]
+        step = abs(base) * delta if relative else delta
+        column[2 * k + 1] = base - step
+        column[2 * k + 2] = base + step
+        labels.append(INPUT_LABELS[name] if t is None else f"{INPUT_LABELS[name]} {period_label(t, periods_per_year)}")
+        low_inputs.append(base - step)
+        high_inputs.append(base + step)
+
+    values = value_from_inputs(batch)["value_per_share"]
+    low_values, high_values = values[1::2], values[2::2]
+
+    df = pd.DataFrame({
+        "input": labels,
+        "low_input": low_inputs,
+        "high_input": high_inputs,
+        "low_value": low_values,
+        "high_value": high_values,
+        "swing": np.abs(high_values - low_values),
+    }).sort_values("swing", ascending=False, ignore_index=True)
+    df.attrs["base_value"] = float(values[0])
+    return df
+
+
+def greeks_table(inputs):
+    """Analytic local sensitivities of value per share as a table, one row per input
+
+    Each row has the input's base value, the partial derivative of value per share
+    and the elasticity (percent change in value per percent change in the input).
+    """
+    result = value_with_greeks(inputs)
+    greeks = result["greeks"]["value_per_share"]
+    periods_per_year = inputs.get("periods_per_year", 1)
+    base_value = float(result["value_per_share"])
+
+    rows = []
+    for name in SCALAR_INPUTS:
+        rows.append((INPUT_LABELS[name], float(inputs[name]), float(greeks[name])))
+    for name in PERIOD_INPUTS:
+        for t, (level, grad) in enumerate(zip(inputs[name], greeks[name])):
+            rows.append((f"{INPUT_LABELS[name]} {period_label(t, periods_per_year)}", float(level), float(grad)))
+
+    df = pd.DataFrame(rows, columns=["input", "base", "derivative"])
+    df["elasticity"] = df["derivative"] * df["base"] / base_value
+    df.attrs["base_value"] = base_value
+    return df.sort_values("elasticity", key=np.abs, ascending=False, ignore_index=True)
@@ -0,0 +1,132 @@
+import numpy as np
+
+from dcf_engine import PERIOD_INPUTS, compute_wacc, engine_inputs, value_from_inputs, value_with_greeks
+
+
+def solve_batched(func, lo, hi, target, tol=1e-8, max_iter=100):
+    """Safeguarded Newton/bisection root-find of func(x) = target for an array of problems
+
+    func maps an array x to (value, derivative) arrays of the same shape. Each problem
+    keeps its own [lo, hi] bracket; Newton steps that leave the bracket fall back to
+    bisection. Problems whose bracket does not contain a root come back as NaN.
+    """
+    target = np.asarray(target, dtype=float)
+    lo, hi = np.broadcast_arrays(np.asarray(lo, dtype=float), np.asarray(hi, dtype=float), target)[:2]
+    lo, hi = lo.copy(), hi.copy()
+
+    residual_lo = func(lo)[0] - target
+    residual_hi = func(hi)[0] - target
+    bracketed = np.sign(residual_lo) * np.sign(residual_hi) <= 0
+
+    x = 0.5 * (lo + hi)
+    converged = np.zeros(x.shape, dtype=bool)
+    for _ in range(max_iter):
+        value, derivative = func(x)
+        residual = value - target
+        converged = np.abs(residual) <= tol * (1 + np.abs(target))
+        if np.all(converged | ~bracketed):
+            break
+
+        # Keep the sign change inside [lo, hi]
+        same_side_as_lo = np.sign(residual) == np.sign(residual_lo)
+        lo = np.where(same_side_as_lo, x, lo)
+        residual_lo = np.where(same_side_as_lo, residual, residual_lo)
+        hi = np.where(same_side_as_lo, hi, x)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - residual / derivative
+        use_newton = np.isfinite(newton) & (newton >= lo) & (newton <= hi)
+        x = np.where(converged, x, np.where(use_newton, newton, 0.5 * (lo + hi)))
+
+    return np.where(bracketed & converged, x, np.nan)
+
+
+def _batch_shape(inputs, prices):
+    """Broadcast shape of the prices and the per-scenario (non-period) axes of the inputs"""
+    shapes = [np.shape(prices)]
+    for name, values in inputs.items():
+        shape = np.shape(values)
+        # The discounting time grid is per-period only, shared by every scenario
+        if name == "times":
+            continue
+        shapes.append(shape[:-1] if name in PERIOD_INPUTS else shape)
+    return np.broadcast_shapes(*shapes)
+
+
+def implied_terminal_growth(inputs, prices, lower=-0.5, tol=1e-8):
+    """Terminal growth rate that makes value per share equal each price"""
+    prices = np.asarray(prices, dtype=float)
+    wacc = np.broadcast_to(engine_inputs(inputs)["wacc"], _batch_shape(inputs, prices))
+
+    def func(x):
+        result = value_with_greeks({**inputs, "terminal_growth": x})
+        return result["value_per_share"], result["greeks"]["value_per_share"]["terminal_growth"]
+
+    return solve_batched(func, lower, wacc - 1e-6, prices, tol=tol)
+
+
+def implied_wacc(inputs, prices, upper=1.0, tol=1e-8):
+    """Discount rate that makes value per share equal each price
+
+    The solved WACC replaces the CAPM build-up from risk-free rate, beta, ERP and
+    cost of debt.
+    """
+    prices = np.asarray(prices, dtype=float)
+    terminal_growth = np.broadcast_to(inputs["terminal_growth"], _batch_shape(inputs, prices))
+
+    def func(x):
+        result = value_with_greeks({**inputs, "wacc": x})
+        return result["value_per_share"], result["greeks"]["value_per_share"]["wacc"]
+
+    return solve_batched(func, terminal_growth + 1e-6, upper, prices, tol=tol)
+
+
+def implied_revenue_growth(inputs, prices, lower=-0.5, upper=1.0, tol=1e-8):
+    """Uniform annual revenue growth over the projection that makes value per share equal each price"""
+    prices = np.asarray(prices, dtype=float)
+    periods = np.shape(inputs["revenue_growth"])[-1]
+
+    def func(x):
+        growth = np.repeat(np.asarray(x, dtype=float)[..., None], periods, axis=-1)
+        result = value_with_greeks({**inputs, "revenue_growth": growth})
+        return result["value_per_share"], np.sum(result["greeks"]["value_per_share"]["revenue_growth"], axis=-1)
+
+    return solve_batched(func, lower, upper, prices, tol=tol)
+
+
+def market_value_wacc(inputs, tol=1e-10):
+    """Jointly solve WACC and equity value with market-value capital weights
+
+    Finds the fixed point equity weight = E / (E + D), where E is the model's own
+    equity value at that weight and D is net_debt (net cash carries no debt weight),
+    for every scenario at once. Plain substitution oscillates for levered, high-beta
+    scenarios, so the fixed-point residual is solved with solve_batched. Returns the
+    value_from_inputs result at the fixed point with the solved "equity_ratio"
+    (percent) and "wacc"; scenarios without a fixed point come back as NaN.
+    """
+    inputs = {name: values for name, values in inputs.items() if name != "wacc"}
+    debt = np.maximum(np.asarray(inputs["net_debt"], dtype=float), 0)
+
+    def func(equity_ratio):
+        result = value_with_greeks({**inputs, "equity_ratio": equity_ratio})
+        equity = result["equity_value"]
+        d_equity = result["greeks"]["enterprise_value"]["equity_ratio"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # A firm with no positive equity value gets no equity weight
+            implied = np.where(equity > 0, 100 - 100 * debt / (equity + debt), 0.0)
+            d_implied = np.where(equity > 0, 100 * debt / (equity + debt) ** 2 * d_equity, 0.0)
+        return equity_ratio - implied, 1 - d_implied
+
+    # Lowest equity weight that keeps WACC above terminal growth (WACC rises with the equity weight)
+    cost_of_equity, after_tax_debt = compute_wacc(inputs["risk_free_rate"], inputs["beta"], inputs["market_risk_premium"],
+                                                  inputs["cost_of_debt"], inputs["tax_rate"], 0.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lower = 100 * (np.asarray(inputs["terminal_growth"], dtype=float) + 1e-6 - after_tax_debt) / (cost_of_equity - after_tax_debt)
+    lower = np.clip(np.where(cost_of_equity > after_tax_debt, lower, 0.0), 0.0, 100.0)
+
+    equity_ratio = solve_batched(func, lower, 100.0, 0.0, tol=tol)
+    result = value_from_inputs({**inputs, "equity_ratio": equity_ratio})
+    _, result["wacc"] = compute_wacc(inputs["risk_free_rate"], inputs["beta"], inputs["market_risk_premium"],
+                                     inputs["cost_of_debt"], inputs["tax_rate"], equity_ratio)
+    result["equity_ratio"] = equity_ratio
+    return result
@@ -0,0 +1,74 @@
+import calendar
+from datetime import date
+from functools import lru_cache
+
+import numpy as np
+
+DAYS_PER_YEAR = 365.0  # ACT/365, as in spreadsheet XNPV
+
+# Only small rate sets (scalars, sensitivity and cube axes) are cached; sampled Monte Carlo
+# and Sobol rates are never reused, so hashing and keeping them would only cost memory
+MAX_CACHED_RATES = 256
+MAX_CACHED_CELLS = 50_000
+
+
+def _add_months(start, months):
+    """Shift a date by whole months, clamping to the end of shorter months"""
+    month_index = start.month - 1 + months
+    year, month = start.year + month_index // 12, month_index % 12 + 1
+    last_day = calendar.monthrange(year, month)[1]
+    # Keep month-end anchors on month ends (Mar 31 -> Jun 30 -> Sep 30 -> Dec 31)
+    day = last_day if start.day == calendar.monthrange(start.year, start.month)[1] else min(start.day, last_day)
+    return date(year, month, day)
+
+
+def period_end_dates(first_period_end, periods, periods_per_year=1):
+    """Cash-flow dates: first_period_end, then one every 12 / periods_per_year months"""
+    step = 12 // periods_per_year
+    return tuple(_add_months(first_period_end, k * step) for k in range(periods))
+
+
+def year_fractions(valuation_date, dates):
+    """ACT/365 year fractions from the valuation date to each date"""
+    return np.array([(d - valuation_date).days for d in dates], dtype=float) / DAYS_PER_YEAR
+
+
+def date_grid(valuation_date, first_period_end, periods, periods_per_year=1, mid_period=False):
+    """Discounting times for a dated cash-flow schedule, as run_dcf keyword arguments
+
+    The first period runs from the valuation date to first_period_end and may be a
+    stub; first_period_fraction is its length relative to a full period, used to
+    prorate the first cash flow. With mid_period each cash flow is discounted at the
+    midpoint of its period (mid-year convention); the terminal value is always
+    discounted from the end of the final period.
+    """
+    ends = year_fractions(valuation_date, period_end_dates(first_period_end, periods, periods_per_year))
+    starts = np.concatenate([[0.0], ends[:-1]])
+    return {
+        "times": (starts + ends) / 2 if mid_period else ends,
+        "terminal_time": float(ends[-1]),
+        "first_period_fraction": float(ends[0] * periods_per_year),
+    }
+
+
+@lru_cache(maxsize=64)
+def _cached_table(times_bytes, rates_bytes, rates_shape):
+    times = np.frombuffer(times_bytes)
+    rates = np.frombuffer(rates_bytes).reshape(rates_shape)
+    table = (1 + rates[..., None]) ** -times
+    table.flags.writeable = False
+    return table
+
+
+def discount_table(times, rates):
+    """(1 + rate) ** -time for every rate and time, shape rates.shape + times.shape
+
+    Tables for small rate sets are cached on the (time grid, rates) pair, so reruns
+    and sensitivity grids that reuse a grid and rate set skip the power evaluation;
+    cached tables are read-only. Larger (sampled) rate arrays are computed directly.
+    """
+    times = np.asarray(times, dtype=float)
+    rates = np.asarray(rates, dtype=float)
+    if rates.size > MAX_CACHED_RATES or rates.size * times.size > MAX_CACHED_CELLS:
+        return (1 + rates[..., None]) ** -times
+    return _cached_table(times.tobytes(), rates.tobytes(), rates.shape)
@@ -0,0 +1,207 @@
+import argparse
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_FUNDAMENTALS_DIR = os.environ.get(
+    "DCF_FUNDAMENTALS_DIR", os.path.join(os.path.expanduser("~"), ".dcf_valuation", "fundamentals")
+)
+
+# Statement fields kept per ticker and fiscal period: amounts in whole currency units, shares as a count
+FIELDS = ("revenue", "ebitda", "capex", "depreciation", "wc_change", "shares_outstanding")
+MONEY_FIELDS = FIELDS[:-1]
+
+INDEX_FILE = "tickers.json"
+
+
+def read_statements(path, scale=1.0, share_scale=1.0):
+    """Statement rows from a CSV or Parquet dump: ticker, period_end and any of FIELDS
+
+    Amounts are multiplied by scale and share counts by share_scale (e.g. 1e6 for a dump
+    in millions), so the store holds whole units. Optional "scale" and "share_scale"
+    columns give the multiplier per row, for dumps mixing filings reported in different units.
+    """
+    frame = pd.read_parquet(path) if path.endswith((".parquet", ".pq")) else pd.read_csv(path)
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    missing = {"ticker", "period_end"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"{path}: missing column(s) {', '.join(sorted(missing))}")
+    for names, column, default in ((MONEY_FIELDS, "scale", scale), (("shares_outstanding",), "share_scale", share_scale)):
+        factor = pd.to_numeric(frame.pop(column), errors="coerce").fillna(default) if column in frame else default
+        for name in names:
+            if name in frame:
+                frame[name] = pd.to_numeric(frame[name], errors="coerce") * factor
+    return frame
+
+
+class FundamentalsStore:
+    """Columnar on-disk store of historical statements with a ticker index
+
+    Each field is one .npy column sorted by (ticker, period_end) and opened as a
+    read-only memmap; tickers.json maps a ticker to its row range and names the current
+    column version. A lookup is a dict hit plus a slice of each column, so prefilling
+    inputs needs no parsing or network. Rewrites go to new column files and switch over
+    by replacing the index, so open readers keep a consistent snapshot.
+    """
+
+    def __init__(self, path=DEFAULT_FUNDAMENTALS_DIR):
+        self.path = path
+        self._loaded_mtime = None
+        self._reload()
+
+    @classmethod
+    def exists(cls, path=DEFAULT_FUNDAMENTALS_DIR):
+        return os.path.exists(os.path.join(path, INDEX_FILE))
+
+    def _reload(self):
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if not os.path.exists(index_path):
+            self.version, self.index, self.columns = None, {}, {}
+            return
+        self._loaded_mtime = os.path.getmtime(index_path)
+        with open(index_path) as f:
+            index = json.load(f)
+        self.version = index["version"]
+        self.index = {ticker: tuple(rows) for ticker, rows in index["tickers"].items()}
+        self.columns = {name: np.load(self._column_path(name, self.version), mmap_mode="r")
+                        for name in ("period_end",) + FIELDS}
+
+    def _column_path(self, name, version):
+        return os.path.join(self.path, f"{name}.{version}.npy")
+
+    def _refresh(self):
+        """Pick up a rebuilt or appended store written by another process"""
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(index_path) and os.path.getmtime(index_path) != self._loaded_mtime:
+            self._reload()
+
+    def __contains__(self, ticker):
+        self._refresh()
+        return ticker.upper() in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    def history(self, ticker):
+        """All stored periods for ticker, oldest first, as a DataFrame indexed by period end"""
+        self._refresh()
+        start, stop = self.index.get(ticker.upper(), (0, 0))
+        frame = pd.DataFrame({name: np.asarray(self.columns[name][start:stop]) for name in FIELDS}) \
+            if stop > start else pd.DataFrame(columns=FIELDS)
+        frame.index = pd.DatetimeIndex(np.asarray(self.columns["period_end"][start:stop]) if stop > start else [],
+                                       name="period_end")
+        return frame
+
+    def latest_inputs(self, ticker, years=3):
+        """Model inputs implied by the most recent periods, or None for an unknown ticker
+
+        current_revenue, ebitda_margin, revenue_growth and shares_outstanding come from
+        the latest period; the capex, depreciation and working-capital ratios average the
+        last `years` periods. wc_ratio is the change in working capital per unit of revenue
+        growth, as the engine uses it. Unavailable items are NaN.
+        """
+        self._refresh()
+        rows = self.index.get(ticker.upper())
+        if rows is None:
+            return None
+        start, stop = max(rows[0], rows[1] - years - 1), rows[1]
+        recent = {name: np.asarray(self.columns[name][start:stop], dtype=float) for name in FIELDS}
+        revenue = recent["revenue"]
+        revenue_change = np.diff(revenue)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "period_end": str(self.columns["period_end"][stop - 1]),
+                "current_revenue": revenue[-1],
+                "revenue_growth": revenue[-1] / revenue[-2] - 1 if revenue.size > 1 else np.nan,
+                "ebitda_margin": recent["ebitda"][-1] / revenue[-1],
+                "capex_ratio": np.nanmean(np.abs(recent["capex"][-years:]) / revenue[-years:]),
+                "depreciation_ratio": np.nanmean(recent["depreciation"][-years:] / revenue[-years:]),
+                "wc_ratio": np.nanmean(recent["wc_change"][1:][-years:] / revenue_change[-years:])
+                if revenue.size > 1 else np.nan,
+                "shares_outstanding": recent["shares_outstanding"][-1],
+            }
+
+    def write(self, frame):
+        """Replace the store with frame (ticker, period_end and FIELDS columns)"""
+        frame = frame.copy()
+        frame["ticker"] = frame["ticker"].astype(str).str.strip().str.upper()
+        frame["period_end"] = pd.to_datetime(frame["period_end"]).values.astype("datetime64[D]")
+        for name in FIELDS:
+            frame[name] = pd.to_numeric(frame[name], errors="coerce") if name in frame else np.nan
+        frame = frame.drop_duplicates(["ticker", "period_end"], keep="last") \
+            .sort_values(["ticker", "period_end"], ignore_index=True)
+
+        os.makedirs(self.path, exist_ok=True)
+        self._refresh()
+        previous = self.version if self.index else None
+        version = 1 if previous is None else previous + 1
+        for name in ("period_end",) + FIELDS:
+            np.save(self._column_path(name, version), frame[name].to_numpy())
+
+        tickers = frame["ticker"].to_numpy()
+        starts = np.flatnonzero(np.r_[True, tickers[1:] != tickers[:-1]]) if len(frame) else np.array([], dtype=int)
+        stops = np.r_[starts[1:], len(frame)] if len(frame) else starts
+        index = {str(tickers[start]): [int(start), int(stop)] for start, stop in zip(starts, stops)}
+        # The index is written last and swapped in atomically, so readers never see it ahead of its columns
+        temporary = os.path.join(self.path, INDEX_FILE + ".tmp")
+        with open(temporary, "w") as f:
+            json.dump({"version": version, "tickers": index}, f)
+        os.replace(temporary, os.path.join(self.path, INDEX_FILE))
+        self._reload()
+
+        if previous is not None:
+            for name in ("period_end",) + FIELDS:
+                try:
+                    os.remove(self._column_path(name, previous))
+                except OSError:
+                    pass
+
+    def to_frame(self):
+        """Every stored row as one DataFrame"""
+        self._refresh()
+        frame = pd.DataFrame({name: np.asarray(self.columns[name]) for name in ("period_end",) + FIELDS})
+        tickers = np.empty(len(frame), dtype=object)
+        for ticker, (start, stop) in self.index.items():
+            tickers[start:stop] = ticker
+        frame.insert(0, "ticker", tickers)
+        return frame
+
+    def append(self, frame):
+        """Add periods not already stored; returns the number of new rows"""
+        existing = self.to_frame() if self.index else pd.DataFrame(columns=("ticker", "period_end") + FIELDS)
+        incoming = frame.copy()
+        incoming["ticker"] = incoming["ticker"].astype(str).str.strip().str.upper()
+        incoming["period_end"] = pd.to_datetime(incoming["period_end"]).values.astype("datetime64[D]")
+        known = pd.MultiIndex.from_frame(existing[["ticker", "period_end"]].astype({"period_end": "datetime64[ns]"}))
+        keys = pd.MultiIndex.from_frame(incoming[["ticker", "period_end"]].astype({"period_end": "datetime64[ns]"}))
+        new_rows = incoming[~keys.isin(known)].drop_duplicates(["ticker", "period_end"], keep="last")
+        if len(new_rows):
+            self.write(pd.concat([existing, new_rows], ignore_index=True))
+        return len(new_rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or extend the local fundamentals store")
+    parser.add_argument("sources", nargs="+", help="CSV or Parquet statement dumps")
+    parser.add_argument("--store", default=DEFAULT_FUNDAMENTALS_DIR)
+    parser.add_argument("--append", action="store_true", help="Keep stored periods and add only new ones")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiplier taking the dump's amounts to whole currency units, e.g. 1e6 for millions")
+    parser.add_argument("--share-scale", type=float, default=1.0,
+                        help="Multiplier taking the dump's share counts to shares, e.g. 1e6 for millions")
+    args = parser.parse_args()
+
+    frame = pd.concat([read_statements(path, args.scale, args.share_scale) for path in args.sources], ignore_index=True)
+    store = FundamentalsStore(args.store)
+    if args.append:
+        print(f"Added {store.append(frame)} new periods")
+    else:
+        store.write(frame)
+        print(f"Stored {len(frame)} periods for {len(store)} tickers in {args.store}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED_STATES = (DONE, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised inside a job's progress callback once the job has been cancelled"""
+
+
+class JobQueue:
+    """In-process worker pool with a job table: submit, poll progress, cancel, fetch results
+
+    Jobs run func(*args, progress=callback, **kwargs). Long-running functions report
+    their completed fraction through the callback, which raises JobCancelled once the
+    job is cancelled. Jobs submitted with a key that matches a queued, running or
+    finished job reattach to it instead of starting again, so a Streamlit rerun picks
+    up the job it started earlier. Submitting with a holder (e.g. a session id) records
+    who is waiting on the job; cancel and release with that holder only let go of the
+    holder's interest, and act on the job once no other holder is left. Callers release
+    a job once they have read its result; the oldest unreleased finished jobs beyond
+    max_finished are dropped.
+    """
+
+    def __init__(self, max_workers=None, max_finished=32):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers or os.cpu_count() or 1)
+        self._jobs = {}
+        self._keys = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.max_finished = max_finished
+
+    def submit(self, func, *args, key=None, holder=None, **kwargs):
+        """Queue func and return its job id, or the id of the live job already holding key"""
+        with self._lock:
+            job_id = self._keys.get(key) if key is not None else None
+            if job_id is not None:
+                job = self._jobs[job_id]
+                if job["state"] not in (FAILED, CANCELLED) and not job["cancel_event"].is_set():
+                    if holder is not None:
+                        job["holders"].add(holder)
+                    return job_id
+
+            job_id = next(self._ids)
+            job = {
+                "id": job_id,
+                "key": key,
+                "state": QUEUED,
+                "progress": 0.0,
+                "result": None,
+                "error": None,
+                "submitted": time.time(),
+                "started": None,
+                "finished": None,
+                "cancel_event": threading.Event(),
+                "holders": set() if holder is None else {holder},
+            }
+            self._jobs[job_id] = job
+            if key is not None:
+                self._keys[key] = job_id
+            job["future"] = self._pool.submit(self._run, job, func, args, kwargs)
+            self._prune()
+        return job_id
+
+    def _run(self, job, func, args, kwargs):
+        if job["cancel_event"].is_set():
+            self._finish(job, CANCELLED)
+            return
+        job["state"], job["started"] = RUNNING, time.time()
+
+        def progress(fraction):
+            if job["cancel_event"].is_set():
+                raise JobCancelled
+            job["progress"] = float(fraction)
+
+        try:
+            result = func(*args, progress=progress, **kwargs)
+        except JobCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+        else:
+            job["progress"] = 1.0
+            self._finish(job, DONE, result=result)
+
+    def _finish(self, job, state, result=None, error=None):
+        with self._lock:
+            job["result"], job["error"] = result, error
+            job["state"], job["finished"] = state, time.time()
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond max_finished; caller holds the lock"""
+        finished = [job for job in self._jobs.values() if job["state"] in FINISHED_STATES]
+        for job in sorted(finished, key=lambda job: job["finished"])[:-self.max_finished or None]:
+            del self._jobs[job["id"]]
+            if self._keys.get(job["key"]) == job["id"]:
+                del self._keys[job["key"]]
+
+    def status(self, job_id):
+        """Snapshot of a job's state, progress, error and elapsed seconds"""
+        job = self._jobs[job_id]
+        end = job["finished"] or time.time()
+        return {
+            "id": job_id,
+            "state": job["state"],
+            "progress": job["progress"],
+            "error": job["error"],
+            "elapsed": end - job["started"] if job["started"] else 0.0,
+        }
+
+    def cancel(self, job_id, holder=None):
+        """Request cancellation; queued jobs never start, running jobs stop at their next progress report
+
+        With a holder, only that holder's interest is dropped, and the job is cancelled
+        only if nobody else holds it. Returns whether cancellation was requested.
+        """
+        with self._lock:
+            job = self._jobs[job_id]
+            job["holders"].discard(holder)
+            if holder is not None and job["holders"]:
+                return False
+            job["cancel_event"].set()
+        if job["future"].cancel():
+            self._finish(job, CANCELLED)
+        return True
+
+    def wait(self, job_id, timeout=None):
+        """Wait up to timeout seconds (None: indefinitely) for a job to finish; returns its status"""
+        job = self._jobs[job_id]
+        wait([job["future"]], timeout=timeout)
+        return self.status(job_id)
+
+    def release(self, job_id, holder=None):
+        """Drop a finished job and its result from the table; a later submit with its key starts afresh
+
+        With a holder, the job stays in the table until its last holder releases it.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] not in FINISHED_STATES:
+                return
+            job["holders"].discard(holder)
+            if holder is not None and job["holders"]:
+                return
+            del self._jobs[job_id]
+            if self._keys.get(job["key"]) == job_id:
+                del self._keys[job["key"]]
+
+    def result(self, job_id, timeout=None):
+        """Wait for a job and return its result; raises for failed or cancelled jobs"""
+        job = self._jobs[job_id]
+        if not job["future"].cancelled():
+            job["future"].result(timeout=timeout)
+        if job["state"] == CANCELLED:
+            raise JobCancelled(f"Job {job_id} was cancelled")
+        if job["state"] == FAILED:
+            raise RuntimeError(job["error"])
+        return job["result"]
+
+    def jobs(self):
+        """Status of every job in the table, oldest first"""
+        with self._lock:
+            job_ids = list(self._jobs)
+        return [self.status(job_id) for job_id in job_ids]
@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PEER_DATASET = os.environ.get(
+    "DCF_PEER_DATASET", os.path.join(os.path.expanduser("~"), ".dcf_valuation", "peers.csv")
+)
+
+# Peer metrics, in the same units as the INDUSTRY_BENCHMARKS values (percentages as 0-100)
+BENCHMARK_METRICS = ("ebitda_margin", "capex_rev", "depreciation_rev", "wc_change_rev",
+                     "beta", "debt_equity", "roe", "roic", "revenue_multiple")
+
+QUARTILES = (0.25, 0.5, 0.75)
+
+
+def read_peers(path):
+    """Peer rows from a CSV or Parquet file: ticker, sector, optional sub_industry and BENCHMARK_METRICS"""
+    frame = pd.read_parquet(path) if path.endswith((".parquet", ".pq")) else pd.read_csv(path)
+    frame.columns = [str(column).strip().lower() for column in frame.columns]
+    for metric in BENCHMARK_METRICS:
+        frame[metric] = pd.to_numeric(frame[metric], errors="coerce") if metric in frame else np.nan
+    return frame
+
+
+class PeerBenchmarks:
+    """Per-group distributions of peer metrics from a local peer dataset
+
+    Groups are the values of the group_by column (sector by default, or sub_industry).
+    Quartiles come from one grouped quantile pass, and each group's sorted metric values
+    are kept so a target can be ranked with a binary search. When the file changes,
+    only groups whose rows changed are recomputed. Groups with fewer than min_peers
+    rows are treated as missing, so callers fall back to their static benchmarks.
+    """
+
+    def __init__(self, path=DEFAULT_PEER_DATASET, group_by="sector", min_peers=5):
+        self.path = path
+        self.group_by = group_by
+        self.min_peers = min_peers
+        self._signature = None
+        self._group_hashes = {}
+        self._distributions = {}
+        self._sorted = {}
+        self.last_recomputed = []
+
+    def _refresh(self):
+        """Reload the dataset if the file changed since the last read"""
+        if not os.path.exists(self.path):
+            self._signature, self._group_hashes, self._distributions, self._sorted = None, {}, {}, {}
+            return
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature != self._signature:
+            self.update(read_peers(self.path))
+            self._signature = signature
+
+    def update(self, frame):
+        """Recompute the distributions of groups whose rows differ from the last update"""
+        frame = frame[frame[self.group_by].notna()].copy()
+        frame[self.group_by] = frame[self.group_by].astype(str)
+        frame = frame.sort_values(self.group_by, kind="stable", ignore_index=True)
+        groups = frame[self.group_by].to_numpy()
+        starts = np.flatnonzero(np.r_[True, groups[1:] != groups[:-1]]) if len(frame) else np.array([], dtype=int)
+        names = groups[starts]
+
+        # Order-insensitive content hash per group: row hashes summed with uint64 wraparound
+        row_hashes = pd.util.hash_pandas_object(frame[[self.group_by] + list(BENCHMARK_METRICS)],
+                                                index=False).to_numpy()
+        group_hashes = dict(zip(names, np.add.reduceat(row_hashes, starts) if len(frame) else []))
+        changed = [name for name in names if self._group_hashes.get(name) != group_hashes[name]]
+        for name in set(self._group_hashes) - set(group_hashes):
+            self._distributions.pop(name, None)
+            self._sorted.pop(name, None)
+        self._group_hashes = group_hashes
+        self.last_recomputed = changed
+        if not changed:
+            return
+
+        subset = frame[frame[self.group_by].isin(changed)]
+        grouped = subset.groupby(self.group_by)[list(BENCHMARK_METRICS)]
+        quantiles = grouped.quantile(list(QUARTILES)).unstack()
+        counts = grouped.count()
+        sizes = subset.groupby(self.group_by).size()
+        for name in changed:
+            self._distributions[name] = pd.DataFrame({
+                "count": counts.loc[name],
+                "q1": quantiles.loc[name].xs(0.25, level=1),
+                "median": quantiles.loc[name].xs(0.5, level=1),
+                "q3": quantiles.loc[name].xs(0.75, level=1),
+            }).rename_axis("metric")
+            self._distributions[name].attrs["peers"] = int(sizes.loc[name])
+
+        # Sorted values per group and metric from one lexsort per metric; NaNs sort last and are cut
+        codes = subset[self.group_by].to_numpy()
+        boundaries = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if len(subset) else []
+        stops = np.r_[boundaries[1:], len(subset)]
+        sorted_values = {name: {} for name in changed}
+        for metric in BENCHMARK_METRICS:
+            values = subset[metric].to_numpy(dtype=float)
+            order = np.lexsort((values, codes))
+            ordered = values[order]
+            for start, stop in zip(boundaries, stops):
+                block = ordered[start:stop]
+                sorted_values[codes[order[start]]][metric] = block[:np.count_nonzero(~np.isnan(block))]
+        self._sorted.update(sorted_values)
+
+    def groups(self):
+        self._refresh()
+        return sorted(name for name in self._distributions if self._covered(name))
+
+    def _covered(self, group):
+        distribution = self._distributions.get(group)
+        return distribution is not None and distribution.attrs["peers"] >= self.min_peers
+
+    def distribution(self, group):
+        """Peer count, quartiles and median per metric for group, or None if not covered"""
+        self._refresh()
+        return self._distributions[group] if self._covered(group) else None
+
+    def medians(self, group):
+        """{metric: median} for the metrics the group has data for; empty if not covered"""
+        distribution = self.distribution(group)
+        if distribution is None:
+            return {}
+        medians = distribution["median"]
+        return {metric: float(value) for metric, value in medians.items() if np.isfinite(value)}
+
+    def percentile_rank(self, group, metric, values):
+        """Percentile (0-100) of values among the group's peers, ties counted half; NaN if unavailable"""
+        values = np.asarray(values, dtype=float)
+        peers = self._sorted.get(group, {}).get(metric) if self.distribution(group) is not None else None
+        if peers is None or peers.size == 0:
+            return np.full(values.shape, np.nan)[()]
+        below = np.searchsorted(peers, values, side="left")
+        at_or_below = np.searchsorted(peers, values, side="right")
+        ranks = (below + at_or_below) / 2 / peers.size * 100
+        return np.where(np.isnan(values), np.nan, ranks)[()]
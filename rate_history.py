@@ -0,0 +1,202 @@
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_RATE_HISTORY_DIR = os.environ.get(
+    "DCF_RATE_HISTORY_DIR", os.path.join(os.path.expanduser("~"), ".dcf_valuation", "rates")
+)
+
+# Government bond tenors and their maturity in years
+TENORS = {"3M": 0.25, "6M": 0.5, "1Y": 1, "2Y": 2, "3Y": 3, "5Y": 5, "7Y": 7, "10Y": 10, "20Y": 20, "30Y": 30}
+
+# One packed 10-byte record per observation: days since 1970-01-01, series id, yield in % (float32, read back to 4 dp)
+RECORD = np.dtype([("day", "<i4"), ("series", "<u2"), ("rate", "<f4")])
+
+RECORDS_FILE = "yields.bin"
+SERIES_FILE = "series.json"
+
+
+def _days(dates):
+    return pd.to_datetime(pd.Index(dates)).values.astype("datetime64[D]").astype(np.int64)
+
+
+class RateHistory:
+    """Yield history per country and tenor in one compact binary file
+
+    Observations are packed RECORD rows appended to yields.bin; series.json maps
+    "Country/Tenor" to the series id. Observations newer than a series' last stored
+    date are appended, and reads pick up only the bytes added since the last read, so
+    routine refreshes never rescan or rewrite the history. Older dates missing from a
+    series are merged in by rewriting the file once, sorted and deduplicated on
+    (series, day); dates already stored keep their stored rate.
+    """
+
+    def __init__(self, path=DEFAULT_RATE_HISTORY_DIR):
+        self.path = path
+        self._lock = threading.RLock()
+        self._series_ids = {}
+        self._records = np.empty(0, dtype=RECORD)
+        self._loaded_bytes = 0
+        self._loaded_file = None
+        self._by_series = None
+
+    def _records_path(self):
+        return os.path.join(self.path, RECORDS_FILE)
+
+    def _load(self):
+        """Read series ids and any records appended since the last read"""
+        series_path = os.path.join(self.path, SERIES_FILE)
+        if os.path.exists(series_path):
+            with open(series_path) as f:
+                self._series_ids = json.load(f)
+        records_path = self._records_path()
+        stat = os.stat(records_path) if os.path.exists(records_path) else None
+        size = stat.st_size if stat else 0
+        size -= size % RECORD.itemsize  # Ignore a record still being written by another process
+        file_id = (stat.st_dev, stat.st_ino) if stat else None
+        if file_id != self._loaded_file or size < self._loaded_bytes:
+            # File was rewritten with back-filled dates, so earlier offsets no longer hold
+            self._records, self._loaded_bytes, self._loaded_file = np.empty(0, dtype=RECORD), 0, file_id
+            self._by_series = None
+        if size > self._loaded_bytes:
+            added = np.fromfile(records_path, dtype=RECORD, count=(size - self._loaded_bytes) // RECORD.itemsize,
+                                offset=self._loaded_bytes)
+            self._records = np.concatenate([self._records, added])
+            self._loaded_bytes = size
+            self._by_series = None
+
+    def _series(self):
+        """{series id: (days, rates)} sorted by date, rebuilt only after new records arrive"""
+        if self._by_series is None:
+            order = np.lexsort((self._records["day"], self._records["series"]))
+            records = self._records[order]
+            ids, starts = np.unique(records["series"], return_index=True)
+            stops = np.r_[starts[1:], len(records)]
+            self._by_series = {int(series): (records["day"][start:stop],
+                                                 np.round(records["rate"][start:stop].astype(float), 4))
+                               for series, start, stop in zip(ids, starts, stops)}
+        return self._by_series
+
+    def _observations(self, country, tenor):
+        with self._lock:
+            self._load()
+            series = self._series_ids.get(f"{country}/{tenor}")
+            return self._series().get(series, (np.empty(0, dtype=np.int32), np.empty(0)))
+
+    def _rewrite(self, records):
+        """Replace yields.bin with records sorted by series and day; caller holds the lock"""
+        records = records[np.lexsort((records["day"], records["series"]))]
+        temporary = self._records_path() + ".tmp"
+        records.tofile(temporary)
+        os.replace(temporary, self._records_path())
+        stat = os.stat(self._records_path())
+        self._records, self._loaded_bytes = records, stat.st_size
+        self._loaded_file = (stat.st_dev, stat.st_ino)
+        self._by_series = None
+
+    def append(self, country, tenor, dates, rates):
+        """Store observations for dates the series does not have yet; returns how many were new
+
+        Newer dates are appended; older ones trigger a one-off rewrite that merges them in.
+        """
+        if tenor not in TENORS:
+            raise ValueError(f"Unknown tenor {tenor!r}; use one of {', '.join(TENORS)}")
+        days = _days(dates)
+        rates = np.asarray(rates, dtype=float)
+        with self._lock:
+            self._load()
+            key = f"{country}/{tenor}"
+            if key not in self._series_ids:
+                os.makedirs(self.path, exist_ok=True)
+                self._series_ids[key] = len(self._series_ids)
+                temporary = os.path.join(self.path, SERIES_FILE + ".tmp")
+                with open(temporary, "w") as f:
+                    json.dump(self._series_ids, f)
+                os.replace(temporary, os.path.join(self.path, SERIES_FILE))
+            stored_days, _ = self._series().get(self._series_ids[key], (np.empty(0, dtype=np.int32), None))
+
+            valid = np.isfinite(rates)
+            days, index = np.unique(days[valid], return_index=True)
+            rates = rates[valid][index]
+            fresh = ~np.isin(days, stored_days)
+            records = np.empty(int(fresh.sum()), dtype=RECORD)
+            records["day"], records["series"], records["rate"] = days[fresh], self._series_ids[key], rates[fresh]
+            if not records.size:
+                return 0
+            if stored_days.size and records["day"][0] < stored_days[-1]:
+                self._rewrite(np.concatenate([self._records, records]))
+            else:
+                with open(self._records_path(), "ab") as f:
+                    f.write(records.tobytes())
+            return int(records.size)
+
+    def tenors(self, country):
+        """Stored tenors for a country, shortest first"""
+        with self._lock:
+            self._load()
+            stored = [key.split("/", 1)[1] for key in self._series_ids if key.split("/", 1)[0] == country]
+        return sorted(stored, key=TENORS.get)
+
+    def series(self, country, tenor):
+        """The stored yield history (%) as a date-indexed Series"""
+        days, rates = self._observations(country, tenor)
+        return pd.Series(rates, index=pd.DatetimeIndex(days.astype("datetime64[D]"), name="date"), name=tenor)
+
+    def latest(self, country, tenor):
+        """(date, yield %) of the most recent observation, or None"""
+        days, rates = self._observations(country, tenor)
+        if not days.size:
+            return None
+        return pd.Timestamp(days[-1].astype("datetime64[D]")), float(rates[-1])
+
+    def smoothed(self, country, tenor, days=30, method="mean"):
+        """Average yield (%) over the last `days` calendar days of observations, or None
+
+        method "mean" is the simple average; "ewm" weights observations exponentially
+        with a half-life of days / 4.
+        """
+        observed, rates = self._observations(country, tenor)
+        if not observed.size:
+            return None
+        recent = observed > observed[-1] - days
+        if method == "ewm":
+            weights = 0.5 ** ((observed[-1] - observed[recent]) / (days / 4))
+            return float(np.average(rates[recent], weights=weights))
+        return float(rates[recent].mean())
+
+    def curve(self, country):
+        """Latest yield (%) per stored tenor, indexed by maturity in years"""
+        points = {TENORS[tenor]: self.latest(country, tenor)[1] for tenor in self.tenors(country)}
+        return pd.Series(points, dtype=float).sort_index()
+
+    def matched_rate(self, country, horizon_years):
+        """Yield (%) at the horizon, interpolated linearly on the latest curve and flat beyond its ends"""
+        curve = self.curve(country)
+        if curve.empty:
+            return None
+        return float(np.interp(horizon_years, curve.index.to_numpy(dtype=float), curve.to_numpy()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Append yield observations to the local rate history")
+    parser.add_argument("sources", nargs="+", help="CSV or Parquet files with date, country, tenor and rate (%%) columns")
+    parser.add_argument("--store", default=DEFAULT_RATE_HISTORY_DIR)
+    args = parser.parse_args()
+
+    history = RateHistory(args.store)
+    for source in args.sources:
+        frame = pd.read_parquet(source) if source.endswith((".parquet", ".pq")) else pd.read_csv(source)
+        frame.columns = [str(column).strip().lower() for column in frame.columns]
+        added = sum(history.append(country, tenor, group["date"], group["rate"])
+                    for (country, tenor), group in frame.groupby(["country", "tenor"]))
+        skipped = len(frame) - added
+        print(f"{source}: added {added} new observations"
+              + (f", skipped {skipped} already stored, duplicated or missing" if skipped else ""))
+
+
+if __name__ == "__main__":
+    main()
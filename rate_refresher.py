@@ -0,0 +1,73 @@
+import threading
+from datetime import date, datetime
+
+from rate_sources import RateUnavailable
+
+
+class RateRefresher:
+    """Background thread that keeps each country's 10Y yield fresh
+
+    Every interval seconds it fetches every country through the hedged fetcher, keeps
+    the result in memory for latest() and appends it to the rate history (one
+    observation per day). A country whose fetch failed is retried after
+    retry_interval instead of a full interval; its last good rate is kept meanwhile.
+    """
+
+    def __init__(self, fetcher, history, countries, interval=3600, retry_interval=300):
+        self.fetcher = fetcher
+        self.history = history
+        self.countries = list(countries)
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self._rates = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="rate-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            results = self.refresh()
+            failed = any(rate is None for rate in results.values())
+            self._stop.wait(self.retry_interval if failed else self.interval)
+
+    def refresh(self, countries=None):
+        """Fetch the given (default: all) countries once; returns {country: rate or None}"""
+        results = {}
+        for country in countries or self.countries:
+            try:
+                rate, source = self.fetcher.fetch(country)
+            except RateUnavailable as e:
+                with self._lock:
+                    self._errors[country] = str(e)
+                results[country] = None
+                continue
+            with self._lock:
+                self._rates[country] = {"rate": rate, "source": source, "fetched_at": datetime.now()}
+                self._errors.pop(country, None)
+            try:
+                self.history.append(country, "10Y", [date.today()], [rate])
+            except OSError:
+                pass  # The history is optional; the in-memory rate still serves
+            results[country] = rate
+        return results
+
+    def latest(self, country):
+        """{"rate", "source", "fetched_at"} from the last successful fetch, or None"""
+        with self._lock:
+            return self._rates.get(country)
+
+    def status(self):
+        """Per country: last rate, source and fetch time, and the last error if the latest pass failed"""
+        with self._lock:
+            return {country: {**self._rates.get(country, {}), "error": self._errors.get(country)}
+                    for country in self.countries}
@@ -0,0 +1,205 @@
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import numpy as np
+import requests
+from bs4 import BeautifulSoup
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) '
+              'Chrome/91.0.4472.124 Safari/537.36')
+
+# Yields (%) outside this range are treated as a parsing error rather than a rate
+VALID_RATE_RANGE = (-5.0, 40.0)
+
+
+class RateUnavailable(Exception):
+    """No source returned a valid rate in time"""
+
+
+class FetchCancelled(Exception):
+    """Another source answered first"""
+
+
+def _download(url, timeout, cancel):
+    """Body of url, checking cancel between chunks so a request that lost the race stops early"""
+    with requests.get(url, headers={"User-Agent": USER_AGENT}, timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        chunks = []
+        for chunk in response.iter_content(16384):
+            if cancel.is_set():
+                raise FetchCancelled()
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+
+class TradingEconomicsSource:
+    """10Y government bond yield scraped from the tradingeconomics.com country page"""
+
+    name = "tradingeconomics"
+    PATHS = {
+        "India": "/india/government-bond-yield",
+        "USA": "/united-states/government-bond-yield",
+        "UK": "/united-kingdom/government-bond-yield",
+        "Germany": "/germany/government-bond-yield",
+        "France": "/france/government-bond-yield",
+    }
+
+    def __init__(self, base_url="https://tradingeconomics.com"):
+        self.base_url = base_url
+
+    def supports(self, country):
+        return country in self.PATHS
+
+    def fetch(self, country, timeout, cancel):
+        soup = BeautifulSoup(_download(self.base_url + self.PATHS[country], timeout, cancel), 'html.parser')
+        rate_element = soup.find('span', {'id': 'p_cur_val'}) or soup.find('div', {'class': 'col-xs-6 col-sm-4 col-md-4 col-lg-3'})
+        rate_match = re.search(r'(-?\d+\.?\d*)', rate_element.get_text()) if rate_element else None
+        if rate_match is None:
+            raise ValueError("Yield not found on the page")
+        return float(rate_match.group(1))
+
+
+class StooqSource:
+    """10Y government bond yield from the stooq.com quote CSV"""
+
+    name = "stooq"
+    SYMBOLS = {"India": "10iny.b", "USA": "10usy.b", "UK": "10uky.b", "Germany": "10dey.b", "France": "10fry.b"}
+
+    def __init__(self, base_url="https://stooq.com"):
+        self.base_url = base_url
+
+    def supports(self, country):
+        return country in self.SYMBOLS
+
+    def fetch(self, country, timeout, cancel):
+        url = f"{self.base_url}/q/l/?s={self.SYMBOLS[country]}&f=sd2t2ohlc&h&e=csv"
+        header, row = _download(url, timeout, cancel).decode().strip().splitlines()[:2]
+        return float(dict(zip(header.lower().split(","), row.split(",")))["close"])
+
+
+def default_sources():
+    """The public 10Y yield sources, in the order they are tried"""
+    return [TradingEconomicsSource(), StooqSource()]
+
+
+class HedgedRateFetcher:
+    """Fetch a rate from several sources, hedging slow ones, with per-source circuit breakers
+
+    Sources are tried in order. If the current one has not answered within the hedge
+    delay, the next starts as well, and a failure starts the next at once. The first
+    valid rate wins and the remaining requests are cancelled (they stop at their next
+    read). Once a source has enough history, the hedge delay is its 95th-percentile
+    latency, clipped to [min_hedge_delay, hedge_delay]. A source that fails
+    failure_threshold times in a row is skipped for cooldown seconds, then tried again.
+    """
+
+    def __init__(self, sources, hedge_delay=1.0, min_hedge_delay=0.2, timeout=10.0,
+                 failure_threshold=3, cooldown=300.0):
+        self.sources = list(sources)
+        self.hedge_delay = hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._health = {source.name: {"latencies": deque(maxlen=200), "successes": 0, "failures": 0,
+                                      "consecutive_failures": 0, "open_until": 0.0, "last_error": None}
+                        for source in self.sources}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=4 * max(len(self.sources), 1), thread_name_prefix="rate-fetch")
+
+    def fetch(self, country):
+        """(rate, source name) from the first source to return a valid rate; raises RateUnavailable"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [source for source in self.sources
+                          if source.supports(country) and self._health[source.name]["open_until"] <= now]
+        if not candidates:
+            raise RateUnavailable(f"No rate source available for {country}")
+
+        cancel = threading.Event()
+        deadline = now + self.timeout
+        pending = {}
+        errors = []
+        try:
+            while True:
+                now = time.monotonic()
+                if candidates and (not pending or now >= hedge_at):
+                    source = candidates.pop(0)
+                    pending[self._pool.submit(self._attempt, source, country, cancel)] = source
+                    hedge_at = now + self._hedge_delay(source)
+                if not pending:
+                    raise RateUnavailable(f"All rate sources failed for {country}: {'; '.join(errors)}")
+                if now >= deadline:
+                    for source in pending.values():
+                        self._record(source.name, None, TimeoutError(f"No answer within {self.timeout:.0f}s"))
+                    raise RateUnavailable(f"No rate for {country} within {self.timeout:.0f}s")
+
+                wake = min(deadline, hedge_at) if candidates else deadline
+                done, _ = wait(pending, timeout=max(wake - now, 0), return_when=FIRST_COMPLETED)
+                for future in done:
+                    source = pending.pop(future)
+                    try:
+                        return future.result(), source.name
+                    except Exception as e:
+                        errors.append(f"{source.name}: {type(e).__name__}: {e}")
+                        hedge_at = now  # Start the next source without waiting out the delay
+        finally:
+            cancel.set()
+            for future in pending:
+                future.cancel()
+
+    def _attempt(self, source, country, cancel):
+        started = time.monotonic()
+        try:
+            rate = float(source.fetch(country, self.timeout, cancel))
+            if not (np.isfinite(rate) and VALID_RATE_RANGE[0] <= rate <= VALID_RATE_RANGE[1]):
+                raise ValueError(f"Implausible rate {rate}")
+        except Exception as e:
+            if not cancel.is_set():  # Losing the race is not the source's fault
+                self._record(source.name, None, e)
+            raise
+        if not cancel.is_set():  # Past the deadline this attempt was already recorded as a timeout
+            self._record(source.name, time.monotonic() - started, None)
+        return rate
+
+    def _record(self, name, latency, error):
+        with self._lock:
+            health = self._health[name]
+            if error is None:
+                health["latencies"].append(latency)
+                health["successes"] += 1
+                health["consecutive_failures"] = 0
+                health["open_until"] = 0.0
+            else:
+                health["failures"] += 1
+                health["consecutive_failures"] += 1
+                health["last_error"] = f"{type(error).__name__}: {error}"
+                if health["consecutive_failures"] >= self.failure_threshold:
+                    health["open_until"] = time.monotonic() + self.cooldown
+
+    def _hedge_delay(self, source):
+        with self._lock:
+            latencies = list(self._health[source.name]["latencies"])
+        if len(latencies) < 10:
+            return self.hedge_delay
+        return float(np.clip(np.percentile(latencies, 95), self.min_hedge_delay, self.hedge_delay))
+
+    def stats(self):
+        """Per-source circuit state, success and failure counts and latency percentiles (ms)"""
+        now = time.monotonic()
+        with self._lock:
+            stats = {}
+            for name, health in self._health.items():
+                latencies = np.array(health["latencies"]) * 1000
+                stats[name] = {
+                    "state": "open" if health["open_until"] > now else "closed",
+                    "successes": health["successes"],
+                    "failures": health["failures"],
+                    "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+                    "p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+                    "last_error": health["last_error"],
+                }
+            return stats
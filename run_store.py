@@ -0,0 +1,185 @@
+import hashlib
+import io
+import json
+import os
+import sqlite3
+import time
+import zipfile
+from contextlib import closing
+from datetime import date, datetime
+from numbers import Real
+
+import numpy as np
+
+from dcf_engine import ENGINE_VERSION
+
+DEFAULT_STORE_PATH = os.environ.get(
+    "DCF_RUN_STORE", os.path.join(os.path.expanduser("~"), ".dcf_valuation", "runs.sqlite")
+)
+
+# Least recently used runs are evicted once the stored payloads exceed this size
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+def _canonical(value):
+    """JSON-ready form of an input value that is identical for equal inputs"""
+    if isinstance(value, dict):
+        return {str(name): _canonical(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_canonical(item) for item in np.asarray(value).tolist()]
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, np.bool_):
+        return bool(value)
+    if isinstance(value, Real):
+        # 5 and 5.0 hash alike, as do -0.0 and 0.0
+        return repr(float(value) + 0.0)
+    raise TypeError(f"Cannot hash input of type {type(value).__name__}")
+
+
+def canonical_hash(inputs, version=ENGINE_VERSION):
+    """SHA-256 content address of a set of valuation inputs and the engine version"""
+    document = json.dumps({"engine_version": version, "inputs": _canonical(inputs)},
+                          sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(document.encode()).hexdigest()
+
+
+def _encode(run):
+    """npz bytes for a run: arrays as npz members, everything else in a JSON document
+
+    Runs are read back with np.load(allow_pickle=False), so a tampered store file
+    cannot execute code. Supports dicts, lists, tuples, numeric arrays, numbers,
+    strings, booleans, None and dates.
+    """
+    arrays = {}
+
+    def encode(value):
+        if isinstance(value, np.ndarray):
+            if value.dtype.hasobject:
+                raise TypeError("Object arrays cannot be stored")
+            name = f"a{len(arrays)}"
+            arrays[name] = value
+            return {"__array__": name}
+        if isinstance(value, dict):
+            if all(isinstance(key, str) for key in value):
+                return {"__dict__": {key: encode(item) for key, item in value.items()}}
+            return {"__items__": [[encode(key), encode(item)] for key, item in value.items()]}
+        if isinstance(value, (list, tuple)):
+            return [encode(item) for item in value]
+        if isinstance(value, datetime):
+            return {"__datetime__": value.isoformat()}
+        if isinstance(value, date):
+            return {"__date__": value.isoformat()}
+        if isinstance(value, np.generic):
+            return value.item()
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        raise TypeError(f"Cannot store value of type {type(value).__name__}")
+
+    document = json.dumps(encode(run)).encode()
+    buffer = io.BytesIO()
+    np.savez(buffer, __run__=np.frombuffer(document, dtype=np.uint8), **arrays)
+    return buffer.getvalue()
+
+
+def _decode(payload, fields=None):
+    """Inverse of _encode; with fields, only those top-level entries are read"""
+    with np.load(io.BytesIO(payload), allow_pickle=False) as members:
+        def decode(value):
+            if isinstance(value, list):
+                return [decode(item) for item in value]
+            if not isinstance(value, dict):
+                return value
+            if "__array__" in value:
+                return members[value["__array__"]]  # npz members are read on access
+            if "__dict__" in value:
+                return {key: decode(item) for key, item in value["__dict__"].items()}
+            if "__items__" in value:
+                return {decode(key): decode(item) for key, item in value["__items__"]}
+            if "__datetime__" in value:
+                return datetime.fromisoformat(value["__datetime__"])
+            return date.fromisoformat(value["__date__"])
+
+        document = json.loads(members["__run__"].tobytes())
+        if fields is not None:
+            document = {"__dict__": {name: item for name, item in document["__dict__"].items() if name in fields}}
+        return decode(document)
+
+
+class RunStore:
+    """Persistent SQLite store of completed valuation runs keyed by canonical_hash
+
+    A run is a dict of arrays, numbers, strings and nested dicts / lists (inputs,
+    projections, values, simulation output, sensitivity grid), stored in npz form (see
+    _encode) rather than pickled. Runs from other engine versions are dropped when the
+    store is opened. Every call opens its own connection, so one store can be shared
+    across Streamlit sessions and worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                "key TEXT PRIMARY KEY, engine_version TEXT, created REAL, accessed REAL, "
+                "size INTEGER, payload BLOB)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS runs_accessed ON runs (accessed)")
+            conn.execute("DELETE FROM runs WHERE engine_version IS NOT ?", (ENGINE_VERSION,))
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key, fields=None):
+        """Stored run for key, or None; with fields, only those entries are loaded"""
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute("SELECT payload FROM runs WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE runs SET accessed = ? WHERE key = ?", (time.time(), key))
+        try:
+            return _decode(row[0], fields)
+        except (ValueError, KeyError, OSError, zipfile.BadZipFile):
+            return None  # Unreadable payload (e.g. written by an older release); treated as a miss
+
+    def put(self, key, run):
+        """Store a run under key, then evict down to max_bytes"""
+        payload = _encode(run)
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (key, ENGINE_VERSION, now, now, len(payload), payload),
+            )
+        self.evict()
+
+    def evict(self, max_bytes=None):
+        """Drop least recently used runs until the store fits in max_bytes; returns the count dropped"""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with closing(self._connect()) as conn, conn:
+            total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM runs").fetchone()[0]
+            dropped = []
+            for key, size in conn.execute("SELECT key, size FROM runs ORDER BY accessed"):
+                if total <= max_bytes:
+                    break
+                dropped.append((key,))
+                total -= size
+            conn.executemany("DELETE FROM runs WHERE key = ?", dropped)
+        return len(dropped)
+
+    def size_bytes(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM runs").fetchone()[0]
+
+    def __contains__(self, key):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM runs WHERE key = ?", (key,)).fetchone() is not None
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
@@ -0,0 +1,123 @@
+import atexit
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from array_store import MB
+
+
+class SharedResultCache:
+    """Process-wide read-only cache of result arrays in shared memory, shared by every session
+
+    Each entry is a dict of arrays computed once for a content key (see
+    run_store.canonical_hash) and published into shared memory blocks; every session
+    that asks for the same key gets read-only views of the same blocks. Holders
+    (sessions) are reference counted per key, and only entries nobody holds are evicted,
+    least recently used first, once the cache exceeds max_bytes. Holders not seen for
+    holder_ttl seconds are released automatically.
+    """
+
+    def __init__(self, max_bytes=512 * MB, holder_ttl=3600):
+        self.max_bytes = max_bytes
+        self.holder_ttl = holder_ttl
+        self._entries = OrderedDict()
+        self._last_seen = {}
+        self._lock = threading.Lock()
+        atexit.register(self.close)
+
+    def get(self, key, holder):
+        """Shared read-only arrays for key, taking a reference for holder; None if absent"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._hold(key, entry, holder)
+            return dict(entry["arrays"])
+
+    def publish(self, key, holder, arrays):
+        """Copy arrays into shared memory under key once, and return the shared views
+
+        If another session published the same key first, its arrays are returned instead.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = {"blocks": [], "arrays": {}, "nbytes": 0, "holders": set()}
+                for name, array in arrays.items():
+                    array = np.ascontiguousarray(array)
+                    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+                    view = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+                    view[...] = array
+                    view.flags.writeable = False
+                    entry["blocks"].append(block)
+                    entry["arrays"][name] = view
+                    entry["nbytes"] += array.nbytes
+                self._entries[key] = entry
+            self._hold(key, entry, holder)
+            self._evict()
+            return dict(entry["arrays"])
+
+    def release(self, key, holder):
+        """Drop holder's reference to key; the entry stays cached until evicted"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry["holders"].discard(holder)
+
+    def release_holder(self, holder):
+        """Drop every reference held by holder"""
+        with self._lock:
+            self._release_holder(holder)
+
+    def stats(self):
+        """Entry count, shared bytes and number of holders per key"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(entry["nbytes"] for entry in self._entries.values()),
+                "holders": {key: len(entry["holders"]) for key, entry in self._entries.items()},
+            }
+
+    def close(self):
+        """Free every shared memory block, held or not"""
+        with self._lock:
+            while self._entries:
+                self._free(self._entries.popitem()[1])
+
+    def _hold(self, key, entry, holder):
+        entry["holders"].add(holder)
+        self._entries.move_to_end(key)
+        now = time.time()
+        self._last_seen[holder] = now
+        for stale in [h for h, seen in self._last_seen.items() if seen < now - self.holder_ttl]:
+            self._release_holder(stale)
+
+    def _release_holder(self, holder):
+        for entry in self._entries.values():
+            entry["holders"].discard(holder)
+        self._last_seen.pop(holder, None)
+
+    def _evict(self):
+        total = sum(entry["nbytes"] for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.max_bytes:
+                break
+            entry = self._entries[key]
+            if entry["holders"]:
+                continue
+            del self._entries[key]
+            total -= entry["nbytes"]
+            self._free(entry)
+
+    @staticmethod
+    def _free(entry):
+        entry["arrays"].clear()
+        for block in entry["blocks"]:
+            try:
+                block.close()
+            except BufferError:
+                pass  # A caller still has a view; the mapping goes when that view is collected
+            block.unlink()
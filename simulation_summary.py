@@ -0,0 +1,85 @@
+import numpy as np
+from functools import cached_property
+
+
+class SimulationSummary:
+    """Lazily computed statistics over an array of simulated values per share"""
+
+    PERCENTILE_LEVELS = (10, 25, 50, 75, 90)
+
+    def __init__(self, values, hist_bins=50):
+        self.values = np.asarray(values, dtype=float).ravel()
+        self.hist_bins = hist_bins
+
+    def __len__(self):
+        return self.values.size
+
+    def __bool__(self):
+        return self.values.size > 0
+
+    def trimmed(self, num_std=3):
+        """Return a new summary without values beyond num_std standard deviations of the mean"""
+        if not self:
+            return self
+        keep = np.abs(self.values - self.mean) <= num_std * self.std
+        return SimulationSummary(self.values[keep], hist_bins=self.hist_bins)
+
+    @cached_property
+    def count(self):
+        return self.values.size
+
+    @cached_property
+    def mean(self):
+        return float(np.mean(self.values))
+
+    @cached_property
+    def std(self):
+        return float(np.std(self.values))
+
+    @cached_property
+    def cv(self):
+        return self.std / self.mean if self.mean != 0 else np.nan
+
+    @cached_property
+    def sorted_values(self):
+        return np.sort(self.values)
+
+    @cached_property
+    def percentiles(self):
+        """Values at PERCENTILE_LEVELS (10th, 25th, 50th, 75th, 90th)"""
+        return self.percentile(self.PERCENTILE_LEVELS)
+
+    @cached_property
+    def median(self):
+        return float(self.percentiles[2])
+
+    def percentile(self, q):
+        """Percentile(s) read from the cached sorted array"""
+        return np.percentile(self.sorted_values, q)
+
+    @cached_property
+    def percentile_table(self):
+        """Mapping of percentile level to value"""
+        return dict(zip(self.PERCENTILE_LEVELS, self.percentiles))
+
+    @cached_property
+    def prob_positive(self):
+        return float(np.count_nonzero(self.values > 0) / self.count) if self else 0.0
+
+    @cached_property
+    def ci_95(self):
+        return self.percentile([2.5, 97.5])
+
+    @cached_property
+    def ci_95_coverage(self):
+        """Share of values falling inside the 95% confidence interval"""
+        if not self:
+            return 0.0
+        lo = np.searchsorted(self.sorted_values, self.ci_95[0], side='left')
+        hi = np.searchsorted(self.sorted_values, self.ci_95[1], side='right')
+        return float((hi - lo) / self.count)
+
+    @cached_property
+    def histogram(self):
+        """Histogram counts and bin edges"""
+        return np.histogram(self.values, bins=self.hist_bins)
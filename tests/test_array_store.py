@@ -0,0 +1,52 @@
+import os
+
+import numpy as np
+
+from array_store import ArrayStore
+
+
+def test_small_arrays_stay_in_memory_and_large_ones_spill(tmp_path):
+    store = ArrayStore(spill_threshold=1000, spill_dir=str(tmp_path))
+    small = store.put("s", "small", np.arange(10.0))
+    large = store.put("s", "large", np.arange(200.0))
+    assert not isinstance(small, np.memmap)
+    assert isinstance(large, np.memmap) and not large.flags.writeable
+    np.testing.assert_array_equal(store.get("s", "large"), np.arange(200.0))
+    assert store.usage()["sessions"]["s"] == {"memory": 80, "disk": 1600}
+
+
+def test_session_budget_spills_least_recently_used(tmp_path):
+    store = ArrayStore(session_budget=2000, spill_threshold=10_000, spill_dir=str(tmp_path))
+    store.put("s", "a", np.zeros(100))
+    store.put("s", "b", np.ones(100))
+    store.get("s", "a")  # b is now the least recently used
+    store.put("s", "c", np.full(100, 2.0))
+    assert isinstance(store.get("s", "b"), np.memmap)
+    assert not isinstance(store.get("s", "a"), np.memmap)
+    np.testing.assert_array_equal(store.get("s", "b"), np.ones(100))
+    assert store.usage()["memory"] <= 2000
+
+
+def test_release_deletes_spill_files(tmp_path):
+    store = ArrayStore(spill_threshold=100, spill_dir=str(tmp_path))
+    store.put("s", "a", np.zeros(100))
+    store.put("t", "a", np.zeros(100))
+    store.release("s")
+    assert store.get("s", "a") is None
+    assert len(os.listdir(tmp_path)) == 1
+
+
+def test_shared_spill_file_outlives_all_but_its_last_holder(tmp_path):
+    store = ArrayStore(spill_dir=str(tmp_path))
+    path = store.reserve("s", "cube", store.spill_path("shared"))
+    assert store.reserve("t", "cube", path) == path
+    assert store.get("s", "cube") is None
+    np.save(path, np.arange(5.0))
+    store.adopt("s", "cube", path)
+    store.adopt("t", "cube", path)
+
+    store.discard("s", "cube")
+    assert os.path.exists(path)
+    np.testing.assert_array_equal(store.get("t", "cube"), np.arange(5.0))
+    store.discard("t", "cube")
+    assert not os.path.exists(path)
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from dcf_engine import value_from_inputs, value_with_greeks
+
+BASE = {
+    "current_revenue": 1000.0,
+    "revenue_growth": [0.10, 0.08, 0.06, 0.05, 0.04],
+    "ebitda_margin": [0.20, 0.21, 0.22, 0.22, 0.22],
+    "capex_ratio": 0.05,
+    "depreciation_ratio": 0.03,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.25,
+    "wacc": 0.10,
+    "terminal_growth": 0.03,
+    "net_debt": 100.0,
+    "shares_outstanding": 10.0,
+}
+
+SCALARS = ("wacc", "terminal_growth", "capex_ratio", "depreciation_ratio", "wc_ratio", "tax_rate",
+           "current_revenue", "net_debt", "shares_outstanding")
+
+
+def finite_difference(inputs, name, output, step=1e-6):
+    """Central difference of an output w.r.t. a scalar input"""
+    value = inputs[name]
+    h = step * max(abs(value), 1.0)
+    up = value_from_inputs({**inputs, name: value + h})[output]
+    down = value_from_inputs({**inputs, name: value - h})[output]
+    return (up - down) / (2 * h)
+
+
+@pytest.mark.parametrize("stages", [
+    {},
+    {"high_growth_years": 5, "fade_years": 4},  # high_growth defaults to terminal_growth
+    {"high_growth": 0.08, "high_growth_years": 5, "fade_years": 4},
+    {"high_growth_years": 3, "fade_years": 10, "periods_per_year": 4},
+])
+@pytest.mark.parametrize("output", ["enterprise_value", "value_per_share"])
+def test_greeks_match_finite_differences(stages, output):
+    inputs = {**BASE, **stages}
+    if stages.get("periods_per_year", 1) > 1:
+        periods = 5 * stages["periods_per_year"]
+        inputs["revenue_growth"] = np.full(periods, 0.015)
+        inputs["ebitda_margin"] = np.full(periods, 0.2)
+    greeks = value_with_greeks(inputs)["greeks"][output]
+    for name in SCALARS:
+        expected = finite_difference(inputs, name, output)
+        assert greeks[name] == pytest.approx(expected, rel=1e-5, abs=1e-6), name
+
+
+def test_terminal_growth_greek_includes_aliased_high_growth():
+    inputs = {**BASE, "high_growth_years": 5, "fade_years": 4}
+    aliased = value_with_greeks(inputs)["greeks"]["enterprise_value"]["terminal_growth"]
+    fixed = value_with_greeks({**inputs, "high_growth": inputs["terminal_growth"]})["greeks"]["enterprise_value"]
+    # Same valuation, but only the aliased case moves the high-growth stage with terminal growth
+    assert aliased > fixed["terminal_growth"]
+    assert aliased == pytest.approx(finite_difference(inputs, "terminal_growth", "enterprise_value"), rel=1e-5)
@@ -0,0 +1,34 @@
+import numpy as np
+
+from dcf_sensitivity import greeks_table, tornado_analysis
+
+INPUTS = {
+    "current_revenue": 250.0,
+    "revenue_growth": np.full(8, 0.02),
+    "ebitda_margin": np.full(8, 0.2),
+    "capex_ratio": 0.05,
+    "depreciation_ratio": 0.03,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.25,
+    "risk_free_rate": 0.07,
+    "beta": 1.1,
+    "market_risk_premium": 0.06,
+    "cost_of_debt": 0.08,
+    "equity_ratio": 0.7,
+    "terminal_growth": 0.03,
+    "net_debt": 100.0,
+    "shares_outstanding": 10.0,
+    "periods_per_year": 4,
+}
+
+
+def test_per_period_drivers_are_labelled_by_year_and_quarter():
+    for table in (tornado_analysis(INPUTS), greeks_table(INPUTS)):
+        labels = set(table["input"])
+        assert {"Revenue Growth Y1 Q1", "Revenue Growth Y2 Q4", "EBITDA Margin Y2 Q1"} <= labels
+        assert "Revenue Growth Y5" not in labels
+
+
+def test_annual_drivers_keep_year_labels():
+    annual = {**INPUTS, "revenue_growth": np.full(3, 0.08), "ebitda_margin": np.full(3, 0.2), "periods_per_year": 1}
+    assert {"Revenue Growth Y1", "Revenue Growth Y3"} <= set(tornado_analysis(annual)["input"])
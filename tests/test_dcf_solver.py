@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from dcf_engine import value_from_inputs
+from dcf_solver import implied_revenue_growth, implied_terminal_growth, implied_wacc, market_value_wacc, solve_batched
+
+INPUTS = {
+    "current_revenue": 1000.0,
+    "revenue_growth": np.array([0.10, 0.08, 0.06, 0.05, 0.04]),
+    "ebitda_margin": np.array([0.20, 0.21, 0.22, 0.22, 0.22]),
+    "capex_ratio": 0.05,
+    "depreciation_ratio": 0.03,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.25,
+    "risk_free_rate": 0.07,
+    "beta": 1.1,
+    "market_risk_premium": 0.06,
+    "cost_of_debt": 0.08,
+    "equity_ratio": 0.7,
+    "terminal_growth": 0.03,
+    "net_debt": 100.0,
+    "shares_outstanding": 10.0,
+}
+
+
+def price_at(**overrides):
+    return float(value_from_inputs({**INPUTS, **overrides})["value_per_share"])
+
+
+def test_solve_batched_returns_nan_outside_the_bracket():
+    roots = solve_batched(lambda x: (x ** 2, 2 * x), 0.0, 2.0, np.array([1.0, 2.0, 9.0, np.nan]))
+    np.testing.assert_allclose(roots[:2], [1.0, np.sqrt(2.0)])
+    assert np.isnan(roots[2:]).all()
+
+
+def test_implied_rates_recover_the_inputs():
+    prices = np.array([price_at(wacc=0.09), price_at(wacc=0.12)])
+    np.testing.assert_allclose(implied_wacc(INPUTS, prices), [0.09, 0.12], atol=1e-7)
+
+    price = price_at(wacc=0.10, terminal_growth=0.025)
+    assert implied_terminal_growth({**INPUTS, "wacc": 0.10}, price) == pytest.approx(0.025, abs=1e-7)
+
+    price = price_at(revenue_growth=np.full(5, 0.07))
+    assert implied_revenue_growth(INPUTS, price) == pytest.approx(0.07, abs=1e-7)
+
+
+def test_unreachable_and_missing_prices_are_nan_rows():
+    prices = np.array([price_at(wacc=0.10), 1e9, np.nan])
+    solved = implied_wacc(INPUTS, prices)
+    assert solved[0] == pytest.approx(0.10, abs=1e-7)
+    assert np.isnan(solved[1:]).all()
+
+
+def test_market_value_wacc_is_a_fixed_point():
+    result = market_value_wacc({**INPUTS, "net_debt": np.array([100.0, 2000.0, -50.0])})
+    equity, debt = result["equity_value"], np.maximum([100.0, 2000.0, -50.0], 0)
+    np.testing.assert_allclose(result["equity_ratio"], 100 * equity / (equity + debt), rtol=1e-8)
+    assert result["equity_ratio"][2] == pytest.approx(100.0)  # Net cash carries no debt weight
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from fundamentals_store import FundamentalsStore, read_statements
+
+
+def test_dumps_are_normalised_to_whole_units(tmp_path):
+    path = str(tmp_path / "statements.csv")
+    pd.DataFrame({
+        "Ticker": ["abc", "abc", "xyz"],
+        "period_end": ["2023-03-31", "2024-03-31", "2024-12-31"],
+        "revenue": [900.0, 1000.0, 5_000_000.0],
+        "ebitda": [180.0, 200.0, 1_000_000.0],
+        "capex": [45.0, 50.0, 250_000.0],
+        "depreciation": [27.0, 30.0, 150_000.0],
+        "wc_change": [3.0, 2.0, 10_000.0],
+        "shares_outstanding": [10.0, 10.0, 2_000_000.0],
+        "scale": [1e6, 1e6, None],  # abc reports in millions, xyz in units
+        "share_scale": [1e6, 1e6, None],
+    }).to_csv(path, index=False)
+
+    store = FundamentalsStore(str(tmp_path / "store"))
+    store.write(read_statements(path))
+    abc, xyz = store.latest_inputs("ABC"), store.latest_inputs("XYZ")
+    assert abc["current_revenue"] == pytest.approx(1e9)
+    assert abc["shares_outstanding"] == pytest.approx(1e7)
+    assert abc["ebitda_margin"] == pytest.approx(0.2)
+    assert abc["capex_ratio"] == pytest.approx(0.05)
+    assert xyz["current_revenue"] == pytest.approx(5e6)
+
+
+def test_scale_arguments_apply_without_columns(tmp_path):
+    path = str(tmp_path / "statements.csv")
+    pd.DataFrame({"ticker": ["abc"], "period_end": ["2024-03-31"], "revenue": [2.5], "shares_outstanding": [3.0]}) \
+        .to_csv(path, index=False)
+    frame = read_statements(path, scale=1e6, share_scale=1e3)
+    assert frame["revenue"].iloc[0] == pytest.approx(2.5e6)
+    assert frame["shares_outstanding"].iloc[0] == pytest.approx(3e3)
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from job_queue import CANCELLED, DONE, FAILED, JobCancelled, JobQueue
+
+
+def blocking(event, progress=None):
+    """Job that reports progress until event is set"""
+    while not event.wait(0.01):
+        progress(0.5)
+    return "finished"
+
+
+def test_same_key_reattaches_until_released():
+    jobs = JobQueue(max_workers=1)
+    first = jobs.submit(lambda progress: 42, key="k")
+    assert jobs.result(first) == 42
+    assert jobs.submit(lambda progress: 0, key="k") == first
+    jobs.release(first)
+    second = jobs.submit(lambda progress: 7, key="k")
+    assert second != first
+    assert jobs.result(second) == 7
+
+
+def test_failed_job_reports_error_and_is_resubmitted():
+    jobs = JobQueue(max_workers=1)
+
+    def fail(progress):
+        raise ValueError("bad input")
+
+    job_id = jobs.submit(fail, key="k")
+    assert jobs.wait(job_id)["state"] == FAILED
+    with pytest.raises(RuntimeError, match="bad input"):
+        jobs.result(job_id)
+    assert jobs.submit(lambda progress: 1, key="k") != job_id
+
+
+def test_cancel_stops_running_and_queued_jobs():
+    jobs = JobQueue(max_workers=1)
+    event = threading.Event()
+    running = jobs.submit(blocking, event)
+    queued = jobs.submit(blocking, event)
+    jobs.cancel(queued)
+    jobs.cancel(running)
+    assert jobs.wait(running, 5)["state"] == CANCELLED
+    assert jobs.status(queued)["state"] == CANCELLED
+    with pytest.raises(JobCancelled):
+        jobs.result(running)
+
+
+def test_shared_job_is_cancelled_only_by_its_last_holder():
+    jobs = JobQueue(max_workers=1)
+    event = threading.Event()
+    job_id = jobs.submit(blocking, event, key="k", holder="a")
+    assert jobs.submit(blocking, event, key="k", holder="b") == job_id
+
+    assert jobs.cancel(job_id, "a") is False
+    event.set()
+    assert jobs.wait(job_id, 5)["state"] == DONE
+
+    assert jobs.result(job_id) == "finished"
+    jobs.release(job_id, "b")  # "a" let go when it cancelled, so "b" was the last holder
+    with pytest.raises(KeyError):
+        jobs.status(job_id)
+
+
+def test_release_keeps_job_for_remaining_holders():
+    jobs = JobQueue(max_workers=1)
+    job_id = jobs.submit(lambda progress: 3, key="k", holder="a")
+    jobs.submit(lambda progress: 0, key="k", holder="b")
+    jobs.wait(job_id)
+    jobs.release(job_id, "a")
+    assert jobs.result(job_id) == 3
+    jobs.release(job_id, "b")
+    with pytest.raises(KeyError):
+        jobs.status(job_id)
+
+
+def test_last_holder_cancels_and_resubmit_starts_afresh():
+    jobs = JobQueue(max_workers=1)
+    event = threading.Event()
+    job_id = jobs.submit(blocking, event, key="k", holder="a")
+    assert jobs.cancel(job_id, "a") is True
+    assert jobs.submit(blocking, event, key="k", holder="a") != job_id
+    event.set()
+
+
+def test_finished_jobs_beyond_max_finished_are_pruned():
+    jobs = JobQueue(max_workers=1, max_finished=2)
+    ids = [jobs.submit(lambda progress, i=i: i) for i in range(4)]
+    for job_id in ids:
+        jobs.wait(job_id)
+    jobs.submit(lambda progress: None)
+    assert len([job for job in jobs.jobs() if job["state"] == DONE]) <= 3
+    with pytest.raises(KeyError):
+        jobs.status(ids[0])
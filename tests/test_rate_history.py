@@ -0,0 +1,30 @@
+from datetime import date
+
+from rate_history import RateHistory
+
+
+def test_older_and_missing_dates_are_merged(tmp_path):
+    history = RateHistory(str(tmp_path))
+    assert history.append("India", "10Y", [date(2025, 1, 3), date(2025, 1, 6)], [6.9, 6.8]) == 2
+    reader = RateHistory(str(tmp_path))
+    assert reader.latest("India", "10Y")[1] == 6.8
+
+    # A gap, an older date, a duplicate and a newer date
+    added = history.append("India", "10Y", [date(2025, 1, 4), date(2025, 1, 2), date(2025, 1, 6), date(2025, 1, 7)],
+                           [6.85, 7.0, 1.0, 6.7])
+    assert added == 3
+    for store in (history, reader, RateHistory(str(tmp_path))):
+        series = store.series("India", "10Y")
+        assert [day.day for day in series.index] == [2, 3, 4, 6, 7]
+        assert series.tolist() == [7.0, 6.9, 6.85, 6.8, 6.7]
+
+
+def test_reimport_adds_nothing(tmp_path):
+    history = RateHistory(str(tmp_path))
+    dates = [date(2025, 1, 2), date(2025, 1, 3)]
+    history.append("USA", "2Y", dates, [4.1, 4.2])
+    history.append("India", "10Y", dates, [6.9, 6.8])
+    assert history.append("USA", "2Y", dates, [4.1, 4.2]) == 0
+    assert history.append("USA", "2Y", [date(2025, 1, 1)], [4.0]) == 1
+    assert RateHistory(str(tmp_path)).series("India", "10Y").tolist() == [6.9, 6.8]
+    assert RateHistory(str(tmp_path)).series("USA", "2Y").tolist() == [4.0, 4.1, 4.2]
@@ -0,0 +1,169 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from rate_sources import FetchCancelled, HedgedRateFetcher, RateUnavailable, StooqSource, TradingEconomicsSource
+
+PAGE = b'<html><span id="p_cur_val">6.42</span></html>'
+CSV = b"Symbol,Date,Time,Open,High,Low,Close\n10INY.B,2026-10-19,17:00,6.4,6.5,6.3,6.38\n"
+
+
+class StubServer:
+    """Local HTTP server answering every GET with body after delay, a 500, or a slow stream"""
+
+    def __init__(self, body):
+        self.body, self.mode, self.delay, self.hits = body, "ok", 0.0, 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.hits += 1
+                time.sleep(stub.delay)
+                if stub.mode == "error":
+                    self.send_response(500)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                if stub.mode == "stream":
+                    self.send_response(200)
+                    self.end_headers()
+                    try:
+                        for _ in range(100):
+                            self.wfile.write(b" " * 16384)
+                            self.wfile.flush()
+                            time.sleep(0.05)
+                    except OSError:
+                        pass
+                    return
+                self.send_response(200)
+                self.send_header("Content-Length", str(len(stub.body)))
+                self.end_headers()
+                self.wfile.write(stub.body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RecordingSource(TradingEconomicsSource):
+    """Primary source that remembers how its last fetch ended"""
+
+    def fetch(self, country, timeout, cancel):
+        try:
+            return super().fetch(country, timeout, cancel)
+        except Exception as e:
+            self.error = e
+            raise
+
+
+@pytest.fixture
+def stubs():
+    primary, backup = StubServer(PAGE), StubServer(CSV)
+    yield primary, backup
+    primary.close()
+    backup.close()
+
+
+def fetcher(stubs, **options):
+    primary, backup = stubs
+    options = {"hedge_delay": 0.2, "timeout": 2.0, **options}
+    return HedgedRateFetcher([RecordingSource(primary.url), StooqSource(backup.url)], **options)
+
+
+def test_primary_answers_without_hedging(stubs):
+    assert fetcher(stubs).fetch("India") == (6.42, "tradingeconomics")
+    assert stubs[1].hits == 0
+
+
+def test_slow_primary_is_hedged_after_the_delay(stubs):
+    stubs[0].delay = 1.0
+    started = time.monotonic()
+    assert fetcher(stubs).fetch("India") == (6.38, "stooq")
+    assert 0.2 <= time.monotonic() - started < 0.8
+
+
+@pytest.mark.parametrize("mode", ["error", "refused"])
+def test_failed_primary_fails_over_at_once(stubs, mode):
+    rates = fetcher(stubs, hedge_delay=5.0)
+    if mode == "refused":
+        stubs[0].close()
+    else:
+        stubs[0].mode = mode
+    started = time.monotonic()
+    assert rates.fetch("India") == (6.38, "stooq")
+    assert time.monotonic() - started < 1.0
+    assert rates.stats()["tradingeconomics"]["failures"] == 1
+
+
+def test_losing_request_is_cancelled_and_not_counted(stubs):
+    stubs[0].mode = "stream"
+    rates = fetcher(stubs)
+    primary = rates.sources[0]
+    assert rates.fetch("India") == (6.38, "stooq")
+    for _ in range(50):
+        if hasattr(primary, "error"):
+            break
+        time.sleep(0.05)
+    assert isinstance(primary.error, FetchCancelled)
+    assert rates.stats()["tradingeconomics"]["failures"] == 0
+
+
+def test_breaker_opens_and_resets_after_cooldown(stubs):
+    stubs[0].mode = "error"
+    rates = fetcher(stubs, failure_threshold=2, cooldown=0.5)
+    for _ in range(2):
+        assert rates.fetch("India") == (6.38, "stooq")
+    assert rates.stats()["tradingeconomics"]["state"] == "open"
+
+    hits = stubs[0].hits
+    assert rates.fetch("India") == (6.38, "stooq")
+    assert stubs[0].hits == hits  # Skipped while open
+
+    stubs[0].mode = "ok"
+    time.sleep(0.6)
+    assert rates.fetch("India") == (6.42, "tradingeconomics")
+    assert rates.stats()["tradingeconomics"]["state"] == "closed"
+
+
+def test_overall_timeout_records_failures_only(stubs):
+    for stub in stubs:
+        stub.delay = 0.8
+    rates = fetcher(stubs, hedge_delay=0.05, timeout=0.3)
+    with pytest.raises(RateUnavailable, match="within"):
+        rates.fetch("India")
+    time.sleep(1.0)  # Let the late answers arrive
+    for name in ("tradingeconomics", "stooq"):
+        assert rates.stats()[name]["failures"] == 1
+        assert rates.stats()[name]["successes"] == 0
+
+
+class StubbornSource(StooqSource):
+    """Source that ignores cancellation and answers late"""
+
+    def fetch(self, country, timeout, cancel):
+        time.sleep(0.5)
+        return 6.0
+
+
+def test_late_answer_after_timeout_is_not_counted_as_success():
+    rates = HedgedRateFetcher([StubbornSource()], timeout=0.2)
+    with pytest.raises(RateUnavailable):
+        rates.fetch("India")
+    time.sleep(0.6)
+    assert rates.stats()["stooq"]["failures"] == 1
+    assert rates.stats()["stooq"]["successes"] == 0
+
+
+def test_unsupported_country_is_unavailable(stubs):
+    with pytest.raises(RateUnavailable):
+        fetcher(stubs).fetch("Atlantis")
@@ -0,0 +1,44 @@
+import pickle
+import sqlite3
+from datetime import date
+
+import numpy as np
+
+from dcf_engine import ENGINE_VERSION
+from run_store import RunStore
+
+
+def test_round_trip_without_pickle(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    run = {
+        "inputs": {"revenue_growth": np.array([0.1, 0.08]), "valuation_date": date(2025, 3, 31), "beta": 1.2},
+        "simulation_values": np.random.default_rng(0).normal(size=100),
+        "percentiles": {10: 1.0, 90: 2.0},
+        "simulation_summary": None,
+    }
+    store.put("key", run)
+    loaded = store.get("key")
+    np.testing.assert_array_equal(loaded["simulation_values"], run["simulation_values"])
+    np.testing.assert_array_equal(loaded["inputs"]["revenue_growth"], run["inputs"]["revenue_growth"])
+    assert loaded["inputs"]["valuation_date"] == date(2025, 3, 31)
+    assert loaded["percentiles"] == {10: 1.0, 90: 2.0}
+    assert loaded["simulation_summary"] is None
+
+
+def test_pickled_and_stale_payloads_are_never_loaded(tmp_path):
+    path = str(tmp_path / "runs.sqlite")
+    store = RunStore(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO runs VALUES ('pickled', ?, 0, 0, 1, ?)", (ENGINE_VERSION, pickle.dumps({"a": 1})))
+        conn.execute("INSERT INTO runs VALUES ('stale', '0.9', 0, 0, 1, ?)", (b"",))
+    assert store.get("pickled") is None
+    assert "stale" not in RunStore(path)
+
+
+def test_get_loads_only_requested_fields(tmp_path):
+    store = RunStore(str(tmp_path / "runs.sqlite"))
+    store.put("key", {"simulation_values": np.arange(10.0), "sensitivity_grid": np.eye(3)})
+    partial = store.get("key", fields=("sensitivity_grid",))
+    assert list(partial) == ["sensitivity_grid"]
+    np.testing.assert_array_equal(partial["sensitivity_grid"], np.eye(3))
+    assert store.get("missing", fields=("sensitivity_grid",)) is None
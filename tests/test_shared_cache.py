@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from shared_cache import SharedResultCache
+
+
+def test_sessions_share_one_read_only_copy():
+    cache = SharedResultCache()
+    try:
+        published = cache.publish("k", "a", {"values": np.arange(4.0)})
+        again = cache.publish("k", "b", {"values": np.zeros(4)})  # Published first by "a"
+        shared = cache.get("k", "c")
+        np.testing.assert_array_equal(again["values"], np.arange(4.0))
+        assert np.shares_memory(published["values"], shared["values"])
+        with pytest.raises(ValueError):
+            shared["values"][0] = 1.0
+        assert cache.stats()["holders"] == {"k": 3}
+        assert cache.get("missing", "a") is None
+    finally:
+        cache.close()
+
+
+def test_only_unheld_entries_are_evicted_least_recent_first():
+    cache = SharedResultCache(max_bytes=2 * 800)
+    try:
+        for key in ("a", "b"):
+            cache.publish(key, "s", {"values": np.zeros(100)})
+        cache.publish("c", "s", {"values": np.zeros(100)})
+        assert cache.stats()["entries"] == 3  # Everything is held
+
+        cache.release("a", "s")
+        cache.release("b", "s")
+        cache.get("a", "t")  # "a" is held again and now the most recent
+        cache.publish("d", "s", {"values": np.zeros(100)})
+        assert cache.get("b", "t") is None
+        assert cache.get("a", "t") is not None
+
+        cache.release_holder("s")
+        cache.release_holder("t")
+        cache.publish("e", "u", {"values": np.zeros(100)})
+        assert cache.stats()["entries"] == 2
+    finally:
+        cache.close()
+
+
+def test_idle_holders_are_released():
+    cache = SharedResultCache(max_bytes=800, holder_ttl=-1)
+    try:
+        cache.publish("a", "s", {"values": np.zeros(100)})
+        cache.publish("b", "t", {"values": np.zeros(100)})  # "s" counts as idle, so "a" can go
+        assert cache.get("a", "t") is None
+    finally:
+        cache.close()
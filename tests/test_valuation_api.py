@@ -0,0 +1,75 @@
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from dcf_engine import value_from_inputs
+from valuation_api import MicroBatcher, ValuationServer
+
+BASE = {
+    "current_revenue": 1000.0,
+    "revenue_growth": [0.10, 0.08, 0.06, 0.05, 0.04],
+    "ebitda_margin": [0.20, 0.21, 0.22, 0.22, 0.22],
+    "capex_ratio": 0.05,
+    "depreciation_ratio": 0.03,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.25,
+    "wacc": 0.10,
+    "terminal_growth": 0.03,
+    "net_debt": 100.0,
+    "shares_outstanding": 10.0,
+}
+
+BAD = [
+    {**BASE, "wacc": "x"},
+    {**BASE, "revenue_growth": [[0.10, 0.08, 0.06, 0.05, 0.04]] * 2},
+    {**BASE, "tax_rate": [0.25, 0.25]},
+    "not an object",
+]
+
+
+def good(i):
+    return {**BASE, "wacc": 0.08 + 0.001 * i}
+
+
+def test_bad_requests_fail_alone_and_batcher_keeps_running():
+    batcher = MicroBatcher(max_delay=0.05)
+    goods = [batcher.submit(good(i)) for i in range(6)]
+    bads = [batcher.submit(inputs) for inputs in BAD]
+    for i, future in enumerate(goods):
+        expected = value_from_inputs(good(i))["value_per_share"]
+        assert future.result(timeout=5)["value_per_share"] == pytest.approx(expected)
+    for future in bads:
+        with pytest.raises((TypeError, ValueError)):
+            future.result(timeout=5)
+    assert batcher.submit(good(0)).result(timeout=5)["value_per_share"] == pytest.approx(
+        value_from_inputs(good(0))["value_per_share"])
+
+
+def test_concurrent_mixed_requests_over_http():
+    server = ValuationServer(("127.0.0.1", 0), max_delay=0.02)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+
+    def post(inputs):
+        conn = http.client.HTTPConnection(host, port, timeout=10)
+        conn.request("POST", "/value", body=json.dumps(inputs), headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        payload = json.loads(response.read())
+        conn.close()
+        return response.status, payload
+
+    try:
+        requests = [good(i) for i in range(8)] + BAD[:3]
+        with ThreadPoolExecutor(len(requests)) as pool:
+            responses = list(pool.map(post, requests))
+        for i, (status, payload) in enumerate(responses[:8]):
+            assert status == 200
+            assert payload["value_per_share"] == pytest.approx(value_from_inputs(good(i))["value_per_share"])
+        assert [status for status, _ in responses[8:]] == [400, 400, 400]
+        assert post(good(1))[0] == 200
+    finally:
+        server.shutdown()
+        server.server_close()
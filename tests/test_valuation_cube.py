@@ -0,0 +1,89 @@
+import glob
+import itertools
+
+import numpy as np
+import pytest
+
+from dcf_engine import engine_inputs, run_dcf
+from valuation_cube import MAX_CUBE_CELLS, cube_slice, max_points_per_axis, valuation_cube
+
+INPUTS = {
+    "current_revenue": 1000.0,
+    "revenue_growth": np.array([0.10, 0.08, 0.06, 0.05]),
+    "ebitda_margin": np.array([0.20, 0.21, 0.22, 0.22]),
+    "capex_ratio": 0.05,
+    "depreciation_ratio": 0.03,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.25,
+    "risk_free_rate": 0.07,
+    "beta": 1.1,
+    "market_risk_premium": 0.06,
+    "cost_of_debt": 0.08,
+    "equity_ratio": 0.7,
+    "terminal_growth": 0.03,
+    "net_debt": 100.0,
+    "shares_outstanding": 10.0,
+}
+
+AXES = {
+    "wacc": [0.09, 0.10, 0.11],
+    "terminal_growth": [0.02, 0.03, 0.04],
+    "ebitda_margin": [0.18, 0.25],
+    "revenue_growth_2": [0.0, 0.15],
+}
+
+
+def scalar_value(wacc, terminal_growth, margin, year_2_growth):
+    """One cell valued on its own with run_dcf"""
+    kwargs = engine_inputs(INPUTS)
+    growth = INPUTS["revenue_growth"].copy()
+    growth[1] = year_2_growth
+    kwargs.update(wacc=wacc, terminal_growth=terminal_growth, ebitda_margin=np.full(4, margin),
+                  revenue_growth=growth)
+    return run_dcf(**kwargs)["value_per_share"]
+
+
+def test_chunked_memmap_cube_matches_scalar_loop(tmp_path):
+    path = str(tmp_path / "cube.npy")
+    fractions = []
+    cube = valuation_cube(INPUTS, AXES, chunk_size=5, path=path, workers=2, progress=fractions.append)
+
+    assert isinstance(cube["values"], np.memmap) and not cube["values"].flags.writeable
+    assert cube["values"].shape == (3, 3, 2, 2)
+    assert np.load(path).shape == (3, 3, 2, 2)
+    assert glob.glob(str(tmp_path / "*.part")) == []
+    assert max(fractions) == pytest.approx(1.0)
+    for index in itertools.product(*(range(len(values)) for values in AXES.values())):
+        point = [values[i] for values, i in zip(AXES.values(), index)]
+        assert cube["values"][index] == pytest.approx(scalar_value(*point))
+
+    in_memory = valuation_cube(INPUTS, AXES, chunk_size=7, workers=1)["values"]
+    np.testing.assert_allclose(in_memory, cube["values"])
+
+
+def test_slice_holds_other_axes_at_their_middle():
+    cube = valuation_cube(INPUTS, AXES)
+    df = cube_slice(cube, "terminal_growth", "wacc", fixed={"ebitda_margin": 1})
+    assert df.shape == (3, 3)
+    assert df.loc[0.02, 0.11] == pytest.approx(scalar_value(0.11, 0.02, 0.25, 0.15))
+
+
+def test_cancelled_cube_leaves_no_file(tmp_path):
+    path = str(tmp_path / "cube.npy")
+
+    def cancel(fraction):
+        raise RuntimeError("cancelled")
+
+    with pytest.raises(RuntimeError):
+        valuation_cube(INPUTS, AXES, chunk_size=5, path=path, workers=1, progress=cancel)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_oversized_cube_is_refused():
+    axes = {name: np.zeros(20) for name in ("wacc", "terminal_growth", "capex_ratio", "depreciation_ratio",
+                                             "wc_ratio", "tax_rate")}
+    with pytest.raises(ValueError, match="limit"):
+        valuation_cube(INPUTS, axes)
+    for axes_count in range(2, 10):
+        points = max_points_per_axis(axes_count)
+        assert points ** axes_count <= MAX_CUBE_CELLS < (points + 1) ** axes_count
@@ -0,0 +1,259 @@
+import argparse
+import json
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from dcf_engine import PERIOD_INPUTS, SCALAR_INPUTS, engine_inputs, simulate_value_per_share, value_from_inputs
+from dcf_sensitivity import tornado_analysis
+from run_store import canonical_hash
+from simulation_summary import SimulationSummary
+
+# Inputs that are stacked across coalesced requests; any other input must match for requests to share a batch
+STACKED_INPUTS = SCALAR_INPUTS + ("wacc",)
+
+VALUE_OUTPUTS = ("enterprise_value", "equity_value", "value_per_share")
+
+
+def _json_ready(value):
+    """Plain JSON types, with NaN and infinities as null"""
+    if isinstance(value, dict):
+        return {str(name): _json_ready(item) for name, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_json_ready(item) for item in np.asarray(value).tolist()]
+    if isinstance(value, (float, np.floating)):
+        return float(value) if np.isfinite(value) else None
+    if isinstance(value, np.integer):
+        return int(value)
+    return value
+
+
+class MicroBatcher:
+    """Coalesce valuation requests arriving within max_delay seconds into one engine call
+
+    submit returns a Future for the request's enterprise, equity and per-share values.
+    Each request is checked on its own first, so a malformed one fails only its own
+    future. Requests with the same input layout (same keys, horizon and non-stacked
+    options) are stacked into one value_from_inputs batch; if a batch still fails, its
+    members are valued one by one so the error stays with the request that caused it.
+    """
+
+    def __init__(self, max_delay=0.002, max_batch=4096):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def submit(self, inputs):
+        future = Future()
+        self._queue.put((inputs, future))
+        return future
+
+    def _loop(self):
+        while True:
+            items = []
+            try:
+                self._collect(items)
+                self._evaluate(items)
+            except Exception as e:
+                # Never let one batch stop the thread; whatever is unanswered fails with the error
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _collect(self, items):
+        items.append(self._queue.get())
+        deadline = time.perf_counter() + self.max_delay
+        while len(items) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                items.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _prepare(inputs):
+        """Request inputs with stacked values as floats and per-period values as 1-D float arrays"""
+        if not isinstance(inputs, dict):
+            raise TypeError("Valuation inputs must be a JSON object")
+        prepared = dict(inputs)
+        for name in STACKED_INPUTS:
+            if name in prepared:
+                if np.ndim(prepared[name]) != 0:
+                    raise ValueError(f"{name} must be a single number")
+                prepared[name] = float(prepared[name])
+        for name in PERIOD_INPUTS:
+            if name in prepared:
+                values = np.asarray(prepared[name], dtype=float)
+                if values.ndim != 1 or values.size == 0:
+                    raise ValueError(f"{name} must be a non-empty list of per-period numbers")
+                prepared[name] = values
+        return prepared
+
+    @staticmethod
+    def _signature(inputs):
+        fixed = {name: value for name, value in inputs.items() if name not in STACKED_INPUTS + PERIOD_INPUTS}
+        periods = tuple(np.shape(inputs.get(name, ())) for name in PERIOD_INPUTS)
+        return tuple(sorted(inputs)), periods, canonical_hash(fixed)
+
+    def _evaluate(self, items):
+        groups = defaultdict(list)
+        for inputs, future in items:
+            try:
+                inputs = self._prepare(inputs)
+                groups[self._signature(inputs)].append((inputs, future))
+            except Exception as e:
+                future.set_exception(e)
+
+        for members in groups.values():
+            try:
+                self._value_batch(members)
+            except Exception as e:
+                if len(members) == 1:
+                    members[0][1].set_exception(e)
+                    continue
+                for member in members:
+                    try:
+                        self._value_batch([member])
+                    except Exception as member_error:
+                        member[1].set_exception(member_error)
+
+    @staticmethod
+    def _value_batch(members):
+        """Value a group of same-layout requests in one engine call and resolve their futures"""
+        first = members[0][0]
+        batch = dict(first)
+        for name in first:
+            if name in STACKED_INPUTS or name in PERIOD_INPUTS:
+                batch[name] = np.stack([inputs[name] for inputs, _ in members])
+        result = value_from_inputs(batch)
+        values = [{name: float(result[name][i]) for name in VALUE_OUTPUTS} for i in range(len(members))]
+        for (_, future), value in zip(members, values):
+            future.set_result(value)
+
+
+class ValuationRequestHandler(BaseHTTPRequestHandler):
+    """JSON endpoints: POST /value, /simulate, /sensitivity; GET /stats"""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive, so clients can reuse one connection
+    disable_nagle_algorithm = True  # Headers and body go out as separate writes
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.server.latency_stats())
+        else:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+
+    def do_POST(self):
+        routes = {"/value": self._value, "/simulate": self._simulate, "/sensitivity": self._sensitivity}
+        if self.path not in routes:
+            self._send(404, {"error": f"Unknown endpoint {self.path}"})
+            return
+
+        started = time.perf_counter()
+        try:
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            response, status = routes[self.path](body), 200
+        except (KeyError, TypeError, ValueError) as e:
+            response, status = {"error": f"Invalid request: {type(e).__name__}: {e}"}, 400
+        except Exception as e:
+            response, status = {"error": f"{type(e).__name__}: {e}"}, 500
+        latency_ms = (time.perf_counter() - started) * 1000
+        self.server.record_latency(self.path, latency_ms)
+        response["latency_ms"] = latency_ms
+        self._send(status, response)
+
+    def _value(self, body):
+        """One input dict, or {"scenarios": [...]} to value a list in one call"""
+        if "scenarios" in body:
+            futures = [self.server.batcher.submit(inputs) for inputs in body["scenarios"]]
+            return {"results": [future.result() for future in futures]}
+        return self.server.batcher.submit(body).result()
+
+    def _simulate(self, body):
+        inputs = dict(body)
+        num_simulations = int(inputs.pop("num_simulations", 5000))
+        seed = int(inputs.pop("seed", 42))
+        model_inputs = engine_inputs(inputs)
+        base = {name: model_inputs[name] for name in ("wacc", "terminal_growth") + PERIOD_INPUTS}
+        summary = SimulationSummary(simulate_value_per_share(model_inputs, base, num_simulations, seed)).trimmed(3)
+        return {
+            "count": summary.count,
+            "mean": summary.mean if summary else None,
+            "std": summary.std if summary else None,
+            "percentiles": summary.percentile_table if summary else {},
+            "prob_positive": summary.prob_positive,
+        }
+
+    def _sensitivity(self, body):
+        inputs = dict(body)
+        delta = float(inputs.pop("delta", 0.10))
+        df = tornado_analysis(inputs, delta=delta)
+        return {"base_value": df.attrs["base_value"], "tornado": df.to_dict(orient="records")}
+
+    def _send(self, status, payload):
+        data = json.dumps(_json_ready(payload)).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass  # Latency is reported per request and at /stats instead of per-line logs
+
+
+class ValuationServer(ThreadingHTTPServer):
+    """HTTP server holding the shared micro-batcher and per-endpoint latency history"""
+
+    daemon_threads = True
+
+    def __init__(self, address, max_delay=0.002, max_batch=4096):
+        super().__init__(address, ValuationRequestHandler)
+        self.batcher = MicroBatcher(max_delay, max_batch)
+        self._latencies = defaultdict(lambda: deque(maxlen=10000))
+
+    def record_latency(self, path, latency_ms):
+        self._latencies[path].append(latency_ms)
+
+    def latency_stats(self):
+        """Request count and latency percentiles (ms) over recent requests, per endpoint"""
+        stats = {}
+        for path, latencies in list(self._latencies.items()):
+            values = np.array(latencies)
+            stats[path] = {
+                "count": values.size,
+                "mean_ms": values.mean(),
+                "p50_ms": np.percentile(values, 50),
+                "p99_ms": np.percentile(values, 99),
+            }
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local JSON valuation API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--batch-delay-ms", type=float, default=2.0,
+                        help="How long to wait for more requests before valuing a batch")
+    args = parser.parse_args()
+
+    server = ValuationServer((args.host, args.port), max_delay=args.batch_delay_ms / 1000)
+    print(f"Valuation API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+import os
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from math import prod
+
+import numpy as np
+import pandas as pd
+
+from dcf_engine import PERIOD_INPUTS, engine_inputs, value_from_inputs
+
+# Largest cube valued in one call (200 MB of float64), so a many-axis sweep cannot run for days or fill the disk
+MAX_CUBE_CELLS = 25_000_000
+
+# Default half-width of each sweep axis around its base value, in the input's own units
+AXIS_SPANS = {
+    "wacc": 0.03,
+    "terminal_growth": 0.015,
+    "revenue_growth": 0.10,
+    "ebitda_margin": 0.10,
+    "capex_ratio": 0.03,
+    "depreciation_ratio": 0.02,
+    "wc_ratio": 0.02,
+    "tax_rate": 0.05,
+}
+
+
+def _split_axis(name):
+    """("revenue_growth", 0) for "revenue_growth_1"; (name, None) for a whole-input axis"""
+    base, _, year = name.rpartition("_")
+    if base in PERIOD_INPUTS and year.isdigit():
+        return base, int(year) - 1
+    return name, None
+
+
+def axis_base(inputs, name):
+    """Base value of a sweep axis; a whole-path axis takes the average of its periods"""
+    source, period = _split_axis(name)
+    values = engine_inputs(inputs)[source] if source == "wacc" else inputs[source]
+    if period is not None:
+        return float(values[period])
+    return float(np.mean(values))
+
+
+def axis_grid(inputs, name, points, span=None):
+    """Evenly spaced sweep values centred on the axis base value"""
+    span = AXIS_SPANS[_split_axis(name)[0]] if span is None else span
+    base = axis_base(inputs, name)
+    return np.linspace(base - span, base + span, points)
+
+
+def _chunk_inputs(inputs, axes, shape, start, stop):
+    """Batched model inputs for flat cube cells start..stop"""
+    index = np.unravel_index(np.arange(start, stop), shape)
+    batch = dict(inputs)
+    # Whole-path axes set a flat level for every period; single-year axes then override one year
+    ordered = sorted(enumerate(axes.items()), key=lambda item: _split_axis(item[1][0])[1] is not None)
+    for position, (name, values) in ordered:
+        source, period = _split_axis(name)
+        level = np.asarray(values, dtype=float)[index[position]]
+        if source in PERIOD_INPUTS:
+            path = np.asarray(batch[source], dtype=float)
+            periods = path.shape[-1]
+            path = np.array(np.broadcast_to(path, (stop - start, periods)))
+            if period is None:
+                path[:] = level[:, None]
+            else:
+                path[:, period] = level
+            batch[source] = path
+        else:
+            batch[source] = level
+    return batch
+
+
+def max_points_per_axis(num_axes, limit=MAX_CUBE_CELLS):
+    """Most points per axis that keep a cube over num_axes axes within limit cells"""
+    points = int(limit ** (1 / num_axes))
+    while (points + 1) ** num_axes <= limit:
+        points += 1
+    while points ** num_axes > limit:
+        points -= 1
+    return points
+
+
+def valuation_cube(inputs, axes, chunk_size=100_000, path=None, workers=None, progress=None):
+    """Value per share over the full factorial grid of the given axes
+
+    inputs are sidebar-level model inputs (see dcf_engine.engine_inputs); axes maps
+    an input name to its sweep values, in cube axis order. "wacc" overrides the CAPM
+    build-up, "revenue_growth" / "ebitda_margin" set a flat level for every year and
+    "revenue_growth_3" style names sweep a single year. Cells are evaluated in chunks
+    of chunk_size on a thread pool so memory stays bounded; with path the cube is
+    written to a memory-mapped .npy file instead of RAM and returned as a read-only
+    memmap. The file only appears at path once complete, so readers never see a partial
+    cube. progress, if given, is called with the fraction of cells done after each chunk.
+    Raises ValueError for grids of more than MAX_CUBE_CELLS cells.
+    Returns {"axes": {name: values}, "values": ndarray}.
+    """
+    axes = {name: np.asarray(values, dtype=float) for name, values in axes.items()}
+    shape = tuple(len(values) for values in axes.values())
+    if prod(shape) > MAX_CUBE_CELLS:
+        raise ValueError(f"A {' x '.join(map(str, shape))} cube has {prod(shape):,} cells; "
+                         f"the limit is {MAX_CUBE_CELLS:,}")
+    if path is None:
+        values = np.empty(shape)
+    else:
+        partial = f"{path}.{uuid.uuid4().hex}.part"
+        values = np.lib.format.open_memmap(partial, mode="w+", dtype=float, shape=shape)
+    flat = values.reshape(-1)
+    total = prod(shape)
+    done = [0]
+    lock = threading.Lock()
+
+    def evaluate(start):
+        stop = min(start + chunk_size, total)
+        flat[start:stop] = value_from_inputs(_chunk_inputs(inputs, axes, shape, start, stop))["value_per_share"]
+        if progress is not None:
+            with lock:
+                done[0] += stop - start
+                progress(done[0] / total)
+
+    starts = range(0, total, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    try:
+        if workers == 1 or len(starts) == 1:
+            for start in starts:
+                evaluate(start)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                list(pool.map(evaluate, starts))
+    except BaseException:
+        if path is not None:
+            del values, flat
+            os.remove(partial)
+        raise
+
+    if path is not None:
+        values.flush()
+        del values, flat
+        os.replace(partial, path)
+        values = np.load(path, mmap_mode="r")
+    return {"axes": axes, "values": values}
+
+
+def cube_slice(cube, row_axis, column_axis, fixed=None):
+    """Two-axis slice of a valuation cube as a DataFrame (rows x columns)
+
+    fixed maps each remaining axis to the index of its held value; axes not listed
+    are held at their middle point.
+    """
+    names = list(cube["axes"])
+    fixed = fixed or {}
+    selection = tuple(
+        slice(None) if name in (row_axis, column_axis) else fixed.get(name, len(values) // 2)
+        for name, values in cube["axes"].items()
+    )
+    matrix = np.asarray(cube["values"][selection])
+    if names.index(row_axis) > names.index(column_axis):
+        matrix = matrix.T
+    return pd.DataFrame(matrix, index=cube["axes"][row_axis], columns=cube["axes"][column_axis])
@@ -0,0 +1,241 @@
+import argparse
+import json
+import os
+import zipfile
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from lxml import etree
+
+from fundamentals_store import DEFAULT_FUNDAMENTALS_DIR, FIELDS, FundamentalsStore
+
+# XBRL concepts (local names, US GAAP, IFRS and dei) feeding each item, most preferred first
+CONCEPTS = {
+    "revenue": ("Revenues", "RevenueFromContractWithCustomerExcludingAssessedTax",
+                "RevenueFromContractWithCustomerIncludingAssessedTax", "SalesRevenueNet", "Revenue"),
+    "operating_income": ("OperatingIncomeLoss", "ProfitLossFromOperatingActivities"),
+    "depreciation": ("DepreciationDepletionAndAmortization", "DepreciationAndAmortization",
+                     "DepreciationAmortizationAndAccretionNet", "Depreciation",
+                     "DepreciationAndAmortisationExpense"),
+    "capex": ("PaymentsToAcquirePropertyPlantAndEquipment",
+              "PurchaseOfPropertyPlantAndEquipmentClassifiedAsInvestingActivities",
+              "PurchaseOfPropertyPlantAndEquipment"),
+    "wc_change": ("IncreaseDecreaseInOperatingCapital",),
+    "current_assets": ("AssetsCurrent", "CurrentAssets"),
+    "current_liabilities": ("LiabilitiesCurrent", "CurrentLiabilities"),
+    "diluted_shares": ("WeightedAverageNumberOfDilutedSharesOutstanding",
+                       "AdjustedWeightedAverageShares", "WeightedAverageNumberOfSharesOutstandingBasic",
+                       "WeightedAverageShares"),
+    "shares_instant": ("CommonStockSharesOutstanding", "EntityCommonStockSharesOutstanding"),
+}
+CONCEPT_ITEMS = {concept: (item, priority)
+                 for item, concepts in CONCEPTS.items() for priority, concept in enumerate(concepts)}
+
+# Duration contexts counted as a fiscal year (52/53-week years included)
+ANNUAL_DAYS = (340, 380)
+
+# Archive members that are taxonomy schemas or linkbases rather than instance documents
+LINKBASE_SUFFIXES = ("_cal.xml", "_def.xml", "_lab.xml", "_pre.xml", "_ref.xml")
+
+MANIFEST_FILE = "ingested.json"
+
+
+def _local(tag):
+    return tag.rpartition("}")[2] if isinstance(tag, str) else ""
+
+
+def _context(elem):
+    """Period of a context, or None for dimensional (segment / scenario) contexts"""
+    if elem.find(".//{*}segment") is not None or elem.find("{*}scenario") is not None:
+        return None
+    period = elem.find("{*}period")
+    if period is None:
+        return None
+    return {name: (period.findtext(f"{{*}}{name}") or "").strip()[:10] or None
+            for name in ("startDate", "endDate", "instant")}
+
+
+def parse_instance(source, name=""):
+    """Annual statement rows from one XBRL instance document
+
+    source is a path or a binary file object; the document is streamed with
+    iterparse and every top-level element is cleared once read, so memory is bounded
+    by the non-dimensional contexts and the facts for CONCEPTS rather than the file
+    size. Returns a list of dicts with ticker, period_end and FIELDS, in whole units as
+    XBRL reports them (decimals only states the rounding), which is what the store holds;
+    the ticker is dei:TradingSymbol, else the file name prefix ("aapl-20231230.xml").
+    """
+    contexts, facts, ticker, entity = {}, {}, None, None
+    depth = 0
+    for event, elem in etree.iterparse(source, events=("start", "end"), huge_tree=True,
+                                       remove_comments=True, recover=True):
+        if event == "start":
+            depth += 1
+            if depth == 1 and _local(elem.tag) != "xbrl":
+                return []  # Not an instance document (schema, linkbase or unrelated XML)
+            continue
+        depth -= 1
+        if depth != 1:
+            continue
+
+        local = _local(elem.tag)
+        if local == "context":
+            context = _context(elem)
+            if context is not None:
+                contexts[elem.get("id")] = context
+            if entity is None:
+                entity = (elem.findtext(".//{*}identifier") or "").strip() or None
+        elif local == "TradingSymbol" and ticker is None:
+            ticker = (elem.text or "").strip().upper() or None
+        elif local in CONCEPT_ITEMS and elem.get("contextRef") and elem.text:
+            try:
+                value = float(elem.text)
+            except ValueError:
+                value = None
+            if value is not None:
+                facts.setdefault(elem.get("contextRef"), []).append(CONCEPT_ITEMS[local] + (value,))
+        # Drop the element and everything already read before it
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+    ticker = ticker or os.path.basename(name).split("-")[0].split("_")[0].upper() or entity
+    return _annual_rows(contexts, facts, ticker) if ticker else []
+
+
+def _annual_rows(contexts, facts, ticker):
+    """Resolve one filing's facts into one row per fiscal year"""
+    durations, instants = {}, {}
+    for context_id, items in facts.items():
+        context = contexts.get(context_id)
+        if context is None:
+            continue
+        if context["instant"]:
+            period = instants.setdefault(context["instant"], {})
+        elif context["startDate"] and context["endDate"]:
+            start, end = date.fromisoformat(context["startDate"]), date.fromisoformat(context["endDate"])
+            if not ANNUAL_DAYS[0] <= (end - start).days <= ANNUAL_DAYS[1]:
+                continue
+            period = durations.setdefault(context["endDate"], {"start": start})
+        else:
+            continue
+        for item, priority, value in items:
+            if priority < period.get(item, (np.inf,))[0]:
+                period[item] = (priority, value)
+
+    def value(items, item):
+        return items[item][1] if item in items else np.nan
+
+    def working_capital(day):
+        items = instants.get(day, {})
+        return value(items, "current_assets") - value(items, "current_liabilities")
+
+    rows = []
+    latest = max(durations, default=None)
+    cover_shares = [value(items, "shares_instant") for day, items in sorted(instants.items())
+                    if latest and day > latest and "shares_instant" in items]
+    for end, items in durations.items():
+        if "revenue" not in items:
+            continue
+        wc_change = value(items, "wc_change")
+        if np.isnan(wc_change):
+            wc_change = working_capital(end) - working_capital((items["start"] - timedelta(days=1)).isoformat())
+        shares = value(items, "diluted_shares")
+        if np.isnan(shares):
+            shares = value(instants.get(end, {}), "shares_instant")
+        if np.isnan(shares) and end == latest and cover_shares:
+            shares = cover_shares[0]  # Cover-page count, reported shortly after the fiscal year end
+        rows.append({
+            "ticker": ticker,
+            "period_end": end,
+            "revenue": value(items, "revenue"),
+            "ebitda": value(items, "operating_income") + value(items, "depreciation"),
+            "capex": value(items, "capex"),
+            "depreciation": value(items, "depreciation"),
+            "wc_change": wc_change,
+            "shares_outstanding": shares,
+        })
+    return rows
+
+
+def _is_instance_name(name):
+    name = name.lower()
+    return name.endswith((".xml", ".xbrl")) and not name.endswith(LINKBASE_SUFFIXES)
+
+
+def iter_sources(paths):
+    """(signature, name, opener) for every instance document under paths
+
+    paths may be instance files, directories (searched recursively) or zip archives of
+    filings. The signature identifies a file version, so reruns can skip what was read.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                yield from iter_sources(sorted(os.path.join(root, file) for file in files
+                                               if _is_instance_name(file) or file.lower().endswith(".zip")))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                for member in archive.infolist():
+                    if _is_instance_name(member.filename):
+                        signature = f"{os.path.abspath(path)}::{member.filename}:{member.file_size}:{member.CRC}"
+                        yield signature, member.filename, lambda member=member: archive.open(member)
+        elif _is_instance_name(path):
+            stat = os.stat(path)
+            signature = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+            yield signature, path, lambda path=path: open(path, "rb")
+
+
+def ingest(paths, store=None, force=False, progress=None):
+    """Parse every new filing under paths and append periods not yet in the store
+
+    Files already ingested (same path, size and timestamp or CRC) are skipped unless
+    force is set; the list is kept next to the store. progress, if given, is called
+    with each file name as it is parsed. Returns {"files", "skipped", "periods", "added"}.
+    """
+    store = FundamentalsStore() if store is None else store
+    manifest_path = os.path.join(store.path, MANIFEST_FILE)
+    seen = set()
+    if not force and os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            seen = set(json.load(f))
+
+    rows, parsed, skipped = [], [], 0
+    for signature, name, opener in iter_sources(paths):
+        if signature in seen:
+            skipped += 1
+            continue
+        if progress is not None:
+            progress(name)
+        with opener() as source:
+            rows.extend(parse_instance(source, name))
+        parsed.append(signature)
+
+    added = 0
+    if rows:
+        frame = pd.DataFrame(rows, columns=("ticker", "period_end") + FIELDS)
+        added = store.append(frame)
+    # Recorded only once the periods are stored, so an interrupted run is simply repeated
+    os.makedirs(store.path, exist_ok=True)
+    temporary = manifest_path + ".tmp"
+    with open(temporary, "w") as f:
+        json.dump(sorted(seen | set(parsed)), f)
+    os.replace(temporary, manifest_path)
+    return {"files": len(parsed), "skipped": skipped, "periods": len(rows), "added": added}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load annual statement data from XBRL filings into the fundamentals store")
+    parser.add_argument("paths", nargs="+", help="XBRL instance files, directories or zip archives of filings")
+    parser.add_argument("--store", default=DEFAULT_FUNDAMENTALS_DIR)
+    parser.add_argument("--force", action="store_true", help="Re-read files that were ingested before")
+    args = parser.parse_args()
+
+    summary = ingest(args.paths, FundamentalsStore(args.store), force=args.force)
+    print(f"Read {summary['files']} filings ({summary['skipped']} unchanged skipped), "
+          f"found {summary['periods']} annual periods, added {summary['added']} new")
+
+
+if __name__ == "__main__":
+    main()